@@ -0,0 +1,12 @@
+"""Performance and scale harnesses that sit next to the TestSprite TC scripts.
+
+Each module is runnable on its own from the testsprite_tests directory, e.g.
+
+    python -m perf.sse_fanout --connections 100,500,1000
+
+and writes its JSON report to tmp/perf/. Dependencies are in
+requirements.txt; the reference models have unit tests under perf/tests/:
+
+    pip install -r requirements.txt
+    python -m pytest perf/tests
+"""
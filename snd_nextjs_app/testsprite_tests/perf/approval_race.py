@@ -0,0 +1,364 @@
+"""Concurrent approve, reject and return calls racing on the same record.
+
+Several managers act on one record at once. Per scenario, every round makes
+a fresh record in the starting state (seeded employees, far-future dates,
+tagged perf-race), opens --parallel pooled connections, and releases
+--parallel calls at it through an asyncio.Barrier, cycling through the
+scenario's actions:
+
+    timesheet-approve         POST /api/timesheets/{id}/approve from submitted
+    timesheet-approve-reject  ... mixed with POST /api/timesheets/{id}/reject
+    leave-approve             PUT  /api/leave-requests/{id}/approve from pending
+    leave-approve-reject      ... mixed with PUT /api/leave-requests/{id}/reject
+    leave-return              PUT  /api/leave-requests/{id}/return from approved
+    quotation-approve-reject  POST /api/quotations/{id}/approve and .../reject
+    payroll-approve           POST /api/payroll/{id}/approve from pending
+    payroll-pay               POST /api/payroll/{id}/process-payment from approved
+
+A round is consistent when some serial order of the same calls, through the
+routes' own state rules (timesheets move one stage per approve), gives both
+the successes the callers saw and the state left in the database. Successes
+beyond the most any serial order allows are extra effects: a payroll paid or
+approved twice, a stage skipped, a leave both approved and rejected.
+Notifications created during the round are counted, and ones repeated with
+the same recipient, title and message are duplicates.
+
+Blocking is reported per scenario as the race latency next to an
+uncontended call on a fresh record (blocked = race - solo), the spread
+between the first and last call to finish in a round, and Postgres lock
+waits sampled while the calls run. The quotation routes keep no state, so
+only their successes are checked.
+
+The records are deleted at the end; notifications are left, so use a scratch
+database (perf.dbsnapshot).
+
+Usage:
+    python -m perf.approval_race --parallel 8 --rounds 10 --fail-on-inconsistent
+"""
+import argparse
+import asyncio
+import datetime
+import time
+from collections import Counter
+
+from perf import pgstats
+from perf.common import load_config, open_session, summarize, write_report
+from perf.history import record_run
+from perf.seed import SEED_PREFIX, connect, seed_scale
+
+TAG = "perf-race"
+FAR_DAYS = 365 * 50
+
+# (target, action) -> (method, path, payload for the record)
+ACTIONS = {
+    ("timesheet", "approve"): ("POST", "/api/timesheets/{id}/approve", lambda record: {}),
+    ("timesheet", "reject"): ("POST", "/api/timesheets/{id}/reject", lambda record: {"reason": TAG}),
+    ("leave", "approve"): ("PUT", "/api/leave-requests/{id}/approve", lambda record: {}),
+    ("leave", "reject"): ("PUT", "/api/leave-requests/{id}/reject", lambda record: {"rejection_reason": TAG}),
+    ("leave", "return"): (
+        "PUT", "/api/leave-requests/{id}/return",
+        lambda record: {"return_date": record["return_date"], "return_reason": TAG},
+    ),
+    ("quotation", "approve"): ("POST", "/api/quotations/{id}/approve", lambda record: {"notes": TAG}),
+    ("quotation", "reject"): ("POST", "/api/quotations/{id}/reject", lambda record: {"notes": TAG}),
+    ("payroll", "approve"): ("POST", "/api/payroll/{id}/approve", lambda record: {}),
+    ("payroll", "pay"): (
+        "POST", "/api/payroll/{id}/process-payment",
+        lambda record: {"payment_method": "bank_transfer", "reference": TAG},
+    ),
+}
+
+# The state rules of the routes: target -> action -> {from state: to state}
+TRANSITIONS = {
+    "timesheet": {
+        "approve": {
+            "draft": "foreman_approved", "pending": "foreman_approved", "submitted": "foreman_approved",
+            "foreman_approved": "incharge_approved", "incharge_approved": "checking_approved",
+            "checking_approved": "manager_approved",
+        },
+        "reject": {
+            state: "rejected"
+            for state in ("submitted", "pending", "foreman_approved", "incharge_approved", "checking_approved")
+        },
+    },
+    "leave": {
+        "approve": {"pending": "approved"},
+        "reject": {"pending": "rejected"},
+        "return": {"approved": "returned"},
+    },
+    "quotation": {"approve": {"pending": "approved"}, "reject": {"pending": "rejected"}},
+    "payroll": {"approve": {"pending": "approved"}, "pay": {"approved": "paid"}},
+}
+
+# scenario -> (target, starting state, actions cycled over the parallel calls)
+SCENARIOS = {
+    "timesheet-approve": ("timesheet", "submitted", ("approve",)),
+    "timesheet-approve-reject": ("timesheet", "submitted", ("approve", "reject")),
+    "leave-approve": ("leave", "pending", ("approve",)),
+    "leave-approve-reject": ("leave", "pending", ("approve", "reject")),
+    "leave-return": ("leave", "approved", ("return",)),
+    "quotation-approve-reject": ("quotation", "pending", ("approve", "reject")),
+    "payroll-approve": ("payroll", "pending", ("approve",)),
+    "payroll-pay": ("payroll", "approved", ("pay",)),
+}
+
+STATE_TABLES = {"timesheet": "timesheets", "leave": "employee_leaves", "payroll": "payrolls"}
+
+
+class Records:
+    """Fresh records in a given state, each on its own seeded employee and far-future date."""
+
+    def __init__(self, conn, employees):
+        self.conn = conn
+        self.employees = employees
+        self.made = 0
+        self.base = datetime.date.today() + datetime.timedelta(days=FAR_DAYS)
+
+    async def make(self, target, state):
+        n = self.made
+        self.made += 1
+        employee = self.employees[n % len(self.employees)]
+        day = self.base + datetime.timedelta(days=n)
+        if target == "timesheet":
+            record_id = await self.conn.fetchval(
+                """
+                INSERT INTO timesheets (employee_id, date, start_time, hours_worked, status, description, updated_at)
+                VALUES ($1, $2, $2::date + time '07:00', 8, $3, $4, CURRENT_DATE) RETURNING id
+                """,
+                employee, day, state, TAG,
+            )
+        elif target == "leave":
+            record_id = await self.conn.fetchval(
+                """
+                INSERT INTO employee_leaves (employee_id, leave_type, start_date, end_date, days, reason, status, updated_at)
+                VALUES ($1, 'annual', $2, $2::date + 9, 10, $3, $4, CURRENT_DATE) RETURNING id
+                """,
+                employee, day, TAG, state,
+            )
+        elif target == "payroll":
+            record_id = await self.conn.fetchval(
+                """
+                INSERT INTO payrolls (employee_id, month, year, base_salary, final_amount, status, notes, updated_at)
+                VALUES ($1, $2, $3, 1000, 1000, $4, $5, CURRENT_DATE) RETURNING id
+                """,
+                employee, n % 12 + 1, self.base.year + n // 12, state, TAG,
+            )
+        else:
+            # The quotation routes do not look the record up; any id will do
+            record_id = n + 1
+        return {"id": record_id, "return_date": str(day + datetime.timedelta(days=4))}
+
+    async def state(self, target, record_id):
+        table = STATE_TABLES.get(target)
+        if not table:
+            return None
+        return await self.conn.fetchval(f"SELECT status FROM {table} WHERE id = $1", record_id)
+
+
+async def clear_records(conn):
+    await conn.execute("DELETE FROM timesheets WHERE description = $1", TAG)
+    await conn.execute("DELETE FROM employee_leaves WHERE reason = $1", TAG)
+    await conn.execute("DELETE FROM payroll_items WHERE payroll_id IN (SELECT id FROM payrolls WHERE notes = $1)", TAG)
+    await conn.execute("DELETE FROM payrolls WHERE notes = $1", TAG)
+
+
+def serial_outcomes(target, start, counts):
+    """Every (successes per action, final state) some serial order of the calls can give.
+
+    `counts` maps action -> number of calls; successes come back in sorted
+    action order.
+    """
+    moves = TRANSITIONS[target]
+    names = sorted(counts)
+    outcomes = set()
+    seen = set()
+
+    def walk(state, left, won):
+        if (state, left, won) in seen:
+            return
+        seen.add((state, left, won))
+        if not any(left):
+            outcomes.add((won, state))
+            return
+        for i, name in enumerate(names):
+            if left[i]:
+                to = moves[name].get(state)
+                walk(
+                    to or state,
+                    left[:i] + (left[i] - 1,) + left[i + 1:],
+                    won[:i] + (won[i] + (to is not None),) + won[i + 1:],
+                )
+
+    walk(start, tuple(counts[name] for name in names), (0,) * len(names))
+    return names, outcomes
+
+
+async def call(session, base_url, target, action, record):
+    method, path, payload = ACTIONS[(target, action)]
+    started = time.perf_counter()
+    async with session.request(method, base_url + path.format(id=record["id"]), json=payload(record)) as resp:
+        await resp.read()
+        status = resp.status
+    return action, status, (time.perf_counter() - started) * 1000
+
+
+async def warm(session, base_url, parallel):
+    """Open `parallel` keep-alive connections so the race does not wait on connects."""
+
+    async def one():
+        async with session.get(base_url + "/api/auth/session") as resp:
+            await resp.read()
+
+    await asyncio.gather(*(one() for _ in range(parallel)))
+
+
+async def notifications_since(conn, last_id):
+    rows = await conn.fetch(
+        "SELECT user_email, title, message FROM notifications WHERE id > $1", last_id
+    )
+    repeated = Counter((row["user_email"], row["title"], row["message"]) for row in rows)
+    return len(rows), sum(count - 1 for count in repeated.values() if count > 1)
+
+
+async def race_round(session, base_url, conn, watcher, records, scenario, parallel, settle):
+    target, start, actions = SCENARIOS[scenario]
+    record = await records.make(target, start)
+    last_notification = await conn.fetchval("SELECT coalesce(max(id), 0) FROM notifications")
+    barrier = asyncio.Barrier(parallel)
+    plan = [actions[i % len(actions)] for i in range(parallel)]
+
+    async def one(action):
+        await barrier.wait()
+        return await call(session, base_url, target, action, record)
+
+    await warm(session, base_url, parallel)
+    async with pgstats.LockSampler(watcher) as locks:
+        responses = await asyncio.gather(*(one(action) for action in plan))
+    await asyncio.sleep(settle)
+
+    final = await records.state(target, record["id"])
+    names, outcomes = serial_outcomes(target, start, Counter(plan))
+    won = tuple(sum(1 for action, status, _ in responses if action == name and status < 300) for name in names)
+    if final is None:
+        consistent = any(won == serial_won for serial_won, _ in outcomes)
+    else:
+        consistent = (won, final) in outcomes
+    notified, duplicated = await notifications_since(conn, last_notification)
+    latencies = [ms for _, _, ms in responses]
+    return {
+        "record_id": record["id"],
+        "final_state": final,
+        "successes": dict(zip(names, won)),
+        "statuses": dict(Counter(status for _, status, _ in responses)),
+        "consistent": consistent,
+        "extra_successes": max(0, sum(won) - max(sum(serial_won) for serial_won, _ in outcomes)),
+        "notifications": notified,
+        "duplicate_notifications": duplicated,
+        "latencies_ms": latencies,
+        "spread_ms": max(latencies) - min(latencies),
+        "locks": locks.summary(),
+    }
+
+
+async def solo(session, base_url, records, scenario):
+    """One uncontended call of the scenario's first action on a fresh record."""
+    target, start, actions = SCENARIOS[scenario]
+    record = await records.make(target, start)
+    _, status, ms = await call(session, base_url, target, actions[0], record)
+    return status, ms
+
+
+async def run_scenario(session, base_url, conn, watcher, records, scenario, parallel, rounds, settle):
+    status, solo_ms = await solo(session, base_url, records, scenario)
+    results = [
+        await race_round(session, base_url, conn, watcher, records, scenario, parallel, settle)
+        for _ in range(rounds)
+    ]
+    latencies = [ms for result in results for ms in result["latencies_ms"]]
+    inconsistent = [result for result in results if not result["consistent"]]
+    return {
+        "parallel": parallel,
+        "rounds": rounds,
+        "solo": {"status": status, "ms": solo_ms},
+        "race_latency_ms": summarize(latencies),
+        "blocked_ms": summarize([max(0.0, ms - solo_ms) for ms in latencies]),
+        "spread_ms": summarize([result["spread_ms"] for result in results]),
+        "lock_wait_ms": sum(result["locks"]["lock_wait_ms"] for result in results),
+        "max_waiting_backends": max((result["locks"]["max_waiting_backends"] for result in results), default=0),
+        "statuses": dict(sum((Counter(result["statuses"]) for result in results), Counter())),
+        "final_states": dict(Counter(str(result["final_state"]) for result in results)),
+        "inconsistent_rounds": len(inconsistent),
+        "extra_successes": sum(result["extra_successes"] for result in results),
+        "notifications": sum(result["notifications"] for result in results),
+        "duplicate_notifications": sum(result["duplicate_notifications"] for result in results),
+        "inconsistent_examples": [
+            {key: result[key] for key in ("record_id", "successes", "final_state", "statuses")}
+            for result in inconsistent[:5]
+        ],
+    }, latencies, solo_ms
+
+
+async def run_check(args):
+    config = load_config()
+    base_url = config["base_url"]
+    scenarios = args.scenarios.split(",")
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+        return 2
+    conn = await connect()
+    watcher = await connect()
+    session, _ = await open_session(config, limit=args.parallel)
+    results = {}
+    samples = {}
+    try:
+        await seed_scale(conn, employees=max(100, args.rounds + 1), seed=args.seed)
+        employees = [
+            row["id"] for row in await conn.fetch(
+                "SELECT id FROM employees WHERE file_number LIKE $1 ORDER BY id", SEED_PREFIX + "E%"
+            )
+        ]
+        records = Records(conn, employees)
+        for scenario in scenarios:
+            result, latencies, solo_ms = await run_scenario(
+                session, base_url, conn, watcher, records, scenario, args.parallel, args.rounds, args.settle
+            )
+            results[scenario] = result
+            samples[f"{scenario} race"] = latencies
+            samples[f"{scenario} solo"] = [solo_ms]
+            print(
+                f"{scenario:<25} x{args.parallel}  solo {solo_ms:>6.0f} ms  race p95 "
+                f"{result['race_latency_ms'].get('p95', 0):>6.0f} ms  blocked p95 {result['blocked_ms'].get('p95', 0):>6.0f} ms  "
+                f"lock wait {result['lock_wait_ms']:>6.0f} ms  "
+                f"inconsistent {result['inconsistent_rounds']}/{args.rounds}  extra {result['extra_successes']}  "
+                f"dup notifications {result['duplicate_notifications']}"
+            )
+    finally:
+        await session.close()
+        await clear_records(conn)
+        await watcher.close()
+        await conn.close()
+
+    history_run = record_run("approval-race", samples, {"parallel": args.parallel, "rounds": args.rounds})
+    path = write_report(
+        "approval-race",
+        {"history_run": history_run, "parallel": args.parallel, "rounds": args.rounds, "scenarios": results},
+    )
+    print(f"Report written to {path}")
+    failed = any(result["inconsistent_rounds"] or result["duplicate_notifications"] for result in results.values())
+    return 1 if failed and args.fail_on_inconsistent else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--parallel", type=int, default=8, help="calls released together per round")
+    parser.add_argument("--rounds", type=int, default=10, help="rounds per scenario, each on a fresh record")
+    parser.add_argument("--settle", type=float, default=0.5, help="seconds to wait for background work after a round")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fail-on-inconsistent", action="store_true")
+    raise SystemExit(asyncio.run(run_check(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
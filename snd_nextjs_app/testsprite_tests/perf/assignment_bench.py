@@ -0,0 +1,354 @@
+"""Equipment and operator assignment checks (TC022) against long histories.
+
+Check-in/check-out goes through CentralAssignmentService and
+AssignmentService: a new assignment first completes whatever is still active
+for the same machine (equipment_rental_history, project_equipment,
+rental_items) or operator (employee_assignments), and removing one
+reactivates the operator's latest completed assignment. Those statements
+filter on the whole history of the machine or operator, so at every history
+length L the chosen seeded machines and operators are topped up to L
+completed assignments and each step is timed --repeats times per machine:
+
+    check-out   POST   /api/equipment/{id}/rentals          (manual, with operator)
+    history     GET    /api/equipment/{id}/rentals
+    assign      POST   /api/employees/{id}/assignments
+    unassign    DELETE /api/employees/{id}/assignments/{assignment}
+
+recording latency, statements per request (perf.pgstats) and the slowest
+statements. A power law fitted to median latency against L shows how the
+check scales with history.
+
+At the longest history the double-booking check fires --race-parallel
+requests that start the same day for one machine (each with its own
+operator), and for one operator, released together, --race-rounds times.
+The check holds when each round leaves at most one active assignment;
+otherwise the round is double-booked. Postgres lock waits are sampled while
+the requests race.
+
+Every row the harness adds carries perf-assign in its notes (and name), and
+is deleted at the end; the assignments, rental items and status the chosen
+machines and operators had are put back. Project assignments of seeded
+machines are not, so use a scratch database (perf.dbsnapshot).
+
+Usage:
+    python -m perf.assignment_bench --lengths 10,100,1000,5000 --race-parallel 8
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+
+from perf import pgstats
+from perf.common import linear_fit, load_config, open_session, parse_levels, summarize, write_report
+from perf.history import record_run
+from perf.scale_bench import classify
+from perf.seed import SEED_PREFIX, connect, seed_scale
+
+TAG = "perf-assign"
+STEPS = ("check-out", "history", "assign", "unassign")
+
+
+def first_row(data):
+    """The created row from a route's data, which is a row or a one-row list."""
+    if isinstance(data, list):
+        return data[0] if data else {}
+    return data or {}
+
+
+async def request(session, method, url, payload=None):
+    started = time.perf_counter()
+    async with session.request(method, url, json=payload) as resp:
+        body = await resp.read()
+        status = resp.status
+    ms = (time.perf_counter() - started) * 1000
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    return status, data, ms
+
+
+async def pick(conn, machines, operators):
+    equipment = await conn.fetch(
+        "SELECT id FROM equipment WHERE door_number LIKE $1 ORDER BY id LIMIT $2", SEED_PREFIX + "D%", machines
+    )
+    employees = await conn.fetch(
+        "SELECT id FROM employees WHERE file_number LIKE $1 ORDER BY id LIMIT $2", SEED_PREFIX + "E%", operators
+    )
+    return [row["id"] for row in equipment], [row["id"] for row in employees]
+
+
+async def remember(conn, machines, operators):
+    """What the chosen machines and operators look like before the harness touches them."""
+    return {
+        "equipment": await conn.fetch("SELECT id, status FROM equipment WHERE id = ANY($1)", machines),
+        "history": await conn.fetch(
+            "SELECT id, status, end_date FROM equipment_rental_history WHERE equipment_id = ANY($1)", machines
+        ),
+        "items": await conn.fetch(
+            "SELECT id, status, completed_date FROM rental_items WHERE equipment_id = ANY($1)", machines
+        ),
+        "assignments": await conn.fetch(
+            "SELECT id, status, end_date FROM employee_assignments WHERE employee_id = ANY($1)", operators
+        ),
+    }
+
+
+async def clear_rows(conn):
+    await conn.execute("DELETE FROM equipment_rental_history WHERE notes LIKE $1", f"%{TAG}%")
+    await conn.execute("DELETE FROM employee_assignments WHERE name = $1 OR notes LIKE $2", TAG, f"%{TAG}%")
+
+
+async def restore(conn, original):
+    await clear_rows(conn)
+    await conn.executemany("UPDATE equipment SET status = $2 WHERE id = $1", original["equipment"])
+    await conn.executemany(
+        "UPDATE equipment_rental_history SET status = $2, end_date = $3 WHERE id = $1", original["history"]
+    )
+    await conn.executemany(
+        "UPDATE rental_items SET status = $2, completed_date = $3 WHERE id = $1", original["items"]
+    )
+    await conn.executemany(
+        "UPDATE employee_assignments SET status = $2, end_date = $3 WHERE id = $1", original["assignments"]
+    )
+
+
+async def grow_history(conn, machines, operators, length):
+    """Top every machine and operator up to `length` completed one-day assignments, newest yesterday."""
+    for machine in machines:
+        have = await conn.fetchval(
+            "SELECT count(*) FROM equipment_rental_history WHERE equipment_id = $1 AND notes = $2", machine, TAG
+        )
+        await conn.execute(
+            """
+            INSERT INTO equipment_rental_history
+                (equipment_id, assignment_type, start_date, end_date, status, notes, updated_at)
+            SELECT $1, 'manual', CURRENT_DATE - (g + 1), CURRENT_DATE - g, 'completed', $2, now()
+            FROM generate_series($3::int + 1, $4::int) AS g
+            """,
+            machine, TAG, have, length,
+        )
+    for operator in operators:
+        have = await conn.fetchval(
+            "SELECT count(*) FROM employee_assignments WHERE employee_id = $1 AND name = $2 AND status = 'completed'",
+            operator, TAG,
+        )
+        await conn.execute(
+            """
+            INSERT INTO employee_assignments (employee_id, name, notes, type, start_date, end_date, status, updated_at)
+            SELECT $1, $2, $2, 'manual', CURRENT_DATE - (g + 1), CURRENT_DATE - g, 'completed', CURRENT_DATE
+            FROM generate_series($3::int + 1, $4::int) AS g
+            """,
+            operator, TAG, have, length,
+        )
+
+
+async def run_steps(session, base_url, machines, operators, today, repeats):
+    """One round of check-out, history, assign and unassign per machine; returns {step: [(status, ms)]}."""
+    results = {step: [] for step in STEPS}
+    for _ in range(repeats):
+        for machine, operator in zip(machines, operators):
+            status, _, ms = await request(
+                session, "POST", f"{base_url}/api/equipment/{machine}/rentals",
+                {"assignment_type": "manual", "employee_id": operator, "start_date": today, "notes": TAG},
+            )
+            results["check-out"].append((status, ms))
+            status, _, ms = await request(session, "GET", f"{base_url}/api/equipment/{machine}/rentals")
+            results["history"].append((status, ms))
+            status, data, ms = await request(
+                session, "POST", f"{base_url}/api/employees/{operator}/assignments",
+                {"name": TAG, "notes": TAG, "start_date": today},
+            )
+            results["assign"].append((status, ms))
+            created = first_row((data or {}).get("data")).get("id")
+            if created:
+                status, _, ms = await request(
+                    session, "DELETE", f"{base_url}/api/employees/{operator}/assignments/{created}"
+                )
+                results["unassign"].append((status, ms))
+    return results
+
+
+async def run_level(session, base_url, conn, counting, machines, operators, length, today, repeats):
+    await grow_history(conn, machines, operators, length)
+    if counting:
+        await pgstats.reset(conn)
+    results = await run_steps(session, base_url, machines, operators, today, repeats)
+    queries = await pgstats.snapshot(conn, top=5) if counting else None
+    requests = sum(len(calls) for calls in results.values())
+    steps = {}
+    ok = {}
+    for step, calls in results.items():
+        statuses = {}
+        for status, _ in calls:
+            statuses[status] = statuses.get(status, 0) + 1
+        ok[step] = [ms for status, ms in calls if status < 400]
+        steps[step] = {"statuses": statuses, "latency_ms": summarize(ok[step])}
+    return {
+        "history": length,
+        "steps": steps,
+        "statements_per_request": queries["calls"] / requests if queries and requests else None,
+        "top_statements": queries["top"] if queries else None,
+    }, ok
+
+
+async def race(session, conn, watcher, url_for, payload_for, parallel, count_active):
+    """Release `parallel` requests together; returns (responses, active rows left, lock summary)."""
+    gate = asyncio.Event()
+
+    async def one(i):
+        await gate.wait()
+        return await request(session, "POST", url_for(i), payload_for(i))
+
+    tasks = [asyncio.create_task(one(i)) for i in range(parallel)]
+    await asyncio.sleep(0)
+    async with pgstats.LockSampler(watcher) as locks:
+        gate.set()
+        responses = await asyncio.gather(*tasks)
+    return responses, await count_active(conn), locks.summary()
+
+
+async def double_booking(session, base_url, conn, watcher, machine, operator, racers, today, parallel, rounds):
+    """Race check-outs of one machine and assignments of one operator; count active rows after each round."""
+    cases = {
+        "machine": (
+            lambda i: f"{base_url}/api/equipment/{machine}/rentals",
+            lambda i: {"assignment_type": "manual", "employee_id": racers[i], "start_date": today, "notes": TAG},
+            lambda c: c.fetchval(
+                "SELECT count(*) FROM equipment_rental_history WHERE equipment_id = $1 AND status = 'active'", machine
+            ),
+        ),
+        "operator": (
+            lambda i: f"{base_url}/api/employees/{operator}/assignments",
+            lambda i: {"name": TAG, "notes": f"{TAG} racer {i}", "start_date": today},
+            lambda c: c.fetchval(
+                "SELECT count(*) FROM employee_assignments WHERE employee_id = $1 AND status = 'active'", operator
+            ),
+        ),
+    }
+    results = {}
+    for name, (url_for, payload_for, count_active) in cases.items():
+        statuses = {}
+        latencies = []
+        active_counts = []
+        lock_wait_ms = 0.0
+        max_waiting = 0
+        for _ in range(rounds):
+            responses, active, locks = await race(
+                session, conn, watcher, url_for, payload_for, parallel, count_active
+            )
+            for status, _, ms in responses:
+                statuses[status] = statuses.get(status, 0) + 1
+                latencies.append(ms)
+            active_counts.append(active)
+            lock_wait_ms += locks.get("lock_wait_ms") or 0
+            max_waiting = max(max_waiting, locks.get("max_waiting_backends") or 0)
+        doubled = sum(1 for active in active_counts if active > 1)
+        results[name] = {
+            "parallel": parallel,
+            "rounds": rounds,
+            "statuses": statuses,
+            "latency_ms": summarize(latencies),
+            "active_after_round": active_counts,
+            "double_booked_rounds": doubled,
+            "holds": doubled == 0,
+            "lock_wait_ms": lock_wait_ms,
+            "max_waiting_backends": max_waiting,
+        }
+        print(
+            f"race {name:<9} x{parallel}  {rounds} rounds  active left {max(active_counts, default=0)} at most  "
+            f"p95 {results[name]['latency_ms'].get('p95', 0):>7.0f} ms  lock wait {lock_wait_ms:>7.0f} ms  "
+            + ("holds" if doubled == 0 else f"DOUBLE-BOOKED in {doubled}/{rounds} rounds")
+        )
+    return results
+
+
+def fit_curves(levels):
+    curves = {}
+    for step in STEPS:
+        points = [(level["history"], level["steps"][step]["latency_ms"].get("p50")) for level in levels]
+        points = [(n, ms) for n, ms in points if n > 0 and ms]
+        if len(points) < 2:
+            continue
+        exponent, log_a, r2 = linear_fit([math.log(n) for n, _ in points], [math.log(ms) for _, ms in points])
+        curves[step] = {"exponent": exponent, "coefficient_ms": math.exp(log_a), "r2": r2, "class": classify(exponent)}
+    return curves
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    today = datetime.date.today().isoformat()
+    conn = await connect()
+    watcher = await connect()
+    counting = await pgstats.available(conn)
+    if not counting:
+        print("pg_stat_statements is not available; statement counts will be missing")
+    session, _ = await open_session(config, limit=max(2, args.race_parallel))
+    original = None
+    levels = []
+    samples = {}
+    races = None
+    try:
+        await seed_scale(
+            conn, employees=max(100, args.machines + args.race_parallel + 1), equipment=max(100, args.machines),
+            seed=args.seed,
+        )
+        machines, people = await pick(conn, args.machines, args.machines + args.race_parallel + 1)
+        operators, racers = people[:args.machines], people[args.machines:]
+        original = await remember(conn, machines, people)
+        for length in parse_levels(args.lengths):
+            level, ok = await run_level(
+                session, base_url, conn, counting, machines, operators, length, today, args.repeats
+            )
+            levels.append(level)
+            spr = level["statements_per_request"]
+            for step, result in level["steps"].items():
+                latency = result["latency_ms"]
+                samples[f"{step} @{length}"] = ok[step]
+                print(
+                    f"L={length:<6} {step:<10} {latency.get('p50', 0):>8.1f} ms p50  {latency.get('p95', 0):>8.1f} ms p95  "
+                    f"statuses {result['statuses']}"
+                )
+            print(f"L={length:<6} statements per request {'-' if spr is None else f'{spr:.1f}'}")
+        if args.race_rounds and racers:
+            races = await double_booking(
+                session, base_url, conn, watcher, machines[0], racers[-1], racers[:args.race_parallel], today,
+                args.race_parallel, args.race_rounds,
+            )
+    finally:
+        await session.close()
+        if original:
+            await restore(conn, original)
+        await watcher.close()
+        await conn.close()
+
+    curves = fit_curves(levels)
+    for step, curve in curves.items():
+        print(f"{step:<10} latency ~ L^{curve['exponent']:.2f} ({curve['class']}, r2={curve['r2']:.2f})")
+    history_run = record_run(
+        "assignment-bench", samples, {"lengths": args.lengths, "machines": args.machines, "repeats": args.repeats}
+    )
+    path = write_report(
+        "assignment-bench",
+        {"history_run": history_run, "pg_stat_statements": counting, "machines": args.machines,
+         "repeats": args.repeats, "levels": levels, "curves": curves, "double_booking": races},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", default="10,100,1000,5000", help="completed assignments per machine and operator")
+    parser.add_argument("--machines", type=int, default=3, help="seeded machines (and operators) timed per level")
+    parser.add_argument("--repeats", type=int, default=5, help="check-out/assign rounds per machine per level")
+    parser.add_argument("--race-parallel", type=int, default=8, help="requests released together per race round")
+    parser.add_argument("--race-rounds", type=int, default=5, help="race rounds per case, 0 to skip")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
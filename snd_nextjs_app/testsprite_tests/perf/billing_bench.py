@@ -0,0 +1,271 @@
+"""Automated monthly billing (TC017) at fleet scale, against the ERPNext stand-in.
+
+At every size N the first N seeded rentals (perf.seed: one to three items
+each, mixed daily, weekly and monthly rates, start dates up to two years back,
+some items completed) become the active, never-invoiced fleet and the other
+seeded rentals are parked as pending. Then POST /api/billing/automated-monthly,
+the same AutomatedMonthlyBillingService run scripts/automated-monthly-billing.js
+makes, bills every open month of every active rental. Per size the report has
+wall time, invoices and invoices per second, statements per invoice
+(perf.pgstats), stand-in calls per invoice by method and DocType, and the
+server's peak RSS growth.
+
+At --resume-size the run is repeated with Sales Invoice writes failing
+partway through, then run once more with the stand-in healthy, the way an
+operator re-runs a failed job:
+
+    outage  every Sales Invoice write after half the clean run's invoices fails
+    flaky   each Sales Invoice write fails with probability --flaky-rate
+
+Billed periods are keyed by (rental, period start) and checked against the
+clean run. Billing is resumable when the failed run and the re-run together
+bill every period exactly once; otherwise the report counts the periods that
+were skipped for good (the rental's last invoice date already moved past
+them) and those billed twice.
+
+The stand-in runs in-process with the seeded customers; start the app with
+NEXT_PUBLIC_ERPNEXT_URL pointing at it (default http://127.0.0.1:8010) and an
+API key and secret. Active rentals that are not seeded are billed too and
+reported as other_active, so use a scratch database (perf.dbsnapshot). The
+seeded rentals get their status and billing columns back at the end.
+
+Usage:
+    python -m perf.billing_bench --sizes 100,1000,5000,20000 --resume-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from perf import pgstats
+from perf.common import ProcessSampler, load_config, open_session, parse_levels, server_pid, write_report
+from perf.erpnext_standin import DEFAULT_PORT, ERPNextStandIn, Faults, add_fault_arguments, faults_from_args
+from perf.history import record_run
+from perf.seed import SEED_PREFIX, connect, seed_scale
+from perf.sync_bench import call_delta
+
+BILLING_URL = "/api/billing/automated-monthly"
+RENTALS = SEED_PREFIX + "R%"
+BILLING_COLUMNS = ("status", "last_invoice_date", "last_invoice_id", "last_invoice_amount", "outstanding_amount")
+
+
+async def remember(conn, original):
+    """Add the billing columns of seeded rentals not seen yet to `original`."""
+    rows = await conn.fetch(
+        f"SELECT id, {', '.join(BILLING_COLUMNS)} FROM rentals WHERE rental_number LIKE $1", RENTALS
+    )
+    for row in rows:
+        original.setdefault(row["id"], tuple(row[column] for column in BILLING_COLUMNS))
+
+
+async def restore(conn, original):
+    assignments = ", ".join(f"{column} = ${i}" for i, column in enumerate(BILLING_COLUMNS, start=2))
+    await conn.executemany(
+        f"UPDATE rentals SET {assignments} WHERE id = $1", [(rental_id, *values) for rental_id, values in original.items()]
+    )
+
+
+async def set_fleet(conn, size):
+    """Make the first `size` seeded rentals active and never invoiced.
+
+    Returns (fleet rental ids, count of other active rentals the run will bill too).
+    """
+    await conn.execute(
+        """
+        WITH ranked AS (
+            SELECT id, row_number() OVER (ORDER BY id) AS n FROM rentals WHERE rental_number LIKE $1
+        )
+        UPDATE rentals r
+        SET status = CASE WHEN ranked.n <= $2 THEN 'active' ELSE 'pending' END,
+            last_invoice_date = NULL, last_invoice_id = NULL, last_invoice_amount = NULL
+        FROM ranked WHERE r.id = ranked.id
+        """,
+        RENTALS, size,
+    )
+    fleet = await conn.fetch(
+        "SELECT id FROM rentals WHERE rental_number LIKE $1 AND status = 'active'", RENTALS
+    )
+    other = await conn.fetchval(
+        "SELECT count(*) FROM rentals WHERE status IN ('active', 'approved') AND rental_number NOT LIKE $1", RENTALS
+    )
+    return {row["id"] for row in fleet}, other
+
+
+async def reset_standin(conn, standin):
+    """Empty the stand-in and give it the seeded customers the invoices link to."""
+    standin.reset()
+    rows = await conn.fetch("SELECT erpnext_id, name FROM customers WHERE erpnext_id LIKE $1", SEED_PREFIX + "C%")
+    for row in rows:
+        standin.insert("Customer", {"name": row["erpnext_id"], "customer_name": row["name"]})
+    standin.calls.clear()
+
+
+async def run_billing(session, base_url, conn, standin, counting, pid):
+    """One billing run; returns (result, the invoices the route reports)."""
+    before = Counter(standin.calls)
+    if counting:
+        await pgstats.reset(conn)
+    async with ProcessSampler(pid) as sampler:
+        started = time.perf_counter()
+        async with session.post(base_url + BILLING_URL) as resp:
+            body = await resp.read()
+            status = resp.status
+        seconds = time.perf_counter() - started
+    queries = await pgstats.snapshot(conn, top=5) if counting else None
+    calls = call_delta(standin, before)
+    try:
+        data = (json.loads(body) or {}).get("data") or {}
+    except ValueError:
+        data = {}
+    invoices = data.get("invoices") or []
+    count = len(invoices)
+    return {
+        "status": status,
+        "seconds": seconds,
+        "processed": data.get("processed", 0),
+        "invoices": count,
+        "rental_errors": len(data.get("errors") or []),
+        "invoices_per_second": count / seconds if seconds else None,
+        "statements_per_invoice": queries["calls"] / count if queries and count else None,
+        "erpnext_calls_per_invoice": calls.get("total", 0) / count if count else None,
+        "erpnext_calls": calls,
+        "top_statements": queries["top"] if queries else None,
+        "server": sampler.summary(),
+    }, invoices
+
+
+def billed_periods(invoices):
+    """Counter of billed (rental, period start)."""
+    return Counter(
+        (invoice.get("rentalId"), str((invoice.get("billingPeriod") or {}).get("startDate", ""))[:10])
+        for invoice in invoices
+    )
+
+
+def coverage(expected, fleet, *runs):
+    """Compare the fleet's periods billed over several runs with the clean run's periods."""
+    expected = [key for key in expected if key[0] in fleet]
+    billed = Counter()
+    for periods in runs:
+        billed.update({key: count for key, count in periods.items() if key[0] in fleet})
+    skipped = [key for key in expected if key not in billed]
+    twice = [key for key, count in billed.items() if count > 1]
+    extra = [key for key in billed if key not in expected]
+    return {
+        "expected_periods": len(expected),
+        "billed_periods": len(billed),
+        "skipped": len(skipped),
+        "billed_twice": len(twice),
+        "unexpected": len(extra),
+        "skipped_examples": [{"rental_id": r, "period_start": p} for r, p in sorted(skipped, key=str)[:5]],
+        "resumable": not skipped and not twice,
+    }
+
+
+async def resume_check(session, base_url, conn, standin, counting, pid, size, clean, args):
+    scenarios = {
+        "outage": Faults(latency=args.latency, fail_writes_after=max(1, sum(clean.values()) // 2),
+                         doctypes=["Sales Invoice"]),
+        "flaky": Faults(latency=args.latency, error_rate=args.flaky_rate, error_status=503,
+                        doctypes=["Sales Invoice"], seed=args.seed),
+    }
+    healthy = standin.faults
+    results = {}
+    for name, faults in scenarios.items():
+        fleet, _ = await set_fleet(conn, size)
+        await reset_standin(conn, standin)
+        standin.faults = faults
+        try:
+            failed, failed_invoices = await run_billing(session, base_url, conn, standin, counting, pid)
+        finally:
+            standin.faults = healthy
+        rerun, rerun_invoices = await run_billing(session, base_url, conn, standin, counting, pid)
+        failed_periods, rerun_periods = billed_periods(failed_invoices), billed_periods(rerun_invoices)
+        expected_per_rental = Counter(rental for rental, _ in clean)
+        billed_per_rental = Counter(rental for rental, start in clean if failed_periods[(rental, start)])
+        partial = sum(1 for rental, count in billed_per_rental.items() if count < expected_per_rental[rental])
+        result = {
+            "failed_run": {key: failed[key] for key in ("status", "seconds", "invoices", "rental_errors", "erpnext_calls")},
+            "rentals_partly_billed": partial,
+            "rerun": {key: rerun[key] for key in ("status", "seconds", "invoices", "rental_errors")},
+            **coverage(clean, fleet, failed_periods, rerun_periods),
+        }
+        results[name] = result
+        print(
+            f"resume {name:<7} failed run {failed['invoices']:>6} invoices, re-run {rerun['invoices']:>6}  "
+            f"skipped {result['skipped']:>5}  twice {result['billed_twice']:>5}  "
+            f"{'resumable' if result['resumable'] else 'NOT resumable'}"
+        )
+    return results
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    standin = ERPNextStandIn(args.standin_host, args.standin_port, faults_from_args(args), args.api_key, args.api_secret)
+    conn = await connect()
+    counting = await pgstats.available(conn)
+    if not counting:
+        print("pg_stat_statements is not available; statements per invoice will be missing")
+    session, _ = await open_session(config, limit=2)
+    original = {}
+    levels = []
+    samples = {}
+    resume = None
+    try:
+        async with standin:
+            for size in parse_levels(args.sizes):
+                await seed_scale(
+                    conn, employees=max(100, size // 10), equipment=max(100, size // 10), rentals=size, seed=args.seed
+                )
+                await remember(conn, original)
+                _, other_active = await set_fleet(conn, size)
+                await reset_standin(conn, standin)
+                result, invoices = await run_billing(session, base_url, conn, standin, counting, pid)
+                result.update(rentals=size, other_active=other_active)
+                levels.append(result)
+                samples[f"billing @{size}"] = [result["seconds"] * 1000]
+                spi = result["statements_per_invoice"]
+                print(
+                    f"N={size:<6} {result['status']}  {result['seconds']:>8.1f}s  {result['invoices']:>7} invoices  "
+                    f"{result['invoices_per_second'] or 0:>7.1f} inv/s  "
+                    f"{'-' if spi is None else f'{spi:.1f}':>6} stmt/inv  "
+                    f"{result['erpnext_calls_per_invoice'] or 0:>5.1f} erpnext/inv"
+                    + (f"  (+{other_active} other active rentals)" if other_active else "")
+                )
+                if size == args.resume_size:
+                    resume = await resume_check(
+                        session, base_url, conn, standin, counting, pid, size, billed_periods(invoices), args
+                    )
+    finally:
+        await session.close()
+        await restore(conn, original)
+        await conn.close()
+
+    history_run = record_run("billing-bench", samples, {"sizes": args.sizes, "latency": args.latency})
+    path = write_report(
+        "billing-bench",
+        {"history_run": history_run, "server_pid": pid, "pg_stat_statements": counting, "levels": levels,
+         "resume_size": args.resume_size, "resume": resume},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,5000,20000", help="active rentals per level")
+    parser.add_argument("--resume-size", type=int, default=100, help="level at which to run the failure and re-run check, 0 to skip")
+    parser.add_argument("--flaky-rate", type=float, default=0.1, help="Sales Invoice write failure rate for the flaky scenario")
+    parser.add_argument("--standin-host", default="127.0.0.1")
+    parser.add_argument("--standin-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--api-key")
+    parser.add_argument("--api-secret")
+    parser.add_argument("--seed", type=int, default=42)
+    add_fault_arguments(parser)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
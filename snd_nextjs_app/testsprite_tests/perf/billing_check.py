@@ -0,0 +1,336 @@
+"""Column-wise reference model of rental billing, checked against the fleet's invoices.
+
+TC008 and TC017 look at one rental's bill at a time. This takes every
+invoice of a set of rentals, loads all their items in one query and prices
+every (invoice, item) pair at once with NumPy, under two rules:
+
+    service   what AutomatedMonthlyBillingService does: every item for the
+              whole period, days = period end - period start (the last day
+              is not counted), weekly = ceil(days / 7) x rate, monthly =
+              ceil(days / 30) x rate, daily = days x rate
+    contract  pro-rated by each item's own dates: billable days are the
+              days of the period (both ends included) between the item's
+              start date (else the rental's) and its completed date; daily =
+              days x rate, weekly = days / 7 x rate, monthly = days / days in
+              the month x rate
+
+Completed items without a completed date get the one
+scripts/backfill-rental-items-completed-date.sql would give them: the
+rental's actual end date, else the equipment's completed rental history
+entry, else the item's updated_at. Totals add 15% VAT. Hourly items bill
+from equipment timesheets and are not modelled; their invoices are counted
+apart.
+
+Invoices come from one of two sources:
+
+    billing   POST /api/billing/automated-monthly for the first --rentals
+              seeded rentals as a never-invoiced fleet, through the
+              in-process ERPNext stand-in (as perf.billing_bench, whose
+              fleet handling this reuses); periods are the ones billed
+    invoices  GET /api/rentals/[id]/invoices for --rentals rentals
+              (--status), read-only; a row's period is its billing month
+              clipped to the rental's dates
+
+Totals are compared in halalas. Per rule the report counts mismatches with
+the largest and total difference, and how many mismatched invoices have an
+item not covering the whole period or a weekly/monthly item on a partial
+period, the two places where the rules part ways.
+
+Usage:
+    python -m perf.billing_check --source billing --rentals 1000
+    python -m perf.billing_check --source invoices --rentals 5000 --status active,completed
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+import numpy as np
+
+from perf import billing_bench
+from perf.common import load_config, open_session, summarize, write_report
+from perf.erpnext_standin import DEFAULT_PORT, ERPNextStandIn, add_fault_arguments, faults_from_args
+from perf.payroll_check import to_halalas
+from perf.seed import connect, seed_scale
+
+VAT_RATE = 0.15
+DAILY, WEEKLY, MONTHLY, HOURLY = range(4)
+RATE_CODES = {"daily": DAILY, "weekly": WEEKLY, "monthly": MONTHLY, "hourly": HOURLY}
+# Stands in for "still running" on items without an end
+OPEN_END = np.datetime64("9999-12-31", "D")
+
+
+def day_array(values):
+    return np.array([OPEN_END if value is None else np.datetime64(value, "D") for value in values], dtype="datetime64[D]")
+
+
+def local_day(stamp):
+    """Calendar day of a serialized JS Date, in this machine's (and the server's) time zone."""
+    moment = datetime.datetime.fromisoformat(str(stamp).replace("Z", "+00:00"))
+    return (moment.astimezone() if moment.tzinfo else moment).date()
+
+
+async def load_items(conn, rental_ids):
+    """Item columns for the rentals, sorted by rental."""
+    rows = await conn.fetch(
+        """
+        SELECT ri.rental_id, ri.rate_type, ri.unit_price,
+               COALESCE(ri.start_date, r.start_date) AS start_date,
+               CASE
+                   WHEN ri.completed_date IS NOT NULL THEN ri.completed_date
+                   WHEN ri.status = 'completed' THEN COALESCE(
+                       r.actual_end_date,
+                       (SELECT erh.end_date::date FROM equipment_rental_history erh
+                        WHERE erh.rental_id = ri.rental_id AND erh.equipment_id = ri.equipment_id
+                          AND erh.status = 'completed'
+                        LIMIT 1),
+                       ri.updated_at)
+               END AS end_date
+        FROM rental_items ri JOIN rentals r ON r.id = ri.rental_id
+        WHERE ri.rental_id = ANY($1::int[])
+        ORDER BY ri.rental_id, ri.id
+        """,
+        list(rental_ids),
+    )
+    return {
+        "rental_id": np.array([row["rental_id"] for row in rows], dtype=np.int64),
+        "rate": np.array([RATE_CODES.get(row["rate_type"], DAILY) for row in rows], dtype=np.int64),
+        "unit_price": np.array([float(row["unit_price"]) for row in rows]),
+        "start": day_array([row["start_date"] for row in rows]),
+        "end": day_array([row["end_date"] for row in rows]),
+    }
+
+
+def pair_up(invoice_rental, item_rental):
+    """(invoice index, item index) for every item of each invoice's rental; items sorted by rental."""
+    first = np.searchsorted(item_rental, invoice_rental, "left")
+    counts = np.searchsorted(item_rental, invoice_rental, "right") - first
+    invoice = np.repeat(np.arange(len(invoice_rental)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return invoice, np.repeat(first, counts) + offset
+
+
+def reference(invoices, items):
+    """Subtotal and total per invoice under both rules, plus the flags that explain differences."""
+    n = len(invoices["rental_id"])
+    inv, item = pair_up(invoices["rental_id"], items["rental_id"])
+    start, end = invoices["start"][inv], invoices["end"][inv]
+    rate, price = items["rate"][item], items["unit_price"][item]
+
+    span = (end - start).astype(np.int64)
+    service_units = np.select([rate == WEEKLY, rate == MONTHLY], [np.ceil(span / 7), np.ceil(span / 30)], span)
+    service = price * service_units
+
+    period_days = span + 1
+    first = np.maximum(start, items["start"][item])
+    last = np.minimum(end, items["end"][item])
+    days = np.clip((last - first).astype(np.int64) + 1, 0, None)
+    month = start.astype("datetime64[M]")
+    days_in_month = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype(np.int64)
+    contract = np.select([rate == WEEKLY, rate == MONTHLY], [price * days / 7, price * days / days_in_month], price * days)
+
+    partial_item = days < period_days
+    rounded = ((rate == WEEKLY) & (days % 7 != 0)) | ((rate == MONTHLY) & (days < days_in_month))
+    hourly = rate == HOURLY
+    service_sub = np.bincount(inv, weights=service, minlength=n)
+    contract_sub = np.bincount(inv, weights=contract, minlength=n)
+    return {
+        "service": service_sub * (1 + VAT_RATE),
+        "contract": contract_sub * (1 + VAT_RATE),
+        "service_subtotal": service_sub,
+        "contract_subtotal": contract_sub,
+        "items": np.bincount(inv, minlength=n),
+        "partial_item": np.bincount(inv, weights=partial_item, minlength=n) > 0,
+        "rounded_rate": np.bincount(inv, weights=rounded, minlength=n) > 0,
+        "hourly": np.bincount(inv, weights=hourly, minlength=n) > 0,
+    }
+
+
+def compare(invoices, expected, tolerance, examples):
+    actual = to_halalas(invoices["amount"])
+    modelled = ~expected["hourly"] & (expected["items"] > 0)
+    result = {
+        "invoices": len(actual),
+        "not_modelled": {"hourly": int(expected["hourly"].sum()), "no_items": int((expected["items"] == 0).sum())},
+    }
+    for rule in ("service", "contract"):
+        diff = actual - to_halalas(expected[rule])
+        off = (np.abs(diff) > tolerance) & modelled
+        # Some sources store the amount before VAT
+        net = (np.abs(actual - to_halalas(expected[f"{rule}_subtotal"])) <= tolerance) & off
+        result[rule] = {
+            "matched": int((~off & modelled).sum()),
+            "mismatched": int(off.sum()),
+            "matches_before_vat": int(net.sum()),
+            "max_abs_halalas": int(np.abs(diff[off]).max()) if off.any() else 0,
+            "total_halalas": int(diff[off].sum()),
+            "with_partial_item": int((off & expected["partial_item"]).sum()),
+            "with_rounded_rate": int((off & expected["rounded_rate"]).sum()),
+            "examples": [
+                {
+                    "rental_id": int(invoices["rental_id"][i]),
+                    "period": [str(invoices["start"][i]), str(invoices["end"][i])],
+                    "actual": int(actual[i]) / 100,
+                    "expected": round(float(expected[rule][i]), 2),
+                    "partial_item": bool(expected["partial_item"][i]),
+                    "rounded_rate": bool(expected["rounded_rate"][i]),
+                }
+                for i in np.flatnonzero(off)[:examples]
+            ],
+        }
+    return result
+
+
+def invoice_columns(rental_ids, starts, ends, amounts):
+    """Invoice columns sorted by rental, as reference() and compare() take them."""
+    rental_ids = np.array(rental_ids, dtype=np.int64)
+    order = np.argsort(rental_ids, kind="stable")
+    return {
+        "rental_id": rental_ids[order],
+        "start": np.array(starts, dtype="datetime64[D]")[order],
+        "end": np.array(ends, dtype="datetime64[D]")[order],
+        "amount": np.array(amounts, dtype=float)[order],
+    }
+
+
+async def from_billing(args, config, conn):
+    """Bill the seeded fleet once through the service and return its invoices as columns."""
+    session, _ = await open_session(config, limit=2)
+    standin = ERPNextStandIn(args.standin_host, args.standin_port, faults_from_args(args), args.api_key, args.api_secret)
+    original = {}
+    try:
+        async with standin:
+            await seed_scale(
+                conn, employees=max(100, args.rentals // 10), equipment=max(100, args.rentals // 10),
+                rentals=args.rentals, seed=args.seed,
+            )
+            await billing_bench.remember(conn, original)
+            fleet, other_active = await billing_bench.set_fleet(conn, args.rentals)
+            await billing_bench.reset_standin(conn, standin)
+            run, invoices = await billing_bench.run_billing(session, config["base_url"], conn, standin, False, None)
+    finally:
+        await session.close()
+        await billing_bench.restore(conn, original)
+    invoices = [invoice for invoice in invoices if invoice.get("rentalId") in fleet]
+    print(f"Billed {run['invoices']} invoices in {run['seconds']:.1f}s"
+          + (f" ({other_active} non-seeded active rentals billed too, left out)" if other_active else ""))
+    return invoice_columns(
+        [invoice["rentalId"] for invoice in invoices],
+        [local_day(invoice["billingPeriod"]["startDate"]) for invoice in invoices],
+        [local_day(invoice["billingPeriod"]["endDate"]) for invoice in invoices],
+        [invoice.get("totalAmount") or 0 for invoice in invoices],
+    ), {key: run[key] for key in ("status", "seconds", "invoices", "processed")}
+
+
+async def from_rental_invoices(args, config, conn):
+    """Every rental_invoices row of the chosen rentals through GET /api/rentals/[id]/invoices."""
+    rentals = await conn.fetch(
+        """
+        SELECT id, start_date, COALESCE(actual_end_date, expected_end_date) AS end_date FROM rentals
+        WHERE status = ANY($1::text[]) ORDER BY id LIMIT $2
+        """,
+        args.status.split(","), args.rentals,
+    )
+    session, _ = await open_session(config, limit=args.concurrency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(rental):
+        async with semaphore:
+            started = time.perf_counter()
+            async with session.get(f"{config['base_url']}/api/rentals/{rental['id']}/invoices") as resp:
+                body = await resp.read()
+            latencies.append((time.perf_counter() - started) * 1000)
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            return []
+        return [(rental, row) for row in rows if isinstance(row, dict)] if isinstance(rows, list) else []
+
+    try:
+        fetched = await asyncio.gather(*(one(rental) for rental in rentals))
+    finally:
+        await session.close()
+    ids, starts, ends, amounts = [], [], [], []
+    for rental, row in (pair for pairs in fetched for pair in pairs):
+        month = row.get("billingMonth") or str(row.get("invoiceDate") or "")[:7]
+        if len(month) != 7:
+            continue
+        first = datetime.date(int(month[:4]), int(month[5:]), 1)
+        last = (first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+        ids.append(rental["id"])
+        starts.append(max(first, rental["start_date"]))
+        ends.append(min(last, rental["end_date"]) if rental["end_date"] else last)
+        amounts.append(float(row.get("amount") or 0))
+    return invoice_columns(ids, starts, ends, amounts), {"rentals": len(rentals), "latency_ms": summarize(latencies)}
+
+
+async def run_check(args):
+    config = load_config()
+    conn = await connect()
+    try:
+        started = time.perf_counter()
+        if args.source == "billing":
+            invoices, source = await from_billing(args, config, conn)
+        else:
+            invoices, source = await from_rental_invoices(args, config, conn)
+        fetched = time.perf_counter()
+        if not len(invoices["rental_id"]):
+            print("No invoices to check")
+            return 0
+        items = await load_items(conn, np.unique(invoices["rental_id"]).tolist())
+        loaded = time.perf_counter()
+        expected = reference(invoices, items)
+        result = compare(invoices, expected, args.tolerance, args.examples)
+        checked = time.perf_counter()
+    finally:
+        await conn.close()
+
+    result.update(
+        source=args.source,
+        source_run=source,
+        tolerance_halalas=args.tolerance,
+        rentals=int(len(np.unique(invoices["rental_id"]))),
+        items=int(len(items["rental_id"])),
+        fetch_seconds=fetched - started,
+        load_seconds=loaded - fetched,
+        check_seconds=checked - loaded,
+    )
+    print(
+        f"{result['invoices']} invoices of {result['rentals']} rentals ({result['items']} items) "
+        f"checked in {result['check_seconds'] * 1000:.1f} ms; not modelled: {result['not_modelled']}"
+    )
+    for rule in ("service", "contract"):
+        stats = result[rule]
+        print(
+            f"  {rule:<9} matched {stats['matched']:>7}  mismatched {stats['mismatched']:>7}  "
+            f"max {stats['max_abs_halalas'] / 100:>10.2f} SAR  total {stats['total_halalas'] / 100:>13.2f} SAR  "
+            f"partial items {stats['with_partial_item']:>6}  rounded rates {stats['with_rounded_rate']:>6}"
+        )
+    path = write_report("billing-check", result)
+    print(f"Report written to {path}")
+    return 1 if args.fail_on != "none" and result[args.fail_on]["mismatched"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=["billing", "invoices"], default="billing")
+    parser.add_argument("--rentals", type=int, default=1000)
+    parser.add_argument("--status", default="active,completed", help="rental statuses for --source invoices")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel requests for --source invoices")
+    parser.add_argument("--tolerance", type=int, default=1, help="allowed difference in halalas")
+    parser.add_argument("--examples", type=int, default=5)
+    parser.add_argument("--fail-on", choices=["none", "service", "contract"], default="none",
+                        help="exit 1 when invoices differ from this rule")
+    parser.add_argument("--standin-host", default="127.0.0.1")
+    parser.add_argument("--standin-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--api-key")
+    parser.add_argument("--api-secret")
+    parser.add_argument("--seed", type=int, default=42)
+    add_fault_arguments(parser)
+    raise SystemExit(asyncio.run(run_check(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
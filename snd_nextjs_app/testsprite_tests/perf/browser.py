@@ -0,0 +1,117 @@
+"""Playwright helpers shared by the browser-side perf harnesses.
+
+The launch arguments and the login form locators are the ones every TC
+script uses, so the harnesses see the app exactly the way the suite does.
+"""
+import asyncio
+import time
+
+from playwright import async_api
+
+from perf.common import load_config
+
+# Same Chromium flags as the generated TC scripts
+LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+    "--single-process",
+]
+
+LOGIN_EMAIL = "xpath=html/body/div[2]/div/div/div/div/div/div[2]/form/div/div/div/input"
+LOGIN_PASSWORD = "xpath=html/body/div[2]/div/div/div/div/div/div[2]/form/div/div/div[2]/input"
+LOGIN_BUTTON = "xpath=html/body/div[2]/div/div/div/div/div/div[2]/form/div/div/button"
+
+# Sidebar links as the TC scripts address them, e.g. SIDEBAR_LINK.format(5) for Employee Management
+SIDEBAR_LINK = "xpath=html/body/div[2]/div/div/div/div[2]/div/div[2]/div/div/ul/li[{}]/a"
+
+# Pages the TC scripts land on, by module
+TC_PAGES = {
+    "dashboard": "/en",
+    "employees": "/en/employee-management",
+    "equipment": "/en/equipment-management",
+    "rentals": "/en/rental-management",
+    "timesheets": "/en/timesheet-management",
+    "customers": "/en/customer-management",
+    "quotations": "/en/quotation-management",
+    "payroll": "/en/payroll-management",
+    "leave": "/en/leave-management",
+    "projects": "/en/project-management",
+}
+
+# The /api/sse stream keeps a request open, so networkidle never comes; a page
+# counts as settled once nothing else has been in flight for SETTLE_QUIET_MS,
+# and is given at most SETTLE_MS
+SETTLE_QUIET_MS = 500
+SETTLE_MS = 5000
+
+
+async def settle(page, timeout_ms=SETTLE_MS, quiet_ms=SETTLE_QUIET_MS):
+    """Wait until no request but event streams has been in flight for quiet_ms, at most timeout_ms."""
+    in_flight = set()
+
+    def started(request):
+        if request.resource_type != "eventsource":
+            in_flight.add(request)
+
+    def done(request):
+        in_flight.discard(request)
+
+    page.on("request", started)
+    page.on("requestfinished", done)
+    page.on("requestfailed", done)
+    try:
+        deadline = time.monotonic() + timeout_ms / 1000
+        busy_at = time.monotonic()
+        while time.monotonic() < deadline:
+            if in_flight:
+                busy_at = time.monotonic()
+            elif time.monotonic() - busy_at >= quiet_ms / 1000:
+                return
+            await asyncio.sleep(0.05)
+    finally:
+        page.remove_listener("request", started)
+        page.remove_listener("requestfinished", done)
+        page.remove_listener("requestfailed", done)
+
+
+class BrowserSession:
+    """A logged-in Chromium context; use as `async with BrowserSession() as s:`."""
+
+    def __init__(self, config=None, headless=True, context_options=None):
+        self.config = config or load_config()
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.pw = None
+        self.browser = None
+        self.context = None
+        self.page = None
+
+    async def __aenter__(self):
+        self.pw = await async_api.async_playwright().start()
+        self.browser = await self.pw.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self.context = await self.browser.new_context(**self.context_options)
+        self.context.set_default_timeout(15000)
+        self.page = await self.context.new_page()
+        await self.login()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.context:
+            await self.context.close()
+        if self.browser:
+            await self.browser.close()
+        if self.pw:
+            await self.pw.stop()
+
+    async def login(self):
+        base_url = self.config["base_url"]
+        # Same entry point as the TC scripts: the root redirects to the login form
+        await self.page.goto(base_url, wait_until="domcontentloaded")
+        await self.page.locator(LOGIN_EMAIL).nth(0).fill(self.config["email"])
+        await self.page.locator(LOGIN_PASSWORD).nth(0).fill(self.config["password"])
+        await self.page.locator(LOGIN_BUTTON).nth(0).click()
+        await self.page.wait_for_url(lambda url: "/login" not in url, timeout=30000)
+
+    def url(self, path):
+        return f"{self.config['base_url']}{path}"
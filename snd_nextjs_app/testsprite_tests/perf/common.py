@@ -0,0 +1,283 @@
+"""Shared helpers for the perf harnesses.
+
+Every harness talks to the same local app the TC scripts drive, configured by
+tmp/config.json (localEndpoint, loginUser, loginPassword). The values can be
+overridden with SND_BASE_URL, SND_LOGIN_USER and SND_LOGIN_PASSWORD.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import aiohttp
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+CONFIG_PATH = TESTS_DIR / "tmp" / "config.json"
+RESULTS_DIR = TESTS_DIR / "tmp" / "perf"
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# List endpoints behind the pages the TC scripts visit
+TC_ENDPOINTS = {
+    "TC004": "/api/employees?page=1&limit=10",
+    "TC006": "/api/projects?page=1&limit=10",
+    "TC007": "/api/equipment?page=1&limit=10",
+    "TC008": "/api/rentals",
+    "TC009": "/api/customers?page=1&limit=10",
+    "TC010": "/api/timesheets?page=1&limit=10",
+    "TC011": "/api/payroll?page=1&limit=10",
+    "TC012": "/api/leave-requests",
+    "TC013": "/api/quotations?page=1",
+    "TC015": "/api/notifications?page=1&per_page=10",
+    "TC019": "/api/dashboard/stats",
+}
+
+
+def load_config():
+    """Return base_url, email and password for the local app under test."""
+    config = {}
+    if CONFIG_PATH.exists():
+        config = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    base_url = os.environ.get("SND_BASE_URL", config.get("localEndpoint", "http://localhost:3000"))
+    return {
+        "base_url": base_url.rstrip("/"),
+        "email": os.environ.get("SND_LOGIN_USER", config.get("loginUser", "test@test.com")),
+        "password": os.environ.get("SND_LOGIN_PASSWORD", config.get("loginPassword", "test123")),
+    }
+
+
+async def login(session, base_url, email, password):
+    """Sign in through the Auth.js credentials provider and return the session user."""
+    async with session.get(f"{base_url}/api/auth/csrf") as resp:
+        resp.raise_for_status()
+        csrf_token = (await resp.json())["csrfToken"]
+
+    form = {
+        "csrfToken": csrf_token,
+        "email": email,
+        "password": password,
+        "callbackUrl": base_url,
+        "json": "true",
+    }
+    async with session.post(
+        f"{base_url}/api/auth/callback/credentials", data=form, allow_redirects=False
+    ) as resp:
+        if resp.status >= 400:
+            raise RuntimeError(f"Login request for {email} failed with HTTP {resp.status}")
+
+    async with session.get(f"{base_url}/api/auth/session") as resp:
+        data = await resp.json(content_type=None)
+    if not data or not data.get("user"):
+        raise RuntimeError(f"Login failed for {email}: no session returned")
+    return data["user"]
+
+
+async def open_session(config=None, email=None, password=None, limit=100, timeout=None):
+    """Return (aiohttp session, session user) logged in as the given account.
+
+    The caller owns the session and must close it.
+    """
+    config = config or load_config()
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit),
+        cookie_jar=aiohttp.CookieJar(unsafe=True),
+        timeout=timeout or aiohttp.ClientTimeout(total=None, sock_connect=30),
+    )
+    try:
+        user = await login(
+            session,
+            config["base_url"],
+            email or config["email"],
+            password or config["password"],
+        )
+    except BaseException:
+        await session.close()
+        raise
+    return session, user
+
+
+def find_listening_pid(port):
+    """Find the pid of the process listening on a local TCP port via /proc."""
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            lines = Path(table).read_text().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            # State 0A is LISTEN
+            if fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                inodes.add(f"socket:[{fields[9]}]")
+    if not inodes:
+        return None
+
+    for proc in Path("/proc").iterdir():
+        if not proc.name.isdigit():
+            continue
+        try:
+            for fd in (proc / "fd").iterdir():
+                if os.readlink(fd) in inodes:
+                    return int(proc.name)
+        except OSError:
+            continue
+    return None
+
+
+def server_pid(config=None):
+    """Pid of the local Next.js server (SND_SERVER_PID, else whoever listens on the app port)."""
+    if os.environ.get("SND_SERVER_PID"):
+        return int(os.environ["SND_SERVER_PID"])
+    config = config or load_config()
+    url = urlparse(config["base_url"])
+    return find_listening_pid(url.port or (443 if url.scheme == "https" else 80))
+
+
+def sample_process(pid):
+    """Snapshot RSS, peak RSS, CPU time, open fds and sockets of a process from /proc.
+
+    Returns None when the process is not visible (remote server, other container).
+    """
+    if pid is None:
+        return None
+    proc = Path(f"/proc/{pid}")
+    try:
+        status = {}
+        for line in (proc / "status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+        stat = (proc / "stat").read_text().rsplit(")", 1)[1].split()
+        fds = list((proc / "fd").iterdir())
+    except OSError:
+        return None
+
+    sockets = 0
+    for fd in fds:
+        try:
+            if os.readlink(fd).startswith("socket:"):
+                sockets += 1
+        except OSError:
+            continue
+
+    return {
+        "t": time.time(),
+        "rss_mb": int(status.get("VmRSS", "0 kB").split()[0]) / 1024,
+        "hwm_mb": int(status.get("VmHWM", "0 kB").split()[0]) / 1024,
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        "cpu_s": (int(stat[11]) + int(stat[12])) / CLOCK_TICKS,
+        "fds": len(fds),
+        "sockets": sockets,
+    }
+
+
+class ProcessSampler:
+    """Sample a process in the background while a load runs.
+
+    `async with ProcessSampler(pid) as sampler:` then `sampler.summary()`; all
+    values are None when the process is not visible.
+    """
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def __aenter__(self):
+        self.baseline = sample_process(self.pid)
+        if self.baseline:
+            self.task = asyncio.create_task(self.run())
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.final = sample_process(self.pid)
+
+    async def run(self):
+        while True:
+            sample = sample_process(self.pid)
+            if sample:
+                self.samples.append(sample)
+            await asyncio.sleep(self.interval)
+
+    def summary(self):
+        if not self.baseline or not self.final:
+            return {"baseline_rss_mb": None, "peak_rss_mb": None, "rss_growth_mb": None, "cpu_s": None}
+        peak = max([s["rss_mb"] for s in self.samples] + [self.final["rss_mb"]])
+        return {
+            "baseline_rss_mb": self.baseline["rss_mb"],
+            "peak_rss_mb": peak,
+            "rss_growth_mb": peak - self.baseline["rss_mb"],
+            "cpu_s": self.final["cpu_s"] - self.baseline["cpu_s"],
+        }
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of an unsorted sequence."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies_ms):
+    """Count, mean and tail percentiles of a list of latencies in milliseconds."""
+    if not latencies_ms:
+        return {"count": 0}
+    return {
+        "count": len(latencies_ms),
+        "mean": sum(latencies_ms) / len(latencies_ms),
+        "p50": percentile(latencies_ms, 50),
+        "p95": percentile(latencies_ms, 95),
+        "p99": percentile(latencies_ms, 99),
+        "max": max(latencies_ms),
+    }
+
+
+def linear_fit(xs, ys):
+    """Least-squares fit y = slope * x + intercept; returns (slope, intercept, r2)."""
+    n = len(xs)
+    if n < 2:
+        return 0.0, (ys[0] if ys else 0.0), 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    if sxx == 0:
+        return 0.0, mean_y, 0.0
+    slope = sxy / sxx
+    r2 = (sxy * sxy) / (sxx * syy) if syy else 1.0
+    return slope, mean_y - slope * mean_x, r2
+
+
+def parse_levels(text):
+    """Parse a comma separated list of integers such as '100,1000,10000'."""
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def find_tc_scripts(names):
+    """Resolve TC ids such as TC004 to their script paths, in the given order."""
+    scripts = []
+    for name in names:
+        matches = sorted(TESTS_DIR.glob(f"{name.strip()}_*.py"))
+        if not matches:
+            raise SystemExit(f"No TC script matches {name}")
+        scripts.extend(matches)
+    return scripts
+
+
+def write_report(name, data):
+    """Write a JSON report to tmp/perf/<name>-<timestamp>.json and return its path."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+    return path
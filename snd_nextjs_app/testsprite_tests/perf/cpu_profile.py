@@ -0,0 +1,295 @@
+"""Opt-in CPU profiling of page interactions through the Chrome DevTools Protocol.
+
+For each chosen step a CDP session (context.new_cdp_session) records a V8
+sampling profile and, unless --no-trace is given, a Chromium trace. The
+result answers where the step's wall time went:
+
+- trace: main-thread self time split into scripting, style/layout, paint,
+  parsing and GC, with the remainder of the wall time counted as idle
+  (waiting on the network or timers)
+- profile: self time per Next.js chunk and per React component (nearest
+  capitalised frame from the app's own chunks), plus the folded stacks in
+  collapsed format for flamegraph.pl / speedscope
+
+Files land in tmp/perf/profiles/: <step>.cpuprofile (opens in DevTools),
+<step>.collapsed and <step>.trace.json.
+
+Usage:
+    python -m perf.cpu_profile --steps employees,rentals
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+import time
+from urllib.parse import urlparse
+
+from playwright import async_api
+
+from perf.browser import TC_PAGES, BrowserSession, settle
+from perf.common import RESULTS_DIR, write_report
+
+PROFILES_DIR = RESULTS_DIR / "profiles"
+
+TRACE_CATEGORIES = ",".join(
+    [
+        "devtools.timeline",
+        "disabled-by-default-devtools.timeline",
+        "v8.execute",
+        "blink.user_timing",
+        "loading",
+    ]
+)
+
+# Trace event name -> bucket for main-thread self time
+TRACE_BUCKETS = {
+    "scripting": (
+        "EvaluateScript", "FunctionCall", "TimerFire", "EventDispatch", "v8.compile",
+        "v8.compileModule", "v8.run", "RunMicrotasks", "FireAnimationFrame", "V8.Execute",
+    ),
+    "layout": ("Layout", "UpdateLayoutTree", "RecalculateStyles", "InvalidateLayout", "ScheduleStyleRecalculation"),
+    "paint": ("Paint", "PrePaint", "CompositeLayers", "UpdateLayer", "Layerize", "RasterTask"),
+    "parsing": ("ParseHTML", "ParseAuthorStyleSheet"),
+    "gc": ("MinorGC", "MajorGC", "V8.GCScavenger", "V8.GCFinalizeMC", "BlinkGC.AtomicPhase"),
+}
+
+CHUNK_RE = re.compile(r"/_next/static/(?:chunks/)?(.+?\.js)")
+
+
+async def open_page(session, path):
+    await session.page.goto(session.url(path), wait_until="load")
+    await settle(session.page)
+
+
+async def step_employees(session):
+    # TC004: employee list, then a search that re-renders the table
+    page = session.page
+    await open_page(session, TC_PAGES["employees"])
+    search = page.locator("xpath=html/body/div[2]/div/div/main/main/div/div/div[3]/div[2]/div/div/div/input").nth(0)
+    await search.fill("John")
+    await settle(page)
+
+
+async def step_rentals(session):
+    # TC008: rental table
+    await open_page(session, TC_PAGES["rentals"])
+
+
+async def step_equipment(session):
+    # TC007: equipment inventory list
+    await open_page(session, TC_PAGES["equipment"])
+
+
+async def step_timesheets(session):
+    # TC010: timesheet list
+    await open_page(session, TC_PAGES["timesheets"])
+
+
+STEPS = {
+    "employees": step_employees,
+    "rentals": step_rentals,
+    "equipment": step_equipment,
+    "timesheets": step_timesheets,
+}
+
+
+async def read_stream(cdp, handle):
+    chunks = []
+    while True:
+        result = await cdp.send("IO.read", {"handle": handle})
+        data = result.get("data", "")
+        chunks.append(base64.b64decode(data).decode("utf-8") if result.get("base64Encoded") else data)
+        if result.get("eof"):
+            break
+    await cdp.send("IO.close", {"handle": handle})
+    return "".join(chunks)
+
+
+async def profile_step(session, name, interval_us, trace):
+    cdp = await session.context.new_cdp_session(session.page)
+    await cdp.send("Profiler.enable")
+    await cdp.send("Profiler.setSamplingInterval", {"interval": interval_us})
+
+    trace_done = asyncio.get_running_loop().create_future()
+    if trace:
+        cdp.on("Tracing.tracingComplete", lambda params: trace_done.set_result(params.get("stream")))
+        await cdp.send("Tracing.start", {"categories": TRACE_CATEGORIES, "transferMode": "ReturnAsStream"})
+
+    await cdp.send("Profiler.start")
+    # Timed here: page.goto resets performance.now() in the new document
+    started = time.perf_counter()
+    await STEPS[name](session)
+    wall_ms = (time.perf_counter() - started) * 1000
+    profile = (await cdp.send("Profiler.stop"))["profile"]
+
+    events = []
+    if trace:
+        await cdp.send("Tracing.end")
+        handle = await asyncio.wait_for(trace_done, timeout=60)
+        events = json.loads(await read_stream(cdp, handle))
+        if isinstance(events, dict):
+            events = events.get("traceEvents", [])
+    await cdp.detach()
+    return profile, events, wall_ms
+
+
+def frame_label(frame):
+    name = frame.get("functionName") or "(anonymous)"
+    url = frame.get("url", "")
+    if not url:
+        return name
+    match = CHUNK_RE.search(url)
+    location = match.group(1) if match else urlparse(url).path.rsplit("/", 1)[-1]
+    return f"{name} ({location}:{frame.get('lineNumber', 0) + 1})"
+
+
+def fold_profile(profile):
+    """Collapse a V8 cpuprofile into {"a;b;c": self_us} plus per-node self time."""
+    nodes = {node["id"]: node for node in profile["nodes"]}
+    parents = {}
+    for node in profile["nodes"]:
+        for child in node.get("children", []):
+            parents[child] = node["id"]
+
+    self_us = {}
+    for node_id, delta in zip(profile.get("samples", []), profile.get("timeDeltas", [])):
+        self_us[node_id] = self_us.get(node_id, 0) + max(delta, 0)
+
+    folded = {}
+    for node_id, weight in self_us.items():
+        stack = []
+        current = node_id
+        while current is not None:
+            label = frame_label(nodes[current]["callFrame"])
+            if label != "(root)":
+                stack.append(label.replace(";", ","))
+            current = parents.get(current)
+        key = ";".join(reversed(stack)) or "(root)"
+        folded[key] = folded.get(key, 0) + weight
+    return folded, self_us, nodes, parents
+
+
+def is_component(frame):
+    # Function components keep their capitalised names in dev builds and in
+    # production builds with source maps; library code from react-dom is excluded
+    name = frame.get("functionName", "")
+    url = frame.get("url", "")
+    return bool(name) and name[0].isupper() and "/_next/" in url and "react-dom" not in url
+
+
+def attribute(self_us, nodes, parents):
+    """Self time per chunk and per enclosing React component, in ms."""
+    by_chunk = {}
+    by_component = {}
+    for node_id, weight in self_us.items():
+        frame = nodes[node_id]["callFrame"]
+        url = frame.get("url", "")
+        match = CHUNK_RE.search(url)
+        chunk = match.group(1) if match else (frame.get("functionName") if not url else urlparse(url).path)
+        by_chunk[chunk] = by_chunk.get(chunk, 0) + weight / 1000
+
+        current = node_id
+        component = None
+        while current is not None:
+            if is_component(nodes[current]["callFrame"]):
+                component = nodes[current]["callFrame"]["functionName"]
+                break
+            current = parents.get(current)
+        if component:
+            by_component[component] = by_component.get(component, 0) + weight / 1000
+
+    def top(table, limit=25):
+        return dict(sorted(table.items(), key=lambda item: -item[1])[:limit])
+
+    return top(by_chunk), top(by_component)
+
+
+def trace_breakdown(events, wall_ms):
+    """Main-thread self time per bucket from complete ('X') trace events, in ms."""
+    main_threads = {
+        (e["pid"], e["tid"])
+        for e in events
+        if e.get("ph") == "M" and e.get("name") == "thread_name"
+        and e.get("args", {}).get("name") == "CrRendererMain"
+    }
+    bucket_of = {name: bucket for bucket, names in TRACE_BUCKETS.items() for name in names}
+    totals = {bucket: 0.0 for bucket in TRACE_BUCKETS}
+    totals["other"] = 0.0
+
+    by_thread = {}
+    for event in events:
+        if event.get("ph") == "X" and (event.get("pid"), event.get("tid")) in main_threads:
+            by_thread.setdefault((event["pid"], event["tid"]), []).append(event)
+
+    busy_us = 0.0
+    for thread_events in by_thread.values():
+        thread_events.sort(key=lambda e: (e["ts"], -e.get("dur", 0)))
+        stack = []
+        # Walk the nesting to turn inclusive durations into self time
+        for event in thread_events + [None]:
+            while stack and (event is None or event["ts"] >= stack[-1]["end"]):
+                done = stack.pop()
+                self_time = done["dur"] - done["children"]
+                totals[bucket_of.get(done["name"], "other")] += self_time / 1000
+                if stack:
+                    stack[-1]["children"] += done["dur"]
+                else:
+                    busy_us += done["dur"]
+            if event is not None:
+                stack.append({
+                    "name": event["name"],
+                    "dur": event.get("dur", 0),
+                    "end": event["ts"] + event.get("dur", 0),
+                    "children": 0,
+                })
+
+    totals["idle"] = max(wall_ms - busy_us / 1000, 0.0)
+    return {bucket: round(ms, 2) for bucket, ms in totals.items()}
+
+
+async def run_profiles(args):
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    summary = {}
+    async with BrowserSession(headless=not args.headed) as session:
+        for name in args.steps.split(","):
+            try:
+                profile, events, wall_ms = await profile_step(session, name, args.interval, not args.no_trace)
+            except async_api.Error as error:
+                summary[name] = {"error": str(error)}
+                continue
+
+            folded, self_us, nodes, parents = fold_profile(profile)
+            by_chunk, by_component = attribute(self_us, nodes, parents)
+
+            (PROFILES_DIR / f"{name}.cpuprofile").write_text(json.dumps(profile))
+            (PROFILES_DIR / f"{name}.collapsed").write_text(
+                "\n".join(f"{stack} {int(weight)}" for stack, weight in sorted(folded.items()))
+            )
+            if events:
+                (PROFILES_DIR / f"{name}.trace.json").write_text(json.dumps({"traceEvents": events}))
+
+            summary[name] = {
+                "wall_ms": wall_ms,
+                "sampled_ms": sum(self_us.values()) / 1000,
+                "breakdown_ms": trace_breakdown(events, wall_ms) if events else None,
+                "self_ms_by_chunk": by_chunk,
+                "self_ms_by_component": by_component,
+            }
+            print(name, json.dumps(summary[name]["breakdown_ms"]))
+
+    path = write_report("cpu-profile", summary)
+    print(f"Report written to {path}; profiles in {PROFILES_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", default="employees,rentals", help=f"any of {','.join(STEPS)}")
+    parser.add_argument("--interval", type=int, default=100, help="sampling interval in microseconds")
+    parser.add_argument("--no-trace", action="store_true", help="skip Tracing, profile only")
+    parser.add_argument("--headed", action="store_true")
+    asyncio.run(run_profiles(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
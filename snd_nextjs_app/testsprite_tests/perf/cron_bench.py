@@ -0,0 +1,232 @@
+"""Scheduled job runtime against growing seeded datasets.
+
+At every size N the database is topped up (perf.seed) to N employees, each
+with an assignment (started up to 60 days back) and --timesheet-days of
+timesheets, a leave for every tenth employee, N/2 equipment and N/4 rentals.
+Then each cron route is called the way the scheduler calls it:
+
+    timesheets        GET  /api/cron/timesheets (timesheet-auto-generator)
+    employee-status   GET  /api/cron/employee-status
+    equipment-status  POST /api/cron/equipment-status-monitor
+
+recording wall time, the rows the job reports touching, the statements it
+issued and the rows they read or wrote (perf.pgstats), and the server's peak
+RSS growth. The timesheet job runs twice per size: the first run fills the
+assignment backlog of the newly seeded employees, the second is the steady
+nightly run that only checks.
+
+A power law fitted to wall time against N gives, per job, the N at which a
+run would exceed --window-minutes. The curves are drawn to an SVG next to the
+JSON report.
+
+The jobs change real rows (statuses, generated timesheets), so point the app
+at a scratch database (perf.dbsnapshot). Set CRON_SECRET as the app has it.
+
+Usage:
+    python -m perf.cron_bench --sizes 1000,5000,20000 --window-minutes 30
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+
+from perf import pgstats
+from perf.common import ProcessSampler, linear_fit, load_config, open_session, parse_levels, server_pid, write_report
+from perf.history import record_run
+from perf.scale_bench import classify
+from perf.seed import connect, seed_scale
+
+JOBS = {
+    "timesheets": ("GET", "/api/cron/timesheets"),
+    "employee-status": ("GET", "/api/cron/employee-status"),
+    "equipment-status": ("POST", "/api/cron/equipment-status-monitor"),
+}
+
+VOLUME_TABLES = ("employees", "employee_assignments", "employee_leaves", "timesheets", "equipment", "rental_items")
+
+COLORS = ["#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd"]
+
+
+def touched(job, data):
+    """Rows the job says it touched, from its own response."""
+    data = data or {}
+    if job == "timesheets":
+        return data.get("created", 0)
+    if job == "employee-status":
+        return (data.get("data") or {}).get("totalProcessed", 0)
+    results = data.get("results") or {}
+    return results.get("fixed", 0)
+
+
+async def run_job(session, base_url, job, headers, conn, counting, pid):
+    method, path = JOBS[job]
+    if counting:
+        await pgstats.reset(conn)
+    async with ProcessSampler(pid) as sampler:
+        started = time.perf_counter()
+        async with session.request(method, base_url + path, headers=headers) as resp:
+            body = await resp.read()
+            status = resp.status
+        seconds = time.perf_counter() - started
+    queries = await pgstats.snapshot(conn, top=3) if counting else None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    return {
+        "status": status,
+        "seconds": seconds,
+        "rows_touched": touched(job, data),
+        "statements": queries["calls"] if queries else None,
+        "statement_rows": queries["rows"] if queries else None,
+        "top_statements": queries["top"] if queries else None,
+        "server": sampler.summary(),
+    }
+
+
+async def volumes(conn):
+    return {table: await conn.fetchval(f"SELECT count(*) FROM {table}") for table in VOLUME_TABLES}
+
+
+def svg_chart(series, x_label, y_label, width=720, height=420):
+    """Log-log line chart of {name: [(x, y), ...]} as an SVG string."""
+    points = [(x, y) for values in series.values() for x, y in values if x > 0 and y > 0]
+    if not points:
+        return None
+    left, right, top, bottom = 70, 170, 20, 50
+    lx = [math.log10(x) for x, _ in points]
+    ly = [math.log10(y) for _, y in points]
+    x0, x1 = math.floor(min(lx)), math.ceil(max(lx))
+    y0, y1 = math.floor(min(ly)), math.ceil(max(ly))
+    x1, y1 = max(x1, x0 + 1), max(y1, y0 + 1)
+
+    def px(x):
+        return left + (math.log10(x) - x0) / (x1 - x0) * (width - left - right)
+
+    def py(y):
+        return height - bottom - (math.log10(y) - y0) / (y1 - y0) * (height - top - bottom)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    for exp in range(x0, x1 + 1):
+        x = left + (exp - x0) / (x1 - x0) * (width - left - right)
+        parts.append(f'<line x1="{x:.1f}" y1="{top}" x2="{x:.1f}" y2="{height - bottom}" stroke="#ddd"/>')
+        parts.append(f'<text x="{x:.1f}" y="{height - bottom + 16}" text-anchor="middle">{10 ** exp:g}</text>')
+    for exp in range(y0, y1 + 1):
+        y = height - bottom - (exp - y0) / (y1 - y0) * (height - top - bottom)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{width - right}" y2="{y:.1f}" stroke="#ddd"/>')
+        parts.append(f'<text x="{left - 6}" y="{y + 4:.1f}" text-anchor="end">{10 ** exp:g}</text>')
+    parts.append(f'<text x="{(width - right + left) / 2}" y="{height - 12}" text-anchor="middle">{x_label}</text>')
+    parts.append(
+        f'<text x="16" y="{(height - bottom + top) / 2}" text-anchor="middle" '
+        f'transform="rotate(-90 16 {(height - bottom + top) / 2})">{y_label}</text>'
+    )
+    for i, (name, values) in enumerate(series.items()):
+        color = COLORS[i % len(COLORS)]
+        usable = [(x, y) for x, y in values if x > 0 and y > 0]
+        if usable:
+            path = " ".join(f"{px(x):.1f},{py(y):.1f}" for x, y in usable)
+            parts.append(f'<polyline points="{path}" fill="none" stroke="{color}" stroke-width="2"/>')
+            parts.extend(f'<circle cx="{px(x):.1f}" cy="{py(y):.1f}" r="3" fill="{color}"/>' for x, y in usable)
+        parts.append(f'<rect x="{width - right + 12}" y="{top + 18 * i}" width="10" height="10" fill="{color}"/>')
+        parts.append(f'<text x="{width - right + 28}" y="{top + 18 * i + 9}">{name}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    secret = args.cron_secret or os.environ.get("CRON_SECRET") or "default-cron-secret"
+    headers = {"Authorization": f"Bearer {secret}"}
+    jobs = args.jobs.split(",")
+    conn = await connect()
+    counting = await pgstats.available(conn)
+    if not counting:
+        print("pg_stat_statements is not available; statement counts will be missing")
+    session, _ = await open_session(config, limit=2)
+    levels = []
+    samples = {}
+    try:
+        for size in parse_levels(args.sizes):
+            started = time.perf_counter()
+            added = await seed_scale(
+                conn, employees=size, equipment=max(1, size // 2), rentals=size // 4,
+                timesheet_days=args.timesheet_days, assignments=True, leaves=True, seed=args.seed,
+            )
+            level = {"size": size, "added": added, "seed_seconds": time.perf_counter() - started,
+                     "volumes": await volumes(conn), "jobs": {}}
+            runs = [(job, job) for job in jobs]
+            if "timesheets" in jobs:
+                runs.insert(jobs.index("timesheets") + 1, ("timesheets (steady)", "timesheets"))
+            for label, job in runs:
+                result = await run_job(session, base_url, job, headers, conn, counting, pid)
+                level["jobs"][label] = result
+                samples[f"{label} @{size}"] = [result["seconds"] * 1000]
+                print(
+                    f"N={size:<7} {label:<20} {result['status']}  {result['seconds']:>8.2f}s  "
+                    f"touched {result['rows_touched']:>7}  "
+                    f"statements {'-' if result['statements'] is None else result['statements']:>8}  "
+                    f"rss +{result['server']['rss_growth_mb'] or 0:.1f} MB"
+                )
+            levels.append(level)
+    finally:
+        await session.close()
+        await conn.close()
+
+    window = args.window_minutes * 60
+    curves = {}
+    series = {}
+    for label in levels[0]["jobs"] if levels else []:
+        points = [(level["size"], level["jobs"][label]["seconds"]) for level in levels
+                  if level["jobs"][label]["status"] == 200 and level["jobs"][label]["seconds"] > 0]
+        series[label] = points
+        if len(points) < 2:
+            continue
+        exponent, log_a, r2 = linear_fit([math.log(n) for n, _ in points], [math.log(s) for _, s in points])
+        limit = math.exp((math.log(window) - log_a) / exponent) if exponent > 0 else None
+        curves[label] = {
+            "exponent": exponent,
+            "coefficient_s": math.exp(log_a),
+            "r2": r2,
+            "class": classify(exponent),
+            "employees_at_window": limit,
+        }
+
+    history_run = record_run("cron-bench", samples, {"sizes": args.sizes, "window_minutes": args.window_minutes})
+    path = write_report(
+        "cron-bench",
+        {"history_run": history_run, "server_pid": pid, "pg_stat_statements": counting,
+         "window_minutes": args.window_minutes, "levels": levels, "curves": curves},
+    )
+    chart = svg_chart(series, "seeded employees", "wall time (s)")
+    if chart:
+        path.with_suffix(".svg").write_text(chart, encoding="utf-8")
+    for label, curve in curves.items():
+        limit = curve["employees_at_window"]
+        print(
+            f"{label:<20} time ~ N^{curve['exponent']:.2f} ({curve['class']}, r2={curve['r2']:.2f})  "
+            f"exceeds {args.window_minutes:g} min at ~{limit:,.0f} employees" if limit else
+            f"{label:<20} time ~ N^{curve['exponent']:.2f} ({curve['class']}), does not grow with N"
+        )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,20000", help="seeded employees per level")
+    parser.add_argument("--jobs", default=",".join(JOBS))
+    parser.add_argument("--timesheet-days", type=int, default=30, help="seeded timesheet history per employee")
+    parser.add_argument("--window-minutes", type=float, default=30.0, help="time a nightly run may take")
+    parser.add_argument("--cron-secret", help="defaults to $CRON_SECRET")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+"""Deterministic, column-wise synthetic data for the SND entities.
+
+Rows are built a chunk at a time as NumPy columns and streamed into
+PostgreSQL with COPY (CSV), so memory stays bounded by CHUNK_ROWS rows whatever
+the total. Each chunk has its own generator keyed on (seed, table, chunk
+number) and chunks are aligned on global row indexes, so the output depends
+only on the seed and the requested counts and topping a table up from 10k to
+50k rows gives the same rows as generating 50k at once.
+
+Foreign keys follow src/lib/drizzle/schema.ts:
+
+- employees, equipment, customers and rentals get explicit ids from a block
+  reserved at the end of each id sequence (ID_RESERVE), so children can
+  reference parents arithmetically without reading ids back
+- rentals.customer_id -> customers (ten rentals per customer)
+- rental_items.rental_id -> rentals, equipment_id -> equipment and
+  operator_id -> an employee flagged is_operator
+- timesheets.employee_id -> employees, one row per employee and day, which
+  keeps the (employee_id, date) unique key intact
+- advance_payments.employee_id -> employees, one approved or partly repaid
+  advance per employee when advances are requested
+- employee_assignments.employee_id -> employees, one per employee when
+  assignments are requested; employee_leaves.employee_id -> every
+  LEAVE_EVERY-th employee when leaves are requested
+
+All seeded rows carry the SEED- tag used by perf.seed; timesheets are tagged
+through their description column, advances through their purpose,
+assignments through their name and leaves through their reason.
+
+Usage:
+    SND_DATABASE_URL=postgres://... python -m perf.datagen \\
+        --employees 100000 --equipment 20000 --rentals 50000 --timesheet-days 100
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import math
+import time
+
+import numpy as np
+
+SEED_PREFIX = "SEED-"
+CHUNK_ROWS = 100_000
+ID_RESERVE = 10_000_000
+
+TABLE_KEYS = {
+    "employees": 1,
+    "equipment": 2,
+    "customers": 3,
+    "rentals": 4,
+    "rental_items": 5,
+    "timesheets": 6,
+    "advance_payments": 7,
+    "employee_assignments": 8,
+    "employee_leaves": 9,
+}
+
+# Tag column and tag prefix per table, used to count what is already seeded
+TAGS = {
+    "employees": ("file_number", SEED_PREFIX + "E"),
+    "equipment": ("door_number", SEED_PREFIX + "D"),
+    "customers": ("erpnext_id", SEED_PREFIX + "C"),
+    "rentals": ("rental_number", SEED_PREFIX + "R"),
+    "timesheets": ("description", SEED_PREFIX + "T"),
+    "advance_payments": ("purpose", SEED_PREFIX + "A"),
+    "employee_assignments": ("name", SEED_PREFIX + "G"),
+    "employee_leaves": ("reason", SEED_PREFIX + "L"),
+}
+
+RENTALS_PER_CUSTOMER = 10
+OPERATOR_EVERY = 5
+LEAVE_EVERY = 10
+# Assignments start up to this many days back, so the timesheet cron has a
+# bounded backlog per employee
+ASSIGNMENT_DAYS = 60
+
+FIRST_NAMES = np.array(["Mohammad", "Ahmed", "Ali", "Khalid", "Omar", "Rashid", "Imran", "Jose", "Ramesh", "Bilal"])
+LAST_NAMES = np.array(["Khan", "Hussain", "Rahman", "Alam", "Qureshi", "Santos", "Kumar", "Saleh", "Nasser", "Iqbal"])
+NATIONALITIES = np.array(["Saudi", "Pakistani", "Indian", "Bangladeshi", "Egyptian", "Filipino", "Yemeni"])
+NATIONALITY_P = [0.10, 0.30, 0.25, 0.15, 0.08, 0.07, 0.05]
+EMPLOYEE_STATUS = np.array(["active", "inactive", "on_leave", "terminated"])
+EMPLOYEE_STATUS_P = [0.85, 0.05, 0.06, 0.04]
+EQUIPMENT_KINDS = np.array(["Excavator", "Crane", "Loader", "Forklift", "Bulldozer", "Dump Truck", "Generator", "Compressor"])
+EQUIPMENT_STATUS = np.array(["available", "rented", "maintenance", "out_of_service"])
+EQUIPMENT_STATUS_P = [0.45, 0.40, 0.10, 0.05]
+RATE_TYPES = np.array(["daily", "weekly", "monthly"])
+RATE_TYPE_P = [0.3, 0.1, 0.6]
+
+
+def chunk_rng(seed, table, chunk):
+    return np.random.default_rng([seed, TABLE_KEYS[table], chunk])
+
+
+def tagged(prefix, index, width=7):
+    return np.char.add(prefix, np.char.zfill(index.astype(str), width))
+
+
+def money(values):
+    return np.char.mod("%.2f", np.round(values, 2))
+
+
+def day_strings(today, offsets):
+    return (np.datetime64(today, "D") + offsets.astype("timedelta64[D]")).astype(str)
+
+
+def flags(values):
+    return np.where(values, "t", "f")
+
+
+def nullable(values, mask):
+    """Empty CSV field (NULL) where mask is False."""
+    return np.where(mask, values, "")
+
+
+class Context:
+    """Everything a chunk builder needs besides its own random generator."""
+
+    def __init__(self, seed, today, counts, bases):
+        self.seed = seed
+        self.today = today
+        self.counts = counts
+        self.bases = bases
+        self.timesheet_days = counts.get("timesheet_days", 0)
+
+
+def build_employees(ctx, rng, idx):
+    n = len(idx)
+    nationality = rng.choice(NATIONALITIES, n, p=NATIONALITY_P)
+    basic = np.clip(rng.lognormal(np.log(4000), 0.5, n), 1500, 40000)
+    is_saudi = nationality == "Saudi"
+    return {
+        "id": (ctx.bases["employees"] + idx).astype(str),
+        "file_number": tagged(TAGS["employees"][1], idx),
+        "first_name": rng.choice(FIRST_NAMES, n),
+        "last_name": np.char.add(rng.choice(LAST_NAMES, n), np.char.add(" ", idx.astype(str))),
+        "email": np.char.add(np.char.add("seed.", idx.astype(str)), "@example.com"),
+        "nationality": nationality,
+        "hire_date": day_strings(ctx.today, -rng.integers(30, 3650, n)),
+        "basic_salary": money(basic),
+        "food_allowance": money(np.where(rng.random(n) < 0.6, 300, 0)),
+        "housing_allowance": money(np.round(basic * 0.25)),
+        "transport_allowance": money(np.where(rng.random(n) < 0.5, 200, 0)),
+        "iqama_number": nullable(np.char.add("2", np.char.zfill(rng.integers(0, 10**9, n).astype(str), 9)), ~is_saudi),
+        # Expiries spread from three months ago to two years ahead, so the
+        # iqama-expiring dashboards always have something to show
+        "iqama_expiry": nullable(day_strings(ctx.today, rng.integers(-90, 730, n)), ~is_saudi),
+        "is_operator": flags(idx % OPERATOR_EVERY == 0),
+        "status": rng.choice(EMPLOYEE_STATUS, n, p=EMPLOYEE_STATUS_P),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def build_equipment(ctx, rng, idx):
+    n = len(idx)
+    kind = rng.choice(EQUIPMENT_KINDS, n)
+    daily = np.round(rng.uniform(150, 3500, n), -1)
+    return {
+        "id": (ctx.bases["equipment"] + idx).astype(str),
+        "name": np.char.add(np.char.add(kind, " "), idx.astype(str)),
+        "door_number": tagged(TAGS["equipment"][1], idx),
+        "status": rng.choice(EQUIPMENT_STATUS, n, p=EQUIPMENT_STATUS_P),
+        "daily_rate": money(daily),
+        "weekly_rate": money(daily * 6),
+        "monthly_rate": money(daily * 24),
+        "purchase_date": day_strings(ctx.today, -rng.integers(180, 5000, n)),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def build_customers(ctx, rng, idx):
+    n = len(idx)
+    return {
+        "id": (ctx.bases["customers"] + idx).astype(str),
+        "name": np.char.add("Seed Customer ", idx.astype(str)),
+        "erpnext_id": tagged(TAGS["customers"][1], idx),
+        "credit_limit": money(np.round(rng.uniform(50_000, 2_000_000, n), -3)),
+        "status": np.full(n, "active"),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def rental_frame(ctx, rng, idx):
+    """Rental columns plus the raw day offsets rental_items need."""
+    n = len(idx)
+    start = -rng.integers(0, 720, n)
+    length = rng.integers(7, 365, n)
+    end = start + length
+    completed = end < 0
+    status = np.where(completed, "completed", np.where(rng.random(n) < 0.1, "pending", "active"))
+    columns = {
+        "id": (ctx.bases["rentals"] + idx).astype(str),
+        "rental_number": tagged(TAGS["rentals"][1], idx),
+        "customer_id": (ctx.bases["customers"] + idx // RENTALS_PER_CUSTOMER).astype(str),
+        "start_date": day_strings(ctx.today, start),
+        "expected_end_date": day_strings(ctx.today, end),
+        "status": status,
+        "has_operators": flags(rng.random(n) < 0.5),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+    return columns, start, end, completed
+
+
+def build_rentals(ctx, rng, idx):
+    return rental_frame(ctx, rng, idx)[0]
+
+
+def build_rental_items(ctx, rng, idx):
+    # Rental columns come from the rentals generator of the same chunk, items
+    # get their own generator so both tables stay reproducible on their own
+    chunk = int(idx[0]) // CHUNK_ROWS
+    _, start, end, completed = rental_frame(ctx, chunk_rng(ctx.seed, "rentals", chunk), idx)
+    item_rng = rng
+    per_rental = item_rng.integers(1, 4, len(idx))
+    owner = np.repeat(np.arange(len(idx)), per_rental)
+    m = len(owner)
+
+    rate_type = item_rng.choice(RATE_TYPES, m, p=RATE_TYPE_P)
+    daily = np.round(item_rng.uniform(150, 3500, m), -1)
+    unit_price = np.select([rate_type == "daily", rate_type == "weekly"], [daily, daily * 6], daily * 24)
+    operators = max(1, math.ceil(ctx.counts["employees"] / OPERATOR_EVERY))
+    # Without seeded employees there is nobody to point at, so no operators
+    has_operator = (item_rng.random(m) < 0.5) & (ctx.counts["employees"] > 0)
+    item_start = start[owner] + item_rng.integers(0, 7, m)
+    return {
+        "_key": idx[owner],
+        "rental_id": (ctx.bases["rentals"] + idx[owner]).astype(str),
+        "equipment_id": (ctx.bases["equipment"] + item_rng.integers(0, ctx.counts["equipment"], m)).astype(str),
+        "unit_price": money(unit_price),
+        "total_price": money(unit_price),
+        "rate_type": rate_type,
+        "operator_id": nullable(
+            (ctx.bases["employees"] + OPERATOR_EVERY * item_rng.integers(0, operators, m)).astype(str),
+            has_operator,
+        ),
+        "status": np.where(completed[owner], "completed", "active"),
+        "start_date": day_strings(ctx.today, np.minimum(item_start, end[owner])),
+        "completed_date": nullable(day_strings(ctx.today, end[owner]), completed[owner]),
+        "updated_at": np.full(m, str(ctx.today)),
+    }
+
+
+def build_timesheets(ctx, rng, idx):
+    n = len(idx)
+    days = ctx.timesheet_days
+    employee = idx // days
+    offset = idx % days - days
+    date = np.datetime64(ctx.today, "D") + offset.astype("timedelta64[D]")
+    # 1970-01-01 was a Thursday, so Friday is weekday index 1 in this scheme
+    friday = (date.astype(np.int64) % 7) == 1
+    absent = rng.random(n) < 0.04
+    hours = np.where(friday | absent, 0, 8)
+    overtime = np.where(hours > 0, rng.choice([0, 0, 0, 1, 2, 3, 4], n), 0)
+    current_month = date >= np.datetime64(ctx.today, "M").astype("datetime64[D]")
+    day_text = date.astype(str)
+    return {
+        "employee_id": (ctx.bases["employees"] + employee).astype(str),
+        "date": day_text,
+        "start_time": np.char.add(day_text, " 07:00:00"),
+        "hours_worked": money(hours),
+        "overtime_hours": money(overtime),
+        "status": np.where(current_month, "pending", "approved"),
+        "description": np.full(n, TAGS["timesheets"][1]),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def build_advance_payments(ctx, rng, idx):
+    n = len(idx)
+    amount = np.round(np.clip(rng.lognormal(np.log(3000), 0.6, n), 500, 30000), -2)
+    months = rng.integers(1, 7, n)
+    monthly = np.round(amount / months, 2)
+    paid = rng.integers(0, months)
+    return {
+        "employee_id": (ctx.bases["employees"] + idx).astype(str),
+        "amount": money(amount),
+        "purpose": tagged(TAGS["advance_payments"][1], idx),
+        "status": np.where(paid > 0, "partially_repaid", "approved"),
+        "estimated_months": months.astype(str),
+        "monthly_deduction": money(monthly),
+        "repaid_amount": money(monthly * paid),
+        "payment_date": day_strings(ctx.today, -30 * (paid + 1)),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def build_employee_assignments(ctx, rng, idx):
+    n = len(idx)
+    start = -rng.integers(1, ASSIGNMENT_DAYS, n)
+    ended = rng.random(n) < 0.3
+    end = start + rng.integers(7, ASSIGNMENT_DAYS, n)
+    return {
+        "employee_id": (ctx.bases["employees"] + idx).astype(str),
+        "name": tagged(TAGS["employee_assignments"][1], idx),
+        "start_date": day_strings(ctx.today, start),
+        "end_date": nullable(day_strings(ctx.today, np.minimum(end, 0)), ended),
+        "status": np.where(ended & (end < 0), "completed", "active"),
+        "type": np.full(n, "manual"),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+def build_employee_leaves(ctx, rng, idx):
+    # One leave per LEAVE_EVERY-th employee, a fifth of them spanning today
+    n = len(idx)
+    days = rng.integers(3, 30, n)
+    start = np.where(rng.random(n) < 0.2, -rng.integers(0, 3, n), rng.integers(-90, 90, n))
+    return {
+        "employee_id": (ctx.bases["employees"] + idx * LEAVE_EVERY).astype(str),
+        "leave_type": rng.choice(np.array(["annual", "sick", "emergency"]), n, p=[0.7, 0.2, 0.1]),
+        "start_date": day_strings(ctx.today, start),
+        "end_date": day_strings(ctx.today, start + days - 1),
+        "days": days.astype(str),
+        "reason": tagged(TAGS["employee_leaves"][1], idx),
+        "status": rng.choice(np.array(["approved", "pending", "rejected"]), n, p=[0.8, 0.15, 0.05]),
+        "updated_at": np.full(n, str(ctx.today)),
+    }
+
+
+BUILDERS = {
+    "employees": build_employees,
+    "equipment": build_equipment,
+    "customers": build_customers,
+    "rentals": build_rentals,
+    "rental_items": build_rental_items,
+    "timesheets": build_timesheets,
+    "advance_payments": build_advance_payments,
+    "employee_assignments": build_employee_assignments,
+    "employee_leaves": build_employee_leaves,
+}
+
+
+def iter_chunks(ctx, table, start, stop, rng_table=None):
+    """Yield column dicts for global rows [start, stop) of a table, chunk-aligned."""
+    rng_table = rng_table or table
+    if start >= stop:
+        return
+    for chunk in range(start // CHUNK_ROWS, math.ceil(stop / CHUNK_ROWS)):
+        lo = chunk * CHUNK_ROWS
+        idx = np.arange(max(lo, start), min(lo + CHUNK_ROWS, stop))
+        full = np.arange(lo, lo + CHUNK_ROWS)
+        columns = BUILDERS[table](ctx, chunk_rng(ctx.seed, rng_table, chunk), full)
+        key = columns.pop("_key", full)
+        keep = (key >= idx[0]) & (key <= idx[-1])
+        yield {name: values[keep] for name, values in columns.items()}
+
+
+def to_csv(columns):
+    rows = zip(*(values.tolist() for values in columns.values()))
+    return ("\n".join(map(",".join, rows)) + "\n").encode("utf-8")
+
+
+async def copy_chunks(conn, table, chunks):
+    """Stream column chunks into a table with one COPY; returns rows written."""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return 0
+    written = 0
+
+    async def source():
+        nonlocal written
+        for columns in itertools.chain([first], chunks):
+            written += len(next(iter(columns.values())))
+            yield to_csv(columns)
+
+    await conn.copy_to_table(table, source=source(), columns=list(first), format="csv")
+    return written
+
+
+async def seeded_count(conn, table):
+    column, prefix = TAGS[table]
+    return await conn.fetchval(f"SELECT count(*) FROM {table} WHERE {column} LIKE $1", prefix + "%")
+
+
+async def id_base(conn, table):
+    """First id of the seeded block, reserving a fresh block on first use."""
+    column, prefix = TAGS[table]
+    first = await conn.fetchval(f"SELECT id FROM {table} WHERE {column} = $1", tagged(prefix, np.array([0]))[0])
+    if first is not None:
+        return first
+    base = await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    # Move the sequence past the block so rows the app creates never collide with it
+    await conn.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), $1::bigint)", base + ID_RESERVE
+    )
+    return base
+
+
+async def generate(conn, employees=0, equipment=0, rentals=0, timesheet_days=0, advances=False,
+                   assignments=False, leaves=False, seed=42, today=None):
+    """Top every seeded table up to the requested size; returns rows written per table.
+
+    Timesheet rows are laid out employee-major, so adding employees later
+    extends them cleanly but changing timesheet_days needs a clear_seed first.
+    With advances every seeded employee gets one outstanding advance payment,
+    with assignments one employee assignment, and with leaves every
+    LEAVE_EVERY-th employee one leave.
+    """
+    today = today or datetime.date.today()
+    counts = {
+        "employees": max(employees, await seeded_count(conn, "employees")),
+        "equipment": max(equipment, await seeded_count(conn, "equipment")),
+        "customers": math.ceil(rentals / RENTALS_PER_CUSTOMER),
+        "rentals": rentals,
+        "timesheet_days": timesheet_days,
+    }
+    bases = {table: await id_base(conn, table) for table in ("employees", "equipment", "customers", "rentals")}
+    ctx = Context(seed, today, counts, bases)
+    written = {}
+
+    for table in ("employees", "equipment", "customers"):
+        have = await seeded_count(conn, table)
+        written[table] = await copy_chunks(conn, table, iter_chunks(ctx, table, have, counts[table]))
+
+    if rentals and not counts["equipment"]:
+        raise ValueError("rental items need seeded equipment; pass --equipment as well")
+    have = await seeded_count(conn, "rentals")
+    if have < rentals:
+        written["rentals"] = await copy_chunks(conn, "rentals", iter_chunks(ctx, "rentals", have, rentals))
+        written["rental_items"] = await copy_chunks(conn, "rental_items", iter_chunks(ctx, "rental_items", have, rentals))
+
+    if timesheet_days:
+        have = await seeded_count(conn, "timesheets")
+        target = counts["employees"] * timesheet_days
+        if have < target:
+            written["timesheets"] = await copy_chunks(conn, "timesheets", iter_chunks(ctx, "timesheets", have, target))
+
+    if advances:
+        have = await seeded_count(conn, "advance_payments")
+        written["advance_payments"] = await copy_chunks(
+            conn, "advance_payments", iter_chunks(ctx, "advance_payments", have, counts["employees"])
+        )
+
+    if assignments:
+        have = await seeded_count(conn, "employee_assignments")
+        written["employee_assignments"] = await copy_chunks(
+            conn, "employee_assignments", iter_chunks(ctx, "employee_assignments", have, counts["employees"])
+        )
+
+    if leaves:
+        have = await seeded_count(conn, "employee_leaves")
+        written["employee_leaves"] = await copy_chunks(
+            conn, "employee_leaves",
+            iter_chunks(ctx, "employee_leaves", have, math.ceil(counts["employees"] / LEAVE_EVERY)),
+        )
+
+    await conn.execute(
+        "ANALYZE employees, equipment, customers, rentals, rental_items, timesheets, advance_payments, "
+        "employee_assignments, employee_leaves"
+    )
+    return written
+
+
+async def run(args):
+    from perf.seed import connect
+
+    conn = await connect()
+    started = time.perf_counter()
+    try:
+        written = await generate(
+            conn,
+            employees=args.employees,
+            equipment=args.equipment,
+            rentals=args.rentals,
+            timesheet_days=args.timesheet_days,
+            advances=args.advances,
+            assignments=args.assignments,
+            leaves=args.leaves,
+            seed=args.seed,
+        )
+    finally:
+        await conn.close()
+    elapsed = time.perf_counter() - started
+    total = sum(written.values())
+    print(f"{written} -> {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=0)
+    parser.add_argument("--equipment", type=int, default=0)
+    parser.add_argument("--rentals", type=int, default=0)
+    parser.add_argument("--timesheet-days", type=int, default=0, help="timesheet rows per seeded employee")
+    parser.add_argument("--advances", action="store_true", help="one outstanding advance per seeded employee")
+    parser.add_argument("--assignments", action="store_true", help="one assignment per seeded employee")
+    parser.add_argument("--leaves", action="store_true", help=f"one leave per {LEAVE_EVERY}th seeded employee")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Postgres template-database snapshots for isolated, parallel local test runs.
+
+Re-running drizzle migrations and seeds between tests is far too slow, so a
+seeded template is built once and every test or worker gets a clone with
+CREATE DATABASE ... TEMPLATE, which copies files instead of replaying SQL and
+takes well under a second for a dev-sized database (FILE_COPY strategy on
+PostgreSQL 15+).
+
+Commands:
+    template  clone the current database (SND_DATABASE_URL / DATABASE_URL) into
+              the template, optionally top it up with perf.datagen rows, and
+              mark it as a template
+    reset     drop and re-create a database from the template; the app's pg
+              pool reconnects on its own, so this can run between TC scripts.
+              The app's Redis database (REDIS_URL, unless REDIS_ENABLED=false)
+              is flushed too, so cached list responses do not outlive it
+    run       run TC scripts isolated: sequentially against the app on :3000
+              with a reset before each, or with --workers N in parallel, each
+              worker with its own clone and its own `next start` instance,
+              started with REDIS_ENABLED=false so no cache is shared
+    drop      remove clones (and --template to remove the template too)
+
+Only local servers are accepted unless --force is given.
+
+Usage:
+    python -m perf.dbsnapshot template --employees 5000 --equipment 1000 --rentals 2000
+    python -m perf.dbsnapshot run --tests TC004,TC013,TC023
+    python -m perf.dbsnapshot run --tests TC004,TC013,TC023 --workers 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urlparse, urlunparse
+
+import aiohttp
+import asyncpg
+
+from perf.common import TESTS_DIR, find_tc_scripts, load_config
+from perf.seed import database_url
+
+APP_DIR = TESTS_DIR.parent
+TEMPLATE_NAME = "snd_template"
+CLONE_PREFIX = "snd_worker_"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", ""}
+# The endpoint hard-coded in the generated TC scripts
+TC_ENDPOINT = "http://localhost:3000"
+
+
+def with_database(url, name):
+    parts = urlparse(url)
+    return urlunparse(parts._replace(path=f"/{name}"))
+
+
+def database_name(url):
+    return urlparse(url).path.lstrip("/")
+
+
+def check_local(url, force):
+    host = urlparse(url).hostname or ""
+    if host not in LOCAL_HOSTS and not force:
+        raise SystemExit(f"Refusing to touch databases on {host}; pass --force for a non-local test server")
+
+
+async def admin_connection(url):
+    # CREATE/DROP DATABASE cannot run inside the database being copied
+    return await asyncpg.connect(with_database(url, "postgres"))
+
+
+async def terminate(admin, name):
+    await admin.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = $1 AND pid <> pg_backend_pid()",
+        name,
+    )
+
+
+def redis_url():
+    """The Redis the app on :3000 caches in, or None when it runs without one."""
+    if os.environ.get("REDIS_ENABLED") == "false":
+        return None
+    return os.environ.get("REDIS_URL") or None
+
+
+async def flush_redis(url):
+    """FLUSHDB on the database of a redis://[user:password@]host:port/db URL, in plain RESP."""
+    parts = urlparse(url)
+    commands = []
+    if parts.password:
+        commands.append(["AUTH", parts.username, parts.password] if parts.username else ["AUTH", parts.password])
+    if parts.path.strip("/"):
+        commands.append(["SELECT", parts.path.strip("/")])
+    commands.append(["FLUSHDB"])
+    reader, writer = await asyncio.open_connection(parts.hostname or "localhost", parts.port or 6379)
+    try:
+        for command in commands:
+            writer.write(
+                f"*{len(command)}\r\n".encode()
+                + b"".join(f"${len(arg.encode())}\r\n{arg}\r\n".encode() for arg in command)
+            )
+            await writer.drain()
+            reply = await reader.readline()
+            if reply.startswith(b"-"):
+                raise RuntimeError(f"Redis {command[0]} failed: {reply.decode().strip()}")
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def clone(admin, template, name):
+    """(Re)create `name` from `template` and return how long it took in seconds."""
+    started = time.perf_counter()
+    version = await admin.fetchval("SHOW server_version_num")
+    strategy = " STRATEGY = FILE_COPY" if int(version) >= 150000 else ""
+    await terminate(admin, name)
+    await admin.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    await admin.execute(f'CREATE DATABASE "{name}" TEMPLATE "{template}"{strategy}')
+    return time.perf_counter() - started
+
+
+async def build_template(url, template, employees, equipment, rentals, timesheet_days, seed):
+    source = database_name(url)
+    admin = await admin_connection(url)
+    try:
+        if await admin.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", template):
+            # A template cannot be dropped; rebuilding replaces it
+            await admin.execute(f'ALTER DATABASE "{template}" WITH IS_TEMPLATE false')
+        # The source must be idle while it is copied
+        await terminate(admin, source)
+        seconds = await clone(admin, source, template)
+        print(f"Copied {source} -> {template} in {seconds:.2f}s")
+    finally:
+        await admin.close()
+
+    if employees or equipment or rentals:
+        from perf.seed import seed_scale
+
+        conn = await asyncpg.connect(with_database(url, template))
+        try:
+            added = await seed_scale(conn, employees, equipment, rentals, timesheet_days, seed=seed)
+            print(f"Seeded template: {added}")
+        finally:
+            await conn.close()
+
+    admin = await admin_connection(url)
+    try:
+        await terminate(admin, template)
+        await admin.execute(f'ALTER DATABASE "{template}" WITH IS_TEMPLATE true ALLOW_CONNECTIONS false')
+    finally:
+        await admin.close()
+
+
+async def reset(url, template, name, redis=None):
+    admin = await admin_connection(url)
+    try:
+        seconds = await clone(admin, template, name)
+    finally:
+        await admin.close()
+    if redis:
+        await flush_redis(redis)
+    return seconds
+
+
+async def drop(url, template, names, include_template):
+    admin = await admin_connection(url)
+    try:
+        if not names:
+            rows = await admin.fetch("SELECT datname FROM pg_database WHERE datname LIKE $1", CLONE_PREFIX + "%")
+            names = [row["datname"] for row in rows]
+        if include_template:
+            await admin.execute(f'ALTER DATABASE "{template}" WITH IS_TEMPLATE false')
+            names = list(names) + [template]
+        for name in names:
+            await terminate(admin, name)
+            await admin.execute(f'DROP DATABASE IF EXISTS "{name}"')
+            print(f"Dropped {name}")
+    finally:
+        await admin.close()
+
+
+class AppInstance:
+    """A `next start` process on its own port, pointed at its own database.
+
+    Redis caching is off unless `env` turns it back on: instances share the
+    REDIS_URL of the environment and would serve each other's cached lists.
+    """
+
+    def __init__(self, port, db_url, dev=False, env=None):
+        self.port = port
+        self.db_url = db_url
+        self.dev = dev
+        self.env = env or {}
+        self.proc = None
+
+    @property
+    def base_url(self):
+        return f"http://localhost:{self.port}"
+
+    async def start(self, timeout=180):
+        env = {
+            **os.environ, "REDIS_ENABLED": "false", **self.env,
+            "DATABASE_URL": self.db_url, "PORT": str(self.port), "NEXTAUTH_URL": self.base_url,
+        }
+        command = "dev" if self.dev else "start"
+        self.proc = await asyncio.create_subprocess_exec(
+            "npx", "next", command, "-p", str(self.port),
+            cwd=str(APP_DIR), env=env,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                try:
+                    async with session.get(f"{self.base_url}/api/health") as resp:
+                        if resp.status < 500:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(1)
+        raise RuntimeError(f"App on port {self.port} did not come up within {timeout}s")
+
+    async def stop(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.terminate()
+            await self.proc.wait()
+
+
+async def run_script(script, base_url):
+    """Run a TC script, retargeted from the default endpoint to base_url."""
+    source = script.read_text(encoding="utf-8").replace(TC_ENDPOINT, base_url)
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-", cwd=str(TESTS_DIR),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await proc.communicate(source.encode("utf-8"))
+    return proc.returncode, output.decode("utf-8", "replace")
+
+
+async def run_tests(url, template, names, workers, first_port, dev):
+    scripts = find_tc_scripts(names)
+    results = {}
+
+    if workers <= 1:
+        # Sequential: reset the app's own database before every script
+        app_db = database_name(url)
+        for script in scripts:
+            seconds = await reset(url, template, app_db, redis_url())
+            code, _ = await run_script(script, load_config()["base_url"])
+            results[script.stem] = {"reset_seconds": seconds, "passed": code == 0}
+            print(f"{script.stem}: {'passed' if code == 0 else 'failed'} (reset {seconds:.2f}s)")
+        return results
+
+    queue = asyncio.Queue()
+    for script in scripts:
+        queue.put_nowait(script)
+
+    async def worker(index):
+        name = f"{CLONE_PREFIX}{index}"
+        app = AppInstance(first_port + index, with_database(url, name), dev=dev)
+        await reset(url, template, name)
+        await app.start()
+        try:
+            while not queue.empty():
+                script = queue.get_nowait()
+                seconds = await reset(url, template, name)
+                code, _ = await run_script(script, app.base_url)
+                results[script.stem] = {"worker": index, "reset_seconds": seconds, "passed": code == 0}
+                print(f"[worker {index}] {script.stem}: {'passed' if code == 0 else 'failed'} (reset {seconds:.2f}s)")
+        finally:
+            await app.stop()
+
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--template", default=TEMPLATE_NAME)
+    parser.add_argument("--force", action="store_true", help="allow a non-local database server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    template = sub.add_parser("template")
+    template.add_argument("--employees", type=int, default=0)
+    template.add_argument("--equipment", type=int, default=0)
+    template.add_argument("--rentals", type=int, default=0)
+    template.add_argument("--timesheet-days", type=int, default=0)
+    template.add_argument("--seed", type=int, default=42)
+
+    resetting = sub.add_parser("reset")
+    resetting.add_argument("--name", help="database to re-create (default: the app's database)")
+
+    running = sub.add_parser("run")
+    running.add_argument("--tests", required=True, help="comma separated TC ids")
+    running.add_argument("--workers", type=int, default=1)
+    running.add_argument("--first-port", type=int, default=3101)
+    running.add_argument("--dev", action="store_true", help="use `next dev` instead of a built `next start`")
+
+    dropping = sub.add_parser("drop")
+    dropping.add_argument("--name", action="append", default=[])
+    dropping.add_argument("--template", dest="drop_template", action="store_true")
+
+    args = parser.parse_args()
+    url = database_url()
+    check_local(url, args.force)
+
+    if args.command == "template":
+        asyncio.run(build_template(
+            url, args.template, args.employees, args.equipment, args.rentals, args.timesheet_days, args.seed
+        ))
+    elif args.command == "reset":
+        # A named clone is not what the app on :3000 caches for
+        redis = None if args.name else redis_url()
+        seconds = asyncio.run(reset(url, args.template, args.name or database_name(url), redis))
+        print(f"Reset in {seconds:.2f}s")
+    elif args.command == "run":
+        results = asyncio.run(run_tests(
+            url, args.template, args.tests.split(","), args.workers, args.first_port, args.dev
+        ))
+        sys.exit(0 if all(r["passed"] for r in results.values()) else 1)
+    else:
+        asyncio.run(drop(url, args.template, args.name, args.drop_template))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,560 @@
+"""In-memory ERPNext stand-in for the sync paths (TC020) and the sync benchmarks.
+
+Implements the slice of the Frappe REST API that src/lib/erpnext-client.ts,
+the erpnext-*-service modules, /api/erpnext/* and /api/customers/sync* use:
+
+    GET    /api/resource/<DocType>?filters=..&fields=..&limit_page_length=..&limit_start=..
+    GET    /api/resource/<DocType>/<name>
+    POST   /api/resource/<DocType>
+    PUT    /api/resource/<DocType>/<name>
+    DELETE /api/resource/<DocType>/<name>
+    /api/method/frappe.auth.get_logged_user, frappe.client.get_meta,
+    frappe.client.insert, frappe.client.rename_doc
+
+Customer, Employee, Item and Sales Invoice get ERPNext's naming and derived
+fields (Sales Invoice totals, taxes and outstanding amount); any other DocType
+(Account, Payment Entry, ...) is stored as posted. State lives in memory, so
+every run starts from a known seed.
+
+Misbehaviour is configurable per run, or at runtime via POST /__standin/config:
+
+    --latency SPEC         delay for every call, in perf.har latency model syntax
+    --write-latency SPEC   separate model for POST/PUT/DELETE
+    --rate-limit R         token bucket of R requests/s (--burst), 429 when empty
+    --error-rate P         fraction of calls answered with --error-status
+    --timeout-rate P       fraction of calls that hang for --timeout-seconds
+    --fail-writes-after N  every write after the first N fails (outage mid-sync)
+    --fault-doctypes ...   restrict the faults above to these DocTypes
+
+GET /__standin/stats returns call counts per method and DocType, which the
+sync benchmarks turn into upstream calls per synced record; POST
+/__standin/reset clears state and counters.
+
+Point the app at it with NEXT_PUBLIC_ERPNEXT_URL=http://localhost:8010 (plus
+any API key and secret). NEXT_PUBLIC_* values are inlined at build time, so set
+them before `next build` or run the dev server.
+
+Usage:
+    python -m perf.erpnext_standin --customers 1000 --employees 500 --items 200
+    python -m perf.erpnext_standin --latency lognormal:60,0.5 --rate-limit 20 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import date, datetime
+from urllib.parse import unquote
+
+from aiohttp import web
+
+from perf.har import LatencyModel
+
+DEFAULT_PORT = 8010
+VAT_RATE = 15.0
+
+# Fields returned by frappe.client.get_meta, enough for the field discovery routes
+META_FIELDS = {
+    "Customer": ["customer_name", "customer_type", "customer_group", "territory", "email_id",
+                 "mobile_no", "tax_id", "credit_limit", "default_currency", "disabled"],
+    "Employee": ["employee_name", "first_name", "last_name", "employee_number", "department",
+                 "designation", "status", "date_of_joining", "company_email", "cell_number", "ctc"],
+    "Item": ["item_code", "item_name", "item_group", "stock_uom", "description", "standard_rate",
+             "is_stock_item", "disabled"],
+    "Sales Invoice": ["customer", "company", "posting_date", "due_date", "currency", "items",
+                      "taxes", "net_total", "total_taxes_and_charges", "grand_total",
+                      "outstanding_amount", "status", "docstatus"],
+}
+
+
+class FrappeError(Exception):
+    def __init__(self, status, exc_type, message):
+        super().__init__(message)
+        self.status = status
+        self.exc_type = exc_type
+
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def parse_filters(raw):
+    """Frappe filters: [[field, op, value], ...], [[doctype, field, op, value]] or {field: value}."""
+    if not raw:
+        return []
+    data = json.loads(raw)
+    if isinstance(data, dict):
+        return [(field, "=", value) for field, value in data.items()]
+    return [tuple(item[-3:]) for item in data]
+
+
+def matches(doc, filters):
+    for field, op, value in filters:
+        actual = doc.get(field)
+        if op == "=" and actual != value:
+            return False
+        if op == "!=" and actual == value:
+            return False
+        if op == "like" and str(value).strip("%").lower() not in str(actual or "").lower():
+            return False
+        if op == "in" and actual not in (value if isinstance(value, list) else str(value).split(",")):
+            return False
+        if op in (">", "<", ">=", "<=") and (actual is None or not _compare(actual, op, value)):
+            return False
+    return True
+
+
+def _compare(actual, op, value):
+    return {">": actual > value, "<": actual < value, ">=": actual >= value, "<=": actual <= value}[op]
+
+
+class Faults:
+    def __init__(self, latency="none", write_latency=None, rate_limit=0.0, burst=10, error_rate=0.0,
+                 error_status=500, timeout_rate=0.0, timeout_seconds=30.0, fail_writes_after=None,
+                 doctypes=None, seed=0):
+        self.latency = LatencyModel(latency, seed=seed)
+        self.write_latency = LatencyModel(write_latency, seed=seed + 1) if write_latency else self.latency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.fail_writes_after = fail_writes_after
+        self.doctypes = set(doctypes or [])
+        self.random = random.Random(seed)
+
+    def take_token(self):
+        if not self.rate_limit:
+            return True
+        current = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (current - self.refilled) * self.rate_limit)
+        self.refilled = current
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def applies_to(self, doctype):
+        return not self.doctypes or doctype in self.doctypes
+
+
+class ERPNextStandIn:
+    """The stand-in server; run with `async with ERPNextStandIn(...)` or from the CLI."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, faults=None, api_key=None, api_secret=None):
+        self.host = host
+        self.port = port
+        self.faults = faults or Faults()
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.docs = {}
+        self.series = Counter()
+        self.calls = Counter()
+        self.writes = 0
+        self.runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/__standin/stats", self.handle_stats)
+        app.router.add_post("/__standin/reset", self.handle_reset)
+        app.router.add_post("/__standin/config", self.handle_config)
+        app.router.add_route("*", "/api/resource/{doctype}", self.handle_resource)
+        app.router.add_route("*", "/api/resource/{doctype}/{name:.+}", self.handle_resource)
+        app.router.add_route("*", "/api/method/{method}", self.handle_method)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    # State
+
+    def table(self, doctype):
+        return self.docs.setdefault(doctype, {})
+
+    def reset(self):
+        self.docs.clear()
+        self.series.clear()
+        self.calls.clear()
+        self.writes = 0
+
+    def next_name(self, doctype, doc):
+        if doctype == "Customer":
+            base = doc.get("customer_name") or doc.get("name")
+            name, suffix = base, 1
+            while name in self.table(doctype):
+                suffix += 1
+                name = f"{base} - {suffix}"
+            return name
+        if doctype == "Item":
+            return doc.get("item_code") or doc.get("item_name")
+        self.series[doctype] += 1
+        number = self.series[doctype]
+        if doctype == "Employee":
+            return f"HR-EMP-{number:05d}"
+        if doctype == "Sales Invoice":
+            return f"ACC-SINV-{date.today().year}-{number:05d}"
+        if doctype == "Payment Entry":
+            return f"ACC-PAY-{date.today().year}-{number:05d}"
+        return doc.get("name") or f"{doctype.upper().replace(' ', '-')}-{number:05d}"
+
+    def insert(self, doctype, doc):
+        doc = {k: v for k, v in doc.items() if k != "doctype"}
+        if doctype == "Item" and not (doc.get("item_code") or doc.get("item_name")):
+            raise FrappeError(417, "MandatoryError", "Item: item_code is required")
+        if doctype == "Customer" and not (doc.get("customer_name") or doc.get("name")):
+            raise FrappeError(417, "MandatoryError", "Customer: customer_name is required")
+        if doctype == "Sales Invoice":
+            if not doc.get("customer"):
+                raise FrappeError(417, "MandatoryError", "Sales Invoice: customer is required")
+            if doc["customer"] not in self.table("Customer"):
+                raise FrappeError(417, "LinkValidationError", f"Could not find Customer: {doc['customer']}")
+        name = doc.get("name") if doctype not in ("Employee", "Sales Invoice") and doc.get("name") else None
+        name = name or self.next_name(doctype, doc)
+        if name in self.table(doctype):
+            raise FrappeError(409, "DuplicateEntryError", f"{doctype} {name} already exists")
+        stamp = now()
+        doc.update({"name": name, "doctype": doctype, "creation": stamp, "modified": stamp,
+                    "owner": "Administrator", "docstatus": doc.get("docstatus", 0)})
+        self.derive(doctype, doc)
+        self.table(doctype)[name] = doc
+        return doc
+
+    def update(self, doctype, name, changes):
+        doc = self.get(doctype, name)
+        if doc.get("docstatus") == 2:
+            raise FrappeError(417, "ValidationError", f"Cannot edit cancelled {doctype} {name}")
+        doc.update({k: v for k, v in changes.items() if k not in ("name", "doctype", "creation")})
+        doc["modified"] = now()
+        self.derive(doctype, doc)
+        return doc
+
+    def get(self, doctype, name):
+        doc = self.table(doctype).get(name)
+        if doc is None:
+            raise FrappeError(404, "DoesNotExistError", f"{doctype} {name} not found")
+        return doc
+
+    def derive(self, doctype, doc):
+        if doctype == "Customer":
+            doc.setdefault("customer_name", doc["name"])
+            doc.setdefault("customer_type", "Company")
+            doc.setdefault("default_currency", "SAR")
+            doc.setdefault("disabled", 0)
+        elif doctype == "Employee":
+            full = " ".join(p for p in (doc.get("first_name"), doc.get("last_name")) if p)
+            doc.setdefault("employee_name", full or doc["name"])
+            doc.setdefault("status", "Active")
+        elif doctype == "Item":
+            doc.setdefault("item_code", doc["name"])
+            doc.setdefault("item_name", doc["item_code"])
+            doc.setdefault("stock_uom", "Nos")
+            doc.setdefault("disabled", 0)
+        elif doctype == "Sales Invoice":
+            net = 0.0
+            for index, item in enumerate(doc.get("items") or [], start=1):
+                qty = float(item.get("qty") or 1)
+                rate = float(item.get("rate") or 0)
+                item["idx"] = index
+                item["amount"] = round(qty * rate, 2)
+                net += item["amount"]
+            taxes = 0.0
+            for index, tax in enumerate(doc.get("taxes") or [], start=1):
+                tax["idx"] = index
+                tax["tax_amount"] = round(net * float(tax.get("rate") or 0) / 100, 2)
+                taxes += tax["tax_amount"]
+            doc["net_total"] = doc["total"] = round(net, 2)
+            doc["total_taxes_and_charges"] = round(taxes, 2)
+            doc["grand_total"] = doc["rounded_total"] = round(net + taxes, 2)
+            paid = sum(
+                float(ref.get("allocated_amount") or 0)
+                for payment in self.docs.get("Payment Entry", {}).values() if payment.get("docstatus") == 1
+                for ref in payment.get("references") or [] if ref.get("reference_name") == doc["name"]
+            )
+            doc["outstanding_amount"] = round(doc["grand_total"] - paid, 2) if doc.get("docstatus") == 1 else doc["grand_total"]
+            doc["status"] = {0: "Draft", 2: "Cancelled"}.get(
+                doc.get("docstatus"), "Paid" if doc["outstanding_amount"] <= 0 else "Unpaid"
+            )
+        elif doctype == "Payment Entry" and doc.get("docstatus") == 1:
+            for ref in doc.get("references") or []:
+                invoice = self.table("Sales Invoice").get(ref.get("reference_name"))
+                if invoice:
+                    self.derive("Sales Invoice", invoice)
+
+    def seed(self, customers=0, employees=0, items=0, invoices_per_customer=0, seed=42):
+        """Fill the stand-in with deterministic records; returns the counts added."""
+        rng = random.Random(seed)
+        # The accounts and company the invoice service falls back to
+        for doctype, doc in (
+            ("Account", {"name": "Output VAT 15% - SND", "account_type": "Tax"}),
+            ("Account", {"name": "Sales - SND", "account_type": "Income Account"}),
+            ("Account", {"name": "Debtors - SND", "account_type": "Receivable"}),
+            ("Company", {"name": "Samhan Naser Al-Dosri Est", "default_currency": "SAR"}),
+        ):
+            if doc["name"] not in self.table(doctype):
+                self.insert(doctype, doc)
+        for i in range(items):
+            self.insert("Item", {"item_code": f"EQ-{i:05d}", "item_name": f"Equipment {i}",
+                                 "item_group": "Equipment", "standard_rate": rng.choice([150, 300, 450, 900])})
+        for i in range(employees):
+            self.insert("Employee", {"first_name": f"Employee{i}", "last_name": "Standin",
+                                     "employee_number": f"E{i:06d}", "company": "Samhan Naser Al-Dosri Est",
+                                     "date_of_joining": f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+                                     "ctc": rng.randint(3000, 20000)})
+        for i in range(customers):
+            customer = self.insert("Customer", {
+                "customer_name": f"Standin Customer {i:05d}", "customer_group": "Commercial",
+                "territory": "Saudi Arabia", "email_id": f"customer{i}@standin.local",
+                "mobile_no": f"05{rng.randint(10000000, 99999999)}", "credit_limit": rng.choice([0, 50000, 100000]),
+            })
+            for _ in range(invoices_per_customer):
+                self.insert("Sales Invoice", {
+                    "customer": customer["name"], "company": "Samhan Naser Al-Dosri Est",
+                    "posting_date": f"{date.today().year}-{rng.randint(1, 12):02d}-01", "currency": "SAR",
+                    "docstatus": 1,
+                    "items": [{"item_code": "Service", "qty": rng.randint(1, 30), "rate": rng.choice([150, 300, 450])}],
+                    "taxes": [{"charge_type": "On Net Total", "account_head": "Output VAT 15% - SND", "rate": VAT_RATE}],
+                })
+        return {doctype: len(docs) for doctype, docs in self.docs.items()}
+
+    # HTTP
+
+    async def guard(self, request, doctype):
+        """Apply auth, rate limiting, latency and fault injection; returns an error response or None."""
+        write = request.method in ("POST", "PUT", "DELETE")
+        self.calls[f"{request.method} {doctype}"] += 1
+        self.calls["total"] += 1
+        if self.api_key and request.headers.get("Authorization") != f"token {self.api_key}:{self.api_secret}":
+            return error_response(401, "AuthenticationError", "Invalid API key")
+        faults = self.faults
+        if not faults.take_token():
+            self.calls["rate_limited"] += 1
+            return error_response(429, "TooManyRequestsError", "Rate limit exceeded", {"Retry-After": "1"})
+        model = faults.write_latency if write else faults.latency
+        delay = model.sample(request.method, str(request.url))
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if not faults.applies_to(doctype):
+            return None
+        if write:
+            self.writes += 1
+            if faults.fail_writes_after is not None and self.writes > faults.fail_writes_after:
+                self.calls["injected_errors"] += 1
+                return error_response(503, "ServiceUnavailable", "Injected write outage")
+        if faults.timeout_rate and faults.random.random() < faults.timeout_rate:
+            self.calls["injected_timeouts"] += 1
+            await asyncio.sleep(faults.timeout_seconds)
+        if faults.error_rate and faults.random.random() < faults.error_rate:
+            self.calls["injected_errors"] += 1
+            return error_response(faults.error_status, "InjectedError", "Injected failure")
+        return None
+
+    async def handle_resource(self, request):
+        doctype = unquote(request.match_info["doctype"])
+        name = request.match_info.get("name")
+        name = unquote(name) if name else None
+        failure = await self.guard(request, doctype)
+        if failure:
+            return failure
+        try:
+            if request.method == "GET" and name is None:
+                return web.json_response({"data": self.list(doctype, request.query)})
+            if request.method == "GET":
+                return web.json_response({"data": self.get(doctype, name)})
+            if request.method == "POST":
+                return web.json_response({"data": self.insert(doctype, await read_doc(request))})
+            if request.method == "PUT" and name is not None:
+                return web.json_response({"data": self.update(doctype, name, await read_doc(request))})
+            if request.method == "DELETE" and name is not None:
+                self.get(doctype, name)
+                del self.table(doctype)[name]
+                return web.json_response({"message": "ok"})
+        except FrappeError as exc:
+            return error_response(exc.status, exc.exc_type, str(exc))
+        except (ValueError, TypeError) as exc:
+            return error_response(417, "ValidationError", str(exc))
+        return error_response(405, "MethodNotAllowed", request.method)
+
+    def list(self, doctype, query):
+        filters = parse_filters(query.get("filters"))
+        fields = json.loads(query["fields"]) if query.get("fields") else ["name"]
+        start = int(query.get("limit_start", 0))
+        length = int(query.get("limit_page_length", query.get("limit", 20)))
+        rows = [doc for doc in self.table(doctype).values() if matches(doc, filters)]
+        if query.get("order_by"):
+            field, _, direction = query["order_by"].partition(" ")
+            rows.sort(key=lambda d: str(d.get(field.strip("`")) or ""), reverse=direction.lower() == "desc")
+        else:
+            rows.sort(key=lambda d: d["modified"], reverse=True)
+        rows = rows[start:start + length] if length else rows[start:]
+        if fields == ["*"]:
+            return rows
+        return [{field: doc.get(field) for field in fields} for doc in rows]
+
+    async def handle_method(self, request):
+        method = request.match_info["method"]
+        try:
+            body = await read_doc(request) if request.can_read_body else {}
+            # frappe.client form posts send the doc as a JSON string
+            if isinstance(body.get("doc"), str):
+                body["doc"] = json.loads(body["doc"])
+            if not isinstance(body.get("doc") or {}, dict):
+                raise ValueError("doc must be a JSON object")
+        except ValueError as exc:
+            return error_response(417, "ValidationError", str(exc))
+        doctype = body.get("doctype") or request.query.get("doctype") or (body.get("doc") or {}).get("doctype") or method
+        failure = await self.guard(request, doctype)
+        if failure:
+            return failure
+        try:
+            if method == "frappe.auth.get_logged_user":
+                return web.json_response({"message": "Administrator"})
+            if method in ("frappe.client.get_meta", "frappe.desk.form.load.getdoctype"):
+                fields = [{"fieldname": f, "label": f.replace("_", " ").title()} for f in META_FIELDS.get(doctype, [])]
+                return web.json_response({"message": {"name": doctype, "fields": fields}})
+            if method == "frappe.client.insert":
+                doc = body.get("doc") or {}
+                return web.json_response({"message": self.insert(doc.get("doctype", doctype), doc)})
+            if method == "frappe.client.rename_doc":
+                docs = self.table(body["doctype"])
+                doc = self.get(body["doctype"], body["old_name"])
+                if body["new_name"] in docs:
+                    raise FrappeError(409, "DuplicateEntryError", f"{body['new_name']} already exists")
+                docs[body["new_name"]] = docs.pop(body["old_name"])
+                doc["name"] = body["new_name"]
+                return web.json_response({"message": body["new_name"]})
+        except FrappeError as exc:
+            return error_response(exc.status, exc.exc_type, str(exc))
+        except (KeyError, ValueError) as exc:
+            return error_response(417, "ValidationError", str(exc))
+        return error_response(404, "DoesNotExistError", f"Method {method} not found")
+
+    async def handle_stats(self, request):
+        return web.json_response({
+            "calls": dict(self.calls),
+            "writes": self.writes,
+            "docs": {doctype: len(docs) for doctype, docs in self.docs.items()},
+        })
+
+    async def handle_reset(self, request):
+        self.reset()
+        return web.json_response({"message": "ok"})
+
+    async def handle_config(self, request):
+        try:
+            options = await request.json()
+            if not isinstance(options, dict):
+                raise ValueError("fault options must be a JSON object")
+            faults = Faults(**options)
+        except (TypeError, ValueError, SystemExit) as exc:
+            # TypeError: unknown option; SystemExit: LatencyModel rejecting a spec
+            return error_response(400, "ValidationError", str(exc) or "invalid fault options")
+        self.faults = faults
+        return web.json_response({"message": "ok"})
+
+
+async def read_doc(request):
+    """Frappe accepts the doc as the JSON body or as a JSON string in a `data` field.
+
+    Other form fields (frappe.client's `doc`, `doctype`, ...) come back as strings.
+    """
+    if request.content_type == "application/x-www-form-urlencoded":
+        form = await request.post()
+        data = json.loads(form["data"]) if "data" in form else dict(form)
+        if not isinstance(data, dict):
+            raise ValueError("the document must be a JSON object")
+        return data
+    text = await request.text()
+    if not text:
+        return {}
+    data = json.loads(text)
+    if isinstance(data, dict) and isinstance(data.get("data"), str):
+        data = json.loads(data["data"])
+    if not isinstance(data, dict):
+        raise ValueError("the document must be a JSON object")
+    return data
+
+
+def error_response(status, exc_type, message, headers=None):
+    return web.json_response(
+        {"exc_type": exc_type, "exception": f"frappe.exceptions.{exc_type}: {message}", "_server_messages": json.dumps([message])},
+        status=status,
+        headers=headers,
+    )
+
+
+def faults_from_args(args):
+    return Faults(
+        latency=args.latency,
+        write_latency=args.write_latency,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        fail_writes_after=args.fail_writes_after,
+        doctypes=args.fault_doctypes.split(",") if args.fault_doctypes else None,
+        seed=args.seed,
+    )
+
+
+def add_fault_arguments(parser):
+    """Stand-in options shared with the harnesses that start it in-process."""
+    parser.add_argument("--latency", default="none")
+    parser.add_argument("--write-latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second, 0 for unlimited")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-seconds", type=float, default=30.0)
+    parser.add_argument("--fail-writes-after", type=int)
+    parser.add_argument("--fault-doctypes", help="comma separated DocTypes the faults apply to")
+
+
+async def serve(args):
+    standin = ERPNextStandIn(args.host, args.port, faults_from_args(args), args.api_key, args.api_secret)
+    counts = standin.seed(args.customers, args.employees, args.items, args.invoices_per_customer, args.seed)
+    async with standin:
+        print(f"ERPNext stand-in on {standin.base_url} with {counts}")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--api-key")
+    parser.add_argument("--api-secret")
+    parser.add_argument("--customers", type=int, default=0)
+    parser.add_argument("--employees", type=int, default=0)
+    parser.add_argument("--items", type=int, default=0)
+    parser.add_argument("--invoices-per-customer", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    add_fault_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
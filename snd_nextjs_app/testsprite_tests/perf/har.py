@@ -0,0 +1,320 @@
+"""Record and replay the /api/* traffic of TC scripts as HAR files.
+
+record  runs each TC script against the live app and captures every /api/*
+        exchange into tmp/perf/har/<TC id>.har (one file per test)
+replay  runs the same scripts with those exchanges served by
+        context.route_from_har, so the frontend can be exercised without
+        Postgres, Redis or MinIO behind it. Every replayed request is held back
+        by a latency model first, which makes page timings comparable across
+        machines and backend states:
+
+            none                 answer immediately
+            fixed:MS             constant delay
+            normal:MEAN,SD       gaussian, clipped at 0
+            lognormal:MEDIAN,S   long-tailed, sigma S on the log scale
+            recorded[:SCALE]     the time the request took when it was recorded
+
+        The child's wall time is mostly constants (interpreter and browser
+        start, the scripts' fixed waits), so replay also measures inside the
+        browser: load_ms, each document's navigation-to-load time summed over
+        the run, and api_busy_ms, the time at least one /api/* request was in
+        flight. Unless the model is none, every script is also replayed
+        without latency and added_ms is the difference in medians, i.e. what
+        the latency model cost the frontend.
+
+The TC scripts are not modified: they run in a child process in which
+Browser.new_context is wrapped to add HAR recording or replay. Only the /api/*
+calls are replayed; pages and assets still come from the Next.js server, which
+needs no database to serve them. Requests missing from the HAR go to the live
+server (--not-found fallback) or fail (--not-found abort, fully offline).
+
+Usage:
+    python -m perf.har record --tests TC004,TC008,TC011
+    python -m perf.har replay --tests TC004,TC008,TC011 --latency lognormal:80,0.6 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import runpy
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from perf.common import RESULTS_DIR, TESTS_DIR, find_tc_scripts, summarize, write_report
+from perf.history import record_run
+
+HAR_DIR = RESULTS_DIR / "har"
+API_PATTERN = re.compile(r"/api/")
+
+
+def har_path(script):
+    return HAR_DIR / f"{script.stem.split('_')[0]}.har"
+
+
+class LatencyModel:
+    """Per-request delay in milliseconds, parsed from a spec such as 'normal:80,20'."""
+
+    def __init__(self, spec, har=None, seed=0):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self.random = random.Random(seed)
+        self.recorded = {}
+        if kind == "recorded":
+            self.recorded = recorded_times(har)
+            self.default = statistics.median(self.recorded.values()) if self.recorded else 0.0
+        elif kind not in ("none", "fixed", "normal", "lognormal"):
+            raise SystemExit(f"Unknown latency model {spec!r}")
+
+    def sample(self, method, url):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "normal":
+            return max(0.0, self.random.gauss(self.params[0], self.params[1]))
+        if self.kind == "lognormal":
+            return self.params[0] * self.random.lognormvariate(0.0, self.params[1])
+        if self.kind == "recorded":
+            scale = self.params[0] if self.params else 1.0
+            return self.recorded.get((method, url), self.default) * scale
+        return 0.0
+
+
+def recorded_times(path):
+    har = json.loads(Path(path).read_text(encoding="utf-8"))
+    times = {}
+    for entry in har["log"]["entries"]:
+        request = entry["request"]
+        times[(request["method"], request["url"])] = entry["time"]
+    return times
+
+
+class PageTimings:
+    """Navigation load times and /api/* request intervals seen by the pages of a context."""
+
+    def __init__(self):
+        self.loads = []
+        self.api = []
+        self.started = {}
+
+    def watch(self, page):
+        page.on("load", lambda: asyncio.ensure_future(self.on_load(page)))
+        page.on("request", self.on_request)
+        page.on("requestfinished", self.on_done)
+        page.on("requestfailed", self.on_done)
+
+    async def on_load(self, page):
+        from playwright import async_api
+
+        try:
+            load = await page.evaluate(
+                "() => { const n = performance.getEntriesByType('navigation')[0]; return n ? n.loadEventStart : null; }"
+            )
+        except async_api.Error:
+            # The page moved on or closed before it could be read
+            return
+        if load:
+            self.loads.append(load)
+
+    def on_request(self, request):
+        if API_PATTERN.search(request.url):
+            self.started[request] = time.perf_counter()
+
+    def on_done(self, request):
+        started = self.started.pop(request, None)
+        if started is not None:
+            self.api.append((started, time.perf_counter()))
+
+    def summary(self):
+        busy = 0.0
+        end = None
+        for start, stop in sorted(self.api):
+            if end is None or start > end:
+                busy += stop - start
+                end = stop
+            elif stop > end:
+                busy += stop - end
+                end = stop
+        return {"navigations": len(self.loads), "load_ms": sum(self.loads), "api_requests": len(self.api),
+                "api_busy_ms": busy * 1000}
+
+
+def install(mode, har, latency, not_found, seed, timings=None):
+    """Wrap Browser.new_context so every context the script opens records or replays."""
+    from playwright import async_api
+
+    original = async_api.Browser.new_context
+    model = LatencyModel(latency, har, seed) if mode == "replay" else None
+
+    async def delay(route):
+        request = route.request
+        await asyncio.sleep(model.sample(request.method, request.url) / 1000)
+        await route.fallback()
+
+    async def new_context(self, *args, **kwargs):
+        if mode == "record":
+            kwargs.setdefault("record_har_path", str(har))
+            kwargs.setdefault("record_har_url_filter", API_PATTERN)
+            kwargs.setdefault("record_har_content", "embed")
+        context = await original(self, *args, **kwargs)
+        if mode == "replay":
+            await context.route_from_har(str(har), url=API_PATTERN, not_found=not_found)
+            # Registered last so it runs first, then falls through to the HAR
+            if model.kind != "none":
+                await context.route(API_PATTERN, delay)
+        if timings is not None:
+            context.on("page", timings.watch)
+        return context
+
+    async_api.Browser.new_context = new_context
+
+
+async def run_child(script, mode, har, latency="none", not_found="fallback", seed=0, timings=None):
+    started = time.perf_counter()
+    extra = ["--timings", str(timings)] if timings else []
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "perf.har", "exec",
+        "--mode", mode, "--har", str(har), "--latency", latency,
+        "--not-found", not_found, "--seed", str(seed), *extra, str(script),
+        cwd=str(TESTS_DIR),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await proc.communicate()
+    return proc.returncode, (time.perf_counter() - started) * 1000, output.decode("utf-8", "replace")
+
+
+def har_stats(path):
+    har = json.loads(path.read_text(encoding="utf-8"))
+    entries = har["log"]["entries"]
+    return {
+        "entries": len(entries),
+        "routes": len({(e["request"]["method"], e["request"]["url"].split("?")[0]) for e in entries}),
+        "bytes": path.stat().st_size,
+    }
+
+
+async def record(args):
+    HAR_DIR.mkdir(parents=True, exist_ok=True)
+    results = {}
+    for script in find_tc_scripts(args.tests.split(",")):
+        path = har_path(script)
+        code, elapsed, _ = await run_child(script, "record", path)
+        results[script.stem] = {"passed": code == 0, "seconds": elapsed / 1000, "har": str(path)}
+        if path.exists():
+            results[script.stem].update(har_stats(path))
+        print(f"{script.stem}: {'passed' if code == 0 else 'failed'}, {results[script.stem].get('entries', 0)} exchanges")
+    report = write_report("har-record", results)
+    print(f"Report written to {report}")
+
+
+METRICS = ("duration_ms", "load_ms", "api_busy_ms")
+
+
+async def replay_runs(script, path, latency, args):
+    """--repeat replays of one script under one latency model; returns (samples per metric, failures)."""
+    runs = {metric: [] for metric in METRICS}
+    failures = 0
+    timings = HAR_DIR / f"{script.stem}.timings.json"
+    for run in range(args.repeat):
+        timings.unlink(missing_ok=True)
+        code, elapsed, output = await run_child(
+            script, "replay", path, latency, args.not_found, args.seed + run, timings
+        )
+        runs["duration_ms"].append(elapsed)
+        if timings.exists():
+            measured = json.loads(timings.read_text(encoding="utf-8"))
+            runs["load_ms"].append(measured["load_ms"])
+            runs["api_busy_ms"].append(measured["api_busy_ms"])
+        failures += code != 0
+        if code and args.verbose:
+            print(output)
+    timings.unlink(missing_ok=True)
+    return runs, failures
+
+
+async def replay(args):
+    results = {}
+    samples = {}
+    for script in find_tc_scripts(args.tests.split(",")):
+        path = har_path(script)
+        if not path.exists():
+            print(f"{script.stem}: no HAR recorded, skipping")
+            continue
+        runs, failures = await replay_runs(script, path, args.latency, args)
+        key = script.stem.split("_")[0]
+        samples[f"{key} {args.latency}"] = runs["duration_ms"]
+        samples[f"{key} {args.latency} load"] = runs["load_ms"]
+        samples[f"{key} {args.latency} api-busy"] = runs["api_busy_ms"]
+        result = {"failures": failures, **{metric: summarize(values) for metric, values in runs.items()}}
+        if args.latency != "none":
+            baseline, _ = await replay_runs(script, path, "none", args)
+            result["baseline"] = {metric: summarize(values) for metric, values in baseline.items()}
+            result["added_ms"] = {
+                metric: result[metric]["p50"] - result["baseline"][metric]["p50"]
+                for metric in METRICS
+                if result[metric]["count"] and result["baseline"][metric]["count"]
+            }
+        results[script.stem] = result
+        added = result.get("added_ms", {})
+        print(
+            f"{script.stem}: load {result['load_ms'].get('p50', 0):.0f} ms, api busy "
+            f"{result['api_busy_ms'].get('p50', 0):.0f} ms (p50)"
+            + (f", +{added['load_ms']:.0f}/+{added['api_busy_ms']:.0f} ms over no latency"
+               if "load_ms" in added and "api_busy_ms" in added else "")
+            + f", {failures}/{args.repeat} failed"
+        )
+
+    history_run = record_run("har-replay", samples, {"latency": args.latency, "not_found": args.not_found})
+    report = write_report("har-replay", {"history_run": history_run, "latency": args.latency, "tests": results})
+    print(f"Report written to {report}")
+
+
+def exec_script(args):
+    timings = PageTimings() if args.timings else None
+    install(args.mode, args.har, args.latency, args.not_found, args.seed, timings)
+    sys.argv = [args.script]
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        if timings is not None:
+            Path(args.timings).write_text(json.dumps(timings.summary()), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    recording = sub.add_parser("record")
+    recording.add_argument("--tests", required=True, help="comma separated TC ids")
+
+    replaying = sub.add_parser("replay")
+    replaying.add_argument("--tests", required=True, help="comma separated TC ids")
+    replaying.add_argument("--latency", default="none", help="latency model, e.g. fixed:50 or lognormal:80,0.6")
+    replaying.add_argument("--not-found", choices=["fallback", "abort"], default="fallback")
+    replaying.add_argument("--repeat", type=int, default=3)
+    replaying.add_argument("--seed", type=int, default=0)
+    replaying.add_argument("--verbose", action="store_true", help="print the output of failed runs")
+
+    # Internal: runs inside the child process
+    executing = sub.add_parser("exec")
+    executing.add_argument("--mode", choices=["record", "replay"], required=True)
+    executing.add_argument("--har", required=True)
+    executing.add_argument("--latency", default="none")
+    executing.add_argument("--not-found", default="fallback")
+    executing.add_argument("--seed", type=int, default=0)
+    executing.add_argument("--timings", help="write in-page timings here as JSON")
+    executing.add_argument("script")
+
+    args = parser.parse_args()
+    if args.command == "exec":
+        exec_script(args)
+    else:
+        asyncio.run(record(args) if args.command == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
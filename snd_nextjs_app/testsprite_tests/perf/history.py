@@ -0,0 +1,252 @@
+"""Perf-history store and statistical regression check across runs.
+
+Every measurement harness saves its raw latency samples here (one SQLite file,
+tmp/perf/history.sqlite) keyed by suite and by page or endpoint. A new run is
+compared against a baseline pooled from the previous runs of the same suite:
+
+- Mann-Whitney U (two-sided, tie-corrected normal approximation) decides
+  whether the two distributions differ at all
+- bootstrap confidence intervals on the p50 and p95 deltas show by how much
+
+A key is marked as regressed only when the difference is significant AND the
+median got slower by at least --min-effect (relative) and --min-ms (absolute).
+
+Usage:
+    python -m perf.history list --suite soak
+    python -m perf.history compare --suite soak --baseline-runs 5
+"""
+import argparse
+import json
+import math
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+
+from perf.common import RESULTS_DIR, TESTS_DIR, percentile
+
+HISTORY_PATH = RESULTS_DIR / "history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suite TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    git_sha TEXT,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    key TEXT NOT NULL,
+    value_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run_key ON samples (run_id, key);
+"""
+
+
+def connect(path=HISTORY_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path))
+    db.executescript(SCHEMA)
+    return db
+
+
+def current_git_sha():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=str(TESTS_DIR),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_run(suite, samples_by_key, meta=None, path=HISTORY_PATH):
+    """Store one run's latency samples ({key: [ms, ...]}) and return its run id."""
+    db = connect(path)
+    with db:
+        cursor = db.execute(
+            "INSERT INTO runs (suite, created_at, git_sha, meta) VALUES (?, ?, ?, ?)",
+            (suite, time.time(), current_git_sha(), json.dumps(meta or {}, default=str)),
+        )
+        run_id = cursor.lastrowid
+        db.executemany(
+            "INSERT INTO samples (run_id, key, value_ms) VALUES (?, ?, ?)",
+            ((run_id, key, float(v)) for key, values in samples_by_key.items() for v in values),
+        )
+    db.close()
+    return run_id
+
+
+def load_samples(db, run_ids):
+    """Pool the samples of the given runs into {key: [ms, ...]}."""
+    pooled = {}
+    if not run_ids:
+        return pooled
+    marks = ",".join("?" * len(run_ids))
+    for key, value in db.execute(
+        f"SELECT key, value_ms FROM samples WHERE run_id IN ({marks})", list(run_ids)
+    ):
+        pooled.setdefault(key, []).append(value)
+    return pooled
+
+
+def mann_whitney_u(baseline, candidate):
+    """Two-sided Mann-Whitney U test; returns (U of the candidate, p-value)."""
+    n1, n2 = len(baseline), len(candidate)
+    if n1 == 0 or n2 == 0:
+        return None, 1.0
+    combined = sorted(
+        [(v, 0) for v in baseline] + [(v, 1) for v in candidate], key=lambda item: item[0]
+    )
+
+    # Average ranks over ties and collect tie group sizes for the variance correction
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = rank
+        size = j - i + 1
+        tie_term += size**3 - size
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return u, 1.0
+    # Continuity correction towards the mean
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def bootstrap_delta(baseline, candidate, q, iterations=1000, confidence=0.95, seed=0):
+    """Percentile bootstrap CI for percentile(candidate, q) - percentile(baseline, q)."""
+    rng = random.Random(seed)
+    deltas = []
+    for _ in range(iterations):
+        b = [baseline[rng.randrange(len(baseline))] for _ in baseline]
+        c = [candidate[rng.randrange(len(candidate))] for _ in candidate]
+        deltas.append(percentile(c, q) - percentile(b, q))
+    tail = (1 - confidence) / 2 * 100
+    return {
+        "delta": percentile(candidate, q) - percentile(baseline, q),
+        "low": percentile(deltas, tail),
+        "high": percentile(deltas, 100 - tail),
+    }
+
+
+def compare(baseline, candidate, alpha=0.01, min_effect=0.10, min_ms=5.0, iterations=1000):
+    """Compare two sample sets for one key and decide whether it regressed."""
+    u, p_value = mann_whitney_u(baseline, candidate)
+    base_p50 = percentile(baseline, 50)
+    cand_p50 = percentile(candidate, 50)
+    relative = (cand_p50 - base_p50) / base_p50 if base_p50 else 0.0
+    significant = p_value < alpha
+    regressed = significant and relative >= min_effect and cand_p50 - base_p50 >= min_ms
+    return {
+        "baseline_n": len(baseline),
+        "candidate_n": len(candidate),
+        "baseline_p50": base_p50,
+        "candidate_p50": cand_p50,
+        "baseline_p95": percentile(baseline, 95),
+        "candidate_p95": percentile(candidate, 95),
+        "u": u,
+        "p_value": p_value,
+        "p50_change": relative,
+        "p50_delta_ci": bootstrap_delta(baseline, candidate, 50, iterations),
+        "p95_delta_ci": bootstrap_delta(baseline, candidate, 95, iterations),
+        "significant": significant,
+        "regressed": regressed,
+        "improved": significant and relative <= -min_effect and base_p50 - cand_p50 >= min_ms,
+    }
+
+
+def compare_run(suite, run_id=None, baseline_runs=5, path=HISTORY_PATH, **options):
+    """Compare a run (default: the latest) of a suite with its previous runs pooled."""
+    db = connect(path)
+    ids = [row[0] for row in db.execute("SELECT id FROM runs WHERE suite = ? ORDER BY id DESC", (suite,))]
+    if run_id is None and ids:
+        run_id = ids[0]
+    baseline_ids = [i for i in ids if i < (run_id or 0)][:baseline_runs]
+    candidate = load_samples(db, [run_id] if run_id else [])
+    baseline = load_samples(db, baseline_ids)
+    db.close()
+
+    results = {}
+    for key in sorted(candidate):
+        if len(baseline.get(key, [])) < 2 or len(candidate[key]) < 2:
+            results[key] = {"skipped": "not enough samples in baseline or candidate"}
+            continue
+        results[key] = compare(baseline[key], candidate[key], **options)
+    return {"suite": suite, "run_id": run_id, "baseline_run_ids": baseline_ids, "keys": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    listing = sub.add_parser("list", help="show recorded runs")
+    listing.add_argument("--suite")
+
+    comparing = sub.add_parser("compare", help="compare a run against its baseline")
+    comparing.add_argument("--suite", required=True)
+    comparing.add_argument("--run-id", type=int)
+    comparing.add_argument("--baseline-runs", type=int, default=5)
+    comparing.add_argument("--alpha", type=float, default=0.01)
+    comparing.add_argument("--min-effect", type=float, default=0.10, help="relative p50 slowdown")
+    comparing.add_argument("--min-ms", type=float, default=5.0, help="absolute p50 slowdown")
+    comparing.add_argument("--bootstrap", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        db = connect()
+        query = "SELECT r.id, r.suite, r.created_at, r.git_sha, COUNT(s.run_id) FROM runs r LEFT JOIN samples s ON s.run_id = r.id"
+        params = ()
+        if args.suite:
+            query += " WHERE r.suite = ?"
+            params = (args.suite,)
+        for run_id, suite, created, sha, count in db.execute(query + " GROUP BY r.id ORDER BY r.id", params):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+            print(f"{run_id:>5}  {suite:<20} {stamp}  {sha or '-':<10} {count} samples")
+        db.close()
+        return
+
+    report = compare_run(
+        args.suite,
+        run_id=args.run_id,
+        baseline_runs=args.baseline_runs,
+        alpha=args.alpha,
+        min_effect=args.min_effect,
+        min_ms=args.min_ms,
+        iterations=args.bootstrap,
+    )
+    regressed = [key for key, result in report["keys"].items() if result.get("regressed")]
+    for key, result in report["keys"].items():
+        if "skipped" in result:
+            print(f"{key}: skipped ({result['skipped']})")
+            continue
+        flag = "REGRESSED" if result["regressed"] else ("improved" if result["improved"] else "ok")
+        ci = result["p50_delta_ci"]
+        print(
+            f"{key}: {flag} p50 {result['baseline_p50']:.1f} -> {result['candidate_p50']:.1f} ms "
+            f"({result['p50_change']:+.1%}, CI {ci['low']:+.1f}..{ci['high']:+.1f} ms) p={result['p_value']:.2g}"
+        )
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    (RESULTS_DIR / f"regression-{args.suite}.json").write_text(json.dumps(report, indent=2))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Client-side JS heap growth probe across sidebar navigations.
+
+Keeps one tab open like an all-day user and repeats a navigation cycle
+through the sidebar entries the TC scripts click (li[3], li[5], li[6], li[8]
+by default). After every cycle it forces GC through CDP HeapProfiler and
+records JSHeapUsedSize, DOM node, listener and document counts plus the
+number of detached DOM nodes. A linear fit over the cycles gives retained
+growth per cycle; a heap that keeps climbing after GC points at React Query
+caches or SSE listeners that are never released.
+
+With --snapshots a heap snapshot is written for the first and the last
+cycle (tmp/perf/profiles/leak-first.heapsnapshot / leak-last.heapsnapshot)
+so the two can be diffed in DevTools' Comparison view.
+
+Usage:
+    python -m perf.leak_probe --cycles 30 --snapshots
+"""
+import argparse
+import asyncio
+import json
+
+from playwright import async_api
+
+from perf.browser import SIDEBAR_LINK, BrowserSession, settle
+from perf.common import RESULTS_DIR, linear_fit, write_report
+
+PROFILES_DIR = RESULTS_DIR / "profiles"
+
+
+async def force_gc(cdp):
+    # Two passes so objects released by finalizers in the first one go too
+    await cdp.send("HeapProfiler.collectGarbage")
+    await cdp.send("HeapProfiler.collectGarbage")
+
+
+async def page_metrics(cdp):
+    metrics = (await cdp.send("Performance.getMetrics"))["metrics"]
+    return {m["name"]: m["value"] for m in metrics}
+
+
+async def detached_node_count(cdp):
+    """Detached DOM nodes via DOM.getDetachedDomNodes, None if Chromium lacks it."""
+    try:
+        result = await cdp.send("DOM.getDetachedDomNodes")
+    except async_api.Error:
+        return None
+    return len(result.get("detachedNodes", []))
+
+
+async def take_snapshot(cdp, path):
+    """Write a heap snapshot to disk and return how many detached DOM nodes it holds."""
+    chunks = []
+
+    def on_chunk(params):
+        chunks.append(params["chunk"])
+
+    cdp.on("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+    await cdp.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+    cdp.remove_listener("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+    data = "".join(chunks)
+    path.write_text(data)
+
+    snapshot = json.loads(data)
+    meta = snapshot["snapshot"]["meta"]
+    fields = meta["node_fields"]
+    stride = len(fields)
+    name_index = fields.index("name")
+    strings = snapshot["strings"]
+    nodes = snapshot["nodes"]
+    return sum(
+        1
+        for offset in range(0, len(nodes), stride)
+        if strings[nodes[offset + name_index]].startswith("Detached ")
+    )
+
+
+async def run_probe(args):
+    items = [int(item) for item in args.items.split(",")]
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    cycles = []
+    snapshots = {}
+
+    async with BrowserSession(headless=not args.headed) as session:
+        page = session.page
+        cdp = await session.context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+        await cdp.send("HeapProfiler.enable")
+
+        for cycle in range(args.cycles):
+            for item in items:
+                await page.locator(SIDEBAR_LINK.format(item)).nth(0).click()
+                await settle(page, timeout_ms=args.settle * 1000)
+
+            await force_gc(cdp)
+            metrics = await page_metrics(cdp)
+            sample = {
+                "cycle": cycle,
+                "url": page.url,
+                "heap_used_mb": metrics.get("JSHeapUsedSize", 0) / 1048576,
+                "heap_total_mb": metrics.get("JSHeapTotalSize", 0) / 1048576,
+                "dom_nodes": metrics.get("Nodes"),
+                "listeners": metrics.get("JSEventListeners"),
+                "documents": metrics.get("Documents"),
+                "detached_nodes": await detached_node_count(cdp),
+            }
+            if args.snapshots and cycle in (0, args.cycles - 1):
+                label = "first" if cycle == 0 else "last"
+                snapshots[label] = await take_snapshot(cdp, PROFILES_DIR / f"leak-{label}.heapsnapshot")
+                if sample["detached_nodes"] is None:
+                    sample["detached_nodes"] = snapshots[label]
+            cycles.append(sample)
+            print(json.dumps(sample))
+        await cdp.detach()
+
+    growth = {}
+    # The first cycle warms caches and code, so the trend starts from the second one
+    steady = cycles[1:] if len(cycles) > 2 else cycles
+    for key in ("heap_used_mb", "dom_nodes", "listeners", "detached_nodes"):
+        points = [(c["cycle"], c[key]) for c in steady if c[key] is not None]
+        if len(points) < 2:
+            continue
+        slope, _, r2 = linear_fit([p[0] for p in points], [p[1] for p in points])
+        growth[key] = {"per_cycle": slope, "r2": r2, "first": points[0][1], "last": points[-1][1]}
+
+    heap = growth.get("heap_used_mb", {})
+    report = {
+        "items": items,
+        "cycles": cycles,
+        "growth": growth,
+        "detached_in_snapshots": snapshots,
+        "leak_suspected": heap.get("per_cycle", 0) * 1024 > args.threshold_kb and heap.get("r2", 0) >= 0.5,
+    }
+    path = write_report("leak-probe", report)
+    print(json.dumps(growth, indent=2))
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--items", default="3,5,6,8", help="sidebar li indexes to visit per cycle")
+    parser.add_argument("--settle", type=float, default=10.0, help="max seconds to wait per page")
+    parser.add_argument("--threshold-kb", type=float, default=256.0, help="retained growth per cycle flagged as a leak")
+    parser.add_argument("--snapshots", action="store_true", help="heap snapshots at the first and last cycle")
+    parser.add_argument("--headed", action="store_true")
+    asyncio.run(run_probe(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
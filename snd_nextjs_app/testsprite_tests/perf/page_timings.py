@@ -0,0 +1,82 @@
+"""Repeated TC019 page-load and API timing capture, saved to the perf history.
+
+TC019 asserts that key pages load within 3 s and APIs answer within 500 ms,
+but a single run says little. This visits each TC page --repeat times in a
+logged-in browser, reads the Navigation Timing entry for every load and the
+Resource Timing of every /api/* request made on the way, and stores the
+samples as two history suites ("tc019-pages" and "api-captures") so that
+`python -m perf.history compare` can gate on them.
+
+Usage:
+    python -m perf.page_timings --repeat 10
+    python -m perf.history compare --suite tc019-pages
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import urlparse
+
+from perf.browser import TC_PAGES, BrowserSession, settle
+from perf.common import summarize, write_report
+from perf.history import record_run
+
+PAGE_BUDGET_MS = 3000
+API_BUDGET_MS = 500
+
+
+async def capture(args):
+    pages = {}
+    apis = {}
+    async with BrowserSession(headless=not args.headed) as session:
+        page = session.page
+
+        def on_request_finished(request):
+            path = urlparse(request.url).path
+            if not path.startswith("/api/") or request.resource_type not in ("fetch", "xhr"):
+                return
+            timing = request.timing
+            if timing.get("responseEnd", -1) >= 0:
+                apis.setdefault(path, []).append(timing["responseEnd"])
+
+        page.on("requestfinished", on_request_finished)
+
+        names = args.pages.split(",") if args.pages else list(TC_PAGES)
+        for _ in range(args.repeat):
+            for name in names:
+                await page.goto(session.url(TC_PAGES[name]), wait_until="load")
+                # Let client-side data fetching settle so its API calls are captured
+                await settle(page, timeout_ms=10000)
+                entry = await page.evaluate(
+                    "() => { const n = performance.getEntriesByType('navigation')[0];"
+                    " return n ? n.toJSON() : null; }"
+                )
+                if entry:
+                    pages.setdefault(name, []).append(entry["loadEventEnd"] - entry["startTime"])
+
+    page_run = record_run("tc019-pages", pages, {"repeat": args.repeat})
+    api_run = record_run("api-captures", apis, {"repeat": args.repeat})
+
+    report = {
+        "history_runs": {"tc019-pages": page_run, "api-captures": api_run},
+        "pages": {name: summarize(values) for name, values in pages.items()},
+        "apis": {path: summarize(values) for path, values in apis.items()},
+    }
+    report["over_budget"] = {
+        "pages": [n for n, s in report["pages"].items() if s.get("p95", 0) > PAGE_BUDGET_MS],
+        "apis": [p for p, s in report["apis"].items() if s.get("p95", 0) > API_BUDGET_MS],
+    }
+    path = write_report("page-timings", report)
+    print(json.dumps(report["over_budget"], indent=2))
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", help=f"comma separated subset of {','.join(TC_PAGES)}")
+    parser.add_argument("--headed", action="store_true")
+    asyncio.run(capture(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
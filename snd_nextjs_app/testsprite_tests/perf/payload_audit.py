@@ -0,0 +1,207 @@
+"""Network payload accounting per page and per /api route.
+
+Visits the TC pages in a logged-in browser and, for every response, compares
+bytes on the wire (request.sizes()) with decoded body bytes. It reports:
+
+- per page: transferred vs decoded bytes by type (js, css, json, image, font, ...)
+- per /api route (ids folded to [id]): bytes, compression ratio and encoding
+- responses over the size budget and responses sent without Content-Encoding
+- for JSON list responses, how many records came back versus how many table
+  rows the page actually renders, to find endpoints such as /api/employees or
+  /api/equipment that ship the whole table for a page of ten rows
+
+Usage:
+    python -m perf.payload_audit --api-budget-kb 256
+"""
+import argparse
+import asyncio
+import json
+import re
+from urllib.parse import urlparse
+
+from playwright import async_api
+
+from perf.browser import TC_PAGES, BrowserSession, settle
+from perf.common import write_report
+
+ID_SEGMENT = re.compile(r"/(\d+|[0-9a-f]{8}-[0-9a-f-]{27,})(?=/|$)")
+
+# Below this size compression is not worth flagging
+MIN_COMPRESSIBLE_BYTES = 1024
+
+# Bodies still unread this long after the page settled are given up on
+BODY_TIMEOUT_SECONDS = 10
+
+
+def classify(url, resource_type, content_type):
+    if resource_type in ("fetch", "xhr") or "json" in content_type:
+        return "json"
+    if resource_type == "script" or url.endswith(".js"):
+        return "js"
+    if resource_type == "stylesheet":
+        return "css"
+    if resource_type == "image":
+        return "image"
+    if resource_type == "font":
+        return "font"
+    if resource_type == "document":
+        return "document"
+    return "other"
+
+
+def route_of(url):
+    return ID_SEGMENT.sub("/[id]", urlparse(url).path)
+
+
+def largest_list(body):
+    """Length of the biggest array in a JSON body (top level or one level down)."""
+    try:
+        data = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    candidates = [data] if isinstance(data, list) else []
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                candidates.append(value)
+            elif isinstance(value, dict):
+                candidates.extend(v for v in value.values() if isinstance(v, list))
+    return max((len(c) for c in candidates), default=None)
+
+
+async def audit_page(session, name, path, responses):
+    page = session.page
+    pending = []
+
+    async def record(response):
+        request = response.request
+        # The /api/sse EventSource every page opens never finishes its body
+        if request.resource_type == "eventsource" or "text/event-stream" in response.headers.get("content-type", ""):
+            return
+        try:
+            body = await response.body()
+            sizes = await request.sizes()
+            headers = await response.all_headers()
+        except async_api.Error:
+            # Redirects and aborted requests have no body
+            return
+        content_type = headers.get("content-type", "")
+        kind = classify(response.url, request.resource_type, content_type)
+        entry = {
+            "page": name,
+            "url": response.url,
+            "route": route_of(response.url),
+            "kind": kind,
+            "status": response.status,
+            "encoding": headers.get("content-encoding"),
+            "transferred": sizes["responseBodySize"] + sizes["responseHeadersSize"],
+            "body_transferred": sizes["responseBodySize"],
+            "decoded": len(body),
+        }
+        if kind == "json":
+            entry["records"] = largest_list(body)
+        responses.append(entry)
+
+    def on_response(response):
+        pending.append(asyncio.ensure_future(record(response)))
+
+    page.on("response", on_response)
+    await page.goto(session.url(path), wait_until="load")
+    await settle(page, timeout_ms=15000)
+    rows = await page.locator("table tbody tr").count()
+    page.remove_listener("response", on_response)
+    if pending:
+        _, unfinished = await asyncio.wait(pending, timeout=BODY_TIMEOUT_SECONDS)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+    return rows
+
+
+def summarise(responses, rows_by_page, api_budget, asset_budget):
+    pages = {}
+    for entry in responses:
+        totals = pages.setdefault(entry["page"], {"rows_rendered": rows_by_page.get(entry["page"])})
+        kind = totals.setdefault(entry["kind"], {"count": 0, "transferred": 0, "decoded": 0})
+        kind["count"] += 1
+        kind["transferred"] += entry["transferred"]
+        kind["decoded"] += entry["decoded"]
+
+    routes = {}
+    for entry in responses:
+        if not urlparse(entry["url"]).path.startswith("/api/"):
+            continue
+        route = routes.setdefault(
+            entry["route"], {"calls": 0, "transferred": 0, "decoded": 0, "max_decoded": 0,
+                             "encodings": set(), "max_records": None, "pages": set()}
+        )
+        route["calls"] += 1
+        route["transferred"] += entry["body_transferred"]
+        route["decoded"] += entry["decoded"]
+        route["max_decoded"] = max(route["max_decoded"], entry["decoded"])
+        route["encodings"].add(entry["encoding"] or "identity")
+        route["pages"].add(entry["page"])
+        if entry.get("records") is not None:
+            route["max_records"] = max(route["max_records"] or 0, entry["records"])
+    for route in routes.values():
+        route["compression_ratio"] = route["decoded"] / route["transferred"] if route["transferred"] else None
+        route["encodings"] = sorted(route["encodings"])
+        route["pages"] = sorted(route["pages"])
+
+    flags = {"over_budget": [], "uncompressed": [], "overfetch": []}
+    for entry in responses:
+        is_api = urlparse(entry["url"]).path.startswith("/api/")
+        budget = api_budget if is_api else asset_budget
+        if entry["decoded"] > budget:
+            flags["over_budget"].append({k: entry[k] for k in ("page", "url", "kind", "decoded", "transferred")})
+        if (
+            not entry["encoding"]
+            and entry["decoded"] >= MIN_COMPRESSIBLE_BYTES
+            and entry["kind"] in ("json", "js", "css", "document")
+        ):
+            flags["uncompressed"].append({k: entry[k] for k in ("page", "url", "kind", "decoded")})
+        rows = rows_by_page.get(entry["page"])
+        records = entry.get("records")
+        if is_api and records and rows and records > rows * 2:
+            flags["overfetch"].append(
+                {"page": entry["page"], "route": entry["route"], "records": records, "rows_rendered": rows}
+            )
+    return pages, routes, flags
+
+
+async def run_audit(args):
+    responses = []
+    rows_by_page = {}
+    names = args.pages.split(",") if args.pages else list(TC_PAGES)
+    async with BrowserSession(headless=not args.headed) as session:
+        for name in names:
+            rows_by_page[name] = await audit_page(session, name, TC_PAGES[name], responses)
+
+    pages, routes, flags = summarise(
+        responses, rows_by_page, args.api_budget_kb * 1024, args.asset_budget_kb * 1024
+    )
+    path = write_report(
+        "payload-audit",
+        {"pages": pages, "routes": routes, "flags": flags, "responses": responses},
+    )
+    for route, data in sorted(routes.items(), key=lambda item: -item[1]["max_decoded"])[:15]:
+        ratio = data["compression_ratio"]
+        print(
+            f"{route:<50} {data['max_decoded'] / 1024:>9.1f} KB decoded  "
+            f"x{ratio or 0:.1f}  {','.join(data['encodings'])}  records={data['max_records']}"
+        )
+    print({key: len(value) for key, value in flags.items()})
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help=f"comma separated subset of {','.join(TC_PAGES)}")
+    parser.add_argument("--api-budget-kb", type=float, default=256.0)
+    parser.add_argument("--asset-budget-kb", type=float, default=512.0)
+    parser.add_argument("--headed", action="store_true")
+    asyncio.run(run_audit(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Month-end payroll generation at growing employee counts.
+
+At every size N the database is topped up (perf.seed) to N employees, each
+with daily timesheets reaching back over the benchmarked months and one
+outstanding advance payment. Then, with the seeded payrolls for those months
+removed first:
+
+    monthly     POST /api/payroll/generate-monthly for last month, with the
+                active seeded employees as employeeIds
+    all-months  POST /api/payroll/generate-all-months over the last --months
+                months (the route always takes every active employee)
+
+Each run records wall time, the server's peak RSS growth and CPU time, and
+through pg_stat_statements (perf.pgstats) the statements the app issued, so
+the report shows milliseconds and queries per employee-month plus the
+busiest statements. A log-log fit of wall time against employee-months gives
+the scaling exponent; a run is flagged as collapsing when the exponent
+reaches --flag-exponent or a request fails.
+
+Both routes compute payroll one employee at a time and leave the advance
+deduction at 0, so the seeded advances do not change the amounts yet; they
+are there so a route that starts reading them is measured with real data.
+
+Usage:
+    python -m perf.payroll_bench --sizes 100,1000,5000 --months 3
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+
+from perf import pgstats
+from perf.common import ProcessSampler, linear_fit, load_config, open_session, parse_levels, server_pid, write_report
+from perf.history import record_run
+from perf.scale_bench import classify
+from perf.seed import SEED_PREFIX, clear_payrolls, clear_seed, connect, seed_scale
+
+
+def month_range(months, today=None):
+    """First days of the `months` full months before the current one, oldest first."""
+    first = (today or datetime.date.today()).replace(day=1)
+    days = []
+    for _ in range(months):
+        first = (first - datetime.timedelta(days=1)).replace(day=1)
+        days.append(first)
+    return days[::-1]
+
+
+async def seeded_active(conn, size):
+    rows = await conn.fetch(
+        "SELECT id, status FROM employees WHERE file_number LIKE $1 ORDER BY file_number LIMIT $2",
+        SEED_PREFIX + "E%",
+        size,
+    )
+    return [row["id"] for row in rows if row["status"] == "active"]
+
+
+async def timed_post(session, url, payload, conn, counting, pid):
+    if counting:
+        await pgstats.reset(conn)
+    async with ProcessSampler(pid) as sampler:
+        started = time.perf_counter()
+        async with session.post(url, json=payload) as resp:
+            body = await resp.read()
+            status = resp.status
+        seconds = time.perf_counter() - started
+    queries = await pgstats.snapshot(conn, top=5) if counting else None
+    try:
+        data = (json.loads(body) or {}).get("data") or {}
+    except ValueError:
+        data = {}
+    return status, data, seconds, sampler.summary(), queries
+
+
+def outcome(scenario, size, status, data, seconds, server, queries, employee_months):
+    per = employee_months or None
+    return {
+        "scenario": scenario,
+        "size": size,
+        "status": status,
+        "employee_months": employee_months,
+        "generated": data.get("total_generated", 0),
+        "errors": data.get("total_errors", 0),
+        "seconds": seconds,
+        "ms_per_employee_month": seconds * 1000 / per if per else None,
+        "queries": queries,
+        "queries_per_employee_month": queries["calls"] / per if queries and per else None,
+        "server": server,
+    }
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    months = month_range(args.months)
+    target = months[-1]
+    timesheet_days = (datetime.date.today() - months[0]).days + 1
+    conn = await connect()
+    counting = await pgstats.available(conn)
+    if not counting:
+        print("pg_stat_statements is not available; query counts will be missing")
+    session, _ = await open_session(config, limit=2)
+    results = []
+    samples = {}
+    try:
+        if args.fresh:
+            await clear_seed(conn)
+        for size in parse_levels(args.sizes):
+            started = time.perf_counter()
+            added = await seed_scale(conn, employees=size, timesheet_days=timesheet_days, advances=True, seed=args.seed)
+            seed_seconds = time.perf_counter() - started
+            employee_ids = await seeded_active(conn, size)
+
+            await clear_payrolls(conn, target.month, target.year)
+            status, data, seconds, server, queries = await timed_post(
+                session,
+                f"{base_url}/api/payroll/generate-monthly",
+                {"month": target.month, "year": target.year, "employeeIds": employee_ids},
+                conn, counting, pid,
+            )
+            processed = data.get("total_processed_employees", 0) + data.get("total_skipped_employees", 0)
+            monthly = outcome("monthly", size, status, data, seconds, server, queries, processed)
+
+            for month in months:
+                await clear_payrolls(conn, month.month, month.year)
+            status, data, seconds, server, queries = await timed_post(
+                session,
+                f"{base_url}/api/payroll/generate-all-months",
+                {"start_month": f"{months[0]:%Y-%m}", "end_month": f"{target:%Y-%m}"},
+                conn, counting, pid,
+            )
+            employee_months = data.get("total_generated", 0) + data.get("total_skipped", 0)
+            all_months = outcome("all-months", size, status, data, seconds, server, queries, employee_months)
+
+            for result in (monthly, all_months):
+                result.update(added=added, seed_seconds=seed_seconds, active_seeded=len(employee_ids))
+                results.append(result)
+                samples[f"{result['scenario']} @{size}"] = [result["seconds"] * 1000]
+                qpe = result["queries_per_employee_month"]
+                print(
+                    f"N={size:<6} {result['scenario']:<11} {result['status']} {result['employee_months']:>7} emp-months  "
+                    f"{result['seconds']:>8.1f}s  {result['ms_per_employee_month'] or 0:>7.1f} ms/emp  "
+                    f"{'-' if qpe is None else f'{qpe:.1f}':>6} q/emp  "
+                    f"rss +{result['server']['rss_growth_mb'] or 0:.1f} MB"
+                )
+    finally:
+        await session.close()
+        if args.clear_after:
+            await clear_seed(conn)
+        await conn.close()
+
+    curves = {}
+    for scenario in ("monthly", "all-months"):
+        points = [(r["employee_months"], r["seconds"]) for r in results if r["scenario"] == scenario and r["employee_months"]]
+        failed = any(r["status"] != 200 or r["errors"] for r in results if r["scenario"] == scenario)
+        if len(points) < 2:
+            curves[scenario] = {"failed": failed, "flagged": failed}
+            continue
+        exponent, log_a, r2 = linear_fit([math.log(n) for n, _ in points], [math.log(s) for _, s in points])
+        per_employee = [r["queries_per_employee_month"] for r in results if r["scenario"] == scenario]
+        curves[scenario] = {
+            "exponent": exponent,
+            "coefficient_s": math.exp(log_a),
+            "r2": r2,
+            "class": classify(exponent),
+            "queries_per_employee_month": per_employee,
+            "failed": failed,
+            "flagged": failed or exponent >= args.flag_exponent,
+        }
+
+    history_run = record_run("payroll-bench", samples, {"sizes": args.sizes, "months": args.months})
+    path = write_report(
+        "payroll-bench",
+        {"history_run": history_run, "server_pid": pid, "target_month": f"{target:%Y-%m}",
+         "pg_stat_statements": counting, "results": results, "curves": curves},
+    )
+    for scenario, curve in curves.items():
+        if "exponent" in curve:
+            flag = "  <-- collapses with size" if curve["flagged"] else ""
+            print(f"{scenario:<11} time ~ N^{curve['exponent']:.2f} ({curve['class']}, r2={curve['r2']:.2f}){flag}")
+        elif curve["failed"]:
+            print(f"{scenario:<11} failed")
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,5000", help="seeded employees per level")
+    parser.add_argument("--months", type=int, default=3, help="months for generate-all-months, ending last month")
+    parser.add_argument("--flag-exponent", type=float, default=1.3, help="scaling exponent that counts as collapsing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fresh", action="store_true", help="clear seeded rows first (needed when --months changes)")
+    parser.add_argument("--clear-after", action="store_true")
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Column-wise reference model of the payroll rules, checked against /api/payroll.
+
+TC011 checks one payslip at a time in the UI. This pulls every payroll row of
+a month from GET /api/payroll (in pages), loads the inputs for those
+employees from PostgreSQL in three set-based queries, and recomputes every
+row at once with NumPy over an employees x days matrix:
+
+    basic          employees.basic_salary
+    allowances     none, see allowances_ignored below
+    overtime       overtime hours x basic / (days in month x contract hours)
+                   x multiplier (1.5 when unset or 0)
+    deductions     absent days x basic / days in month, plus short hours
+                   (days with hours x contract hours - hours) at the hourly
+                   rate; a day without hours is absent, a Friday only when
+                   the Thursday and Saturday around it are absent too
+    advances       none, see advances_not_deducted below
+    final          basic + allowances + overtime + bonus - deductions - advances
+
+Every component is compared in halalas (SAR x 100, half-up) and anything off
+by more than --tolerance halalas is a mismatch. The report counts mismatches
+per component with the largest and total difference and lists example rows.
+
+The model follows generate-monthly as it is, including four rules that do not
+do what they mean to. The report lists the rows each one moves, apart from the
+mismatches, as known divergences:
+
+    allowances_ignored    the route adds food + housing + transport allowance
+                          to the final amount, but its employee query never
+                          selects them, so they are always 0
+    advances_not_deducted the route stores advance_deduction 0 and never
+                          subtracts the advance_payment_histories paid within
+                          the month
+    fixed_rate_overtime   the route takes `Number(multiplier) || 1.5`, so a 0
+                          multiplier becomes 1.5 and overtime_fixed_rate is
+                          never paid
+    friday_month_edge     for a Friday on the 1st or last day the route looks
+                          up the Thursday or Saturday by its day number in the
+                          same month (the last-month day number, day 1),
+                          instead of treating the day outside the month as
+                          absent
+
+--generate first runs POST /api/payroll/generate-monthly for the month. The
+list route caches responses for five minutes, so check right after a
+generation run with a fresh server or wait for the cache to expire.
+
+Usage:
+    python -m perf.payroll_check --month 2026-09 --generate --examples 10
+"""
+import argparse
+import asyncio
+import datetime
+import time
+
+import numpy as np
+
+from perf.common import load_config, open_session, write_report
+from perf.seed import connect
+
+DEFAULT_MULTIPLIER = 1.5
+DEFAULT_CONTRACT_HOURS = 8
+
+# Rules where generate-monthly differs from what it intends; see the docstring
+DIVERGENCES = ("allowances_ignored", "advances_not_deducted", "fixed_rate_overtime", "friday_month_edge")
+
+# API field -> reference component
+COMPONENTS = {
+    "base_salary": "basic",
+    "overtime_amount": "overtime",
+    "deduction_amount": "deductions",
+    "advance_deduction": "advances",
+    "final_amount": "final",
+    "total_worked_hours": "hours",
+    "overtime_hours": "overtime_hours",
+}
+
+
+def parse_month(value):
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def days_in_month(year, month):
+    first = datetime.date(year, month, 1)
+    return ((first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - first).days
+
+
+def to_halalas(values):
+    """SAR -> integer halalas, rounding half away from zero like a numeric(10,2) cast."""
+    values = np.asarray(values, dtype=float)
+    return (np.sign(values) * np.floor(np.abs(values) * 100 + 0.5 + 1e-6)).astype(np.int64)
+
+
+async def fetch_payrolls(session, base_url, year, month, page_size):
+    rows = []
+    page = 1
+    while True:
+        params = {"page": str(page), "limit": str(page_size), "month": str(month), "year": str(year)}
+        async with session.get(f"{base_url}/api/payroll", params=params) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+        rows.extend(data.get("data") or [])
+        if page >= (data.get("last_page") or 1):
+            return rows
+        page += 1
+
+
+async def load_inputs(conn, employee_ids, year, month):
+    """Employee columns plus hours/overtime matrices (employees x days), aligned to employee_ids."""
+    dim = days_in_month(year, month)
+    first = datetime.date(year, month, 1)
+    last = first + datetime.timedelta(days=dim - 1)
+    ids = np.asarray(employee_ids, dtype=np.int64)
+    unique = np.unique(ids)
+
+    employees = await conn.fetch(
+        """
+        SELECT id, basic_salary, food_allowance, housing_allowance, transport_allowance,
+               contract_hours_per_day, overtime_rate_multiplier, overtime_fixed_rate
+        FROM employees WHERE id = ANY($1::int[])
+        """,
+        unique.tolist(),
+    )
+    found = np.array([row["id"] for row in employees], dtype=np.int64)
+    column = {}
+    for name in ("basic_salary", "food_allowance", "housing_allowance", "transport_allowance",
+                 "contract_hours_per_day", "overtime_rate_multiplier", "overtime_fixed_rate"):
+        values = np.array([np.nan if row[name] is None else float(row[name]) for row in employees], dtype=float)
+        by_id = np.full(len(unique), np.nan)
+        by_id[np.searchsorted(unique, found)] = values
+        column[name] = by_id[np.searchsorted(unique, ids)]
+    known = np.isin(ids, found)
+
+    sheets = await conn.fetch(
+        """
+        SELECT employee_id, EXTRACT(DAY FROM date)::int AS day, hours_worked, overtime_hours
+        FROM timesheets
+        WHERE employee_id = ANY($1::int[]) AND date >= $2 AND date <= $3
+        """,
+        unique.tolist(), first, last,
+    )
+    hours = np.zeros((len(unique), dim))
+    overtime = np.zeros((len(unique), dim))
+    if sheets:
+        row_ids = np.searchsorted(unique, np.array([r["employee_id"] for r in sheets], dtype=np.int64))
+        days = np.array([r["day"] for r in sheets]) - 1
+        np.add.at(hours, (row_ids, days), np.array([float(r["hours_worked"] or 0) for r in sheets]))
+        np.add.at(overtime, (row_ids, days), np.array([float(r["overtime_hours"] or 0) for r in sheets]))
+
+    advances = await conn.fetch(
+        """
+        SELECT employee_id, SUM(amount) AS amount FROM advance_payment_histories
+        WHERE employee_id = ANY($1::int[]) AND payment_date >= $2 AND payment_date <= $3
+        GROUP BY employee_id
+        """,
+        unique.tolist(), first, last,
+    )
+    advance = np.zeros(len(unique))
+    if advances:
+        advance[np.searchsorted(unique, np.array([r["employee_id"] for r in advances], dtype=np.int64))] = [
+            float(r["amount"]) for r in advances
+        ]
+
+    row = np.searchsorted(unique, ids)
+    column.update(hours=hours[row], overtime=overtime[row], advances=advance[row])
+    return column, known
+
+
+def reference(inputs, bonus, year, month, intended=()):
+    """Every payroll component for all rows at once.
+
+    Follows generate-monthly; the rules named in `intended` (see DIVERGENCES)
+    are computed the way the route means them instead.
+    """
+    dim = days_in_month(year, month)
+    basic = np.nan_to_num(inputs["basic_salary"])
+    allowances = np.zeros_like(basic)
+    if "allowances_ignored" in intended:
+        allowances = sum(np.nan_to_num(inputs[name]) for name in ("food_allowance", "housing_allowance", "transport_allowance"))
+    contract = inputs["contract_hours_per_day"]
+    contract = np.where(np.isnan(contract) | (contract == 0), DEFAULT_CONTRACT_HOURS, contract)
+    multiplier = np.where(np.isnan(inputs["overtime_rate_multiplier"]), DEFAULT_MULTIPLIER, inputs["overtime_rate_multiplier"])
+    fixed = np.nan_to_num(inputs["overtime_fixed_rate"])
+
+    hours, overtime = inputs["hours"], inputs["overtime"]
+    total_hours = hours.sum(axis=1)
+    overtime_hours = overtime.sum(axis=1)
+
+    dates = np.datetime64(datetime.date(year, month, 1), "D") + np.arange(dim)
+    # 1970-01-01 was a Thursday, so Friday is weekday index 1 in this scheme
+    friday = (dates.astype(np.int64) % 7) == 1
+    present = (hours > 0) | (overtime > 0)
+    before = np.zeros_like(present)
+    before[:, 1:] = present[:, :-1]
+    after = np.zeros_like(present)
+    after[:, :-1] = present[:, 1:]
+    if "friday_month_edge" not in intended:
+        # The route keeps the month and takes the neighbour's day number
+        previous_dim = (datetime.date(year, month, 1) - datetime.timedelta(days=1)).day
+        if previous_dim <= dim:
+            before[:, 0] = present[:, previous_dim - 1]
+        after[:, -1] = present[:, 0]
+    absent = ~present & (~friday | (~before & ~after))
+    absent_days = absent.sum(axis=1)
+
+    hourly = basic / (dim * contract)
+    fixed_rate = (multiplier == 0) & (fixed > 0) & ("fixed_rate_overtime" in intended)
+    rate = np.where(multiplier == 0, DEFAULT_MULTIPLIER, multiplier)
+    overtime_amount = np.where(fixed_rate, overtime_hours * fixed, overtime_hours * (hourly * rate))
+
+    absent_deduction = (basic / dim) * absent_days
+    # (employee_id, date) is unique, so days with hours are cells with hours
+    expected_hours = (hours > 0).sum(axis=1) * contract
+    short_deduction = np.where(total_hours < expected_hours, (expected_hours - total_hours) * hourly, 0)
+    deductions = absent_deduction + short_deduction
+
+    advances = inputs["advances"] if "advances_not_deducted" in intended else np.zeros_like(basic)
+    final = basic + allowances + overtime_amount + bonus - deductions - advances
+    return {
+        "basic": basic,
+        "allowances": allowances,
+        "overtime": overtime_amount,
+        "deductions": deductions,
+        "advances": advances,
+        "final": final,
+        "hours": total_hours,
+        "overtime_hours": overtime_hours,
+        "absent_days": absent_days,
+    }
+
+
+def divergences(inputs, bonus, year, month, expected):
+    """Rows whose final amount each known divergence moves, with the total in halalas."""
+    route = to_halalas(expected["final"])
+    result = {}
+    for rule in DIVERGENCES:
+        diff = to_halalas(reference(inputs, bonus, year, month, intended=(rule,))["final"]) - route
+        moved = diff != 0
+        result[rule] = {"rows": int(moved.sum()), "total_halalas": int(diff[moved].sum())}
+    return result
+
+
+def compare(rows, expected, known, tolerance, examples):
+    ids = [row["id"] for row in rows]
+    mismatched = np.zeros(len(rows), dtype=bool)
+    summary = {}
+    diffs = {}
+    for field, component in COMPONENTS.items():
+        actual = to_halalas([row.get(field) or 0 for row in rows])
+        diff = actual - to_halalas(expected[component])
+        off = (np.abs(diff) > tolerance) & known
+        mismatched |= off
+        diffs[field] = (actual, diff)
+        summary[field] = {
+            "mismatches": int(off.sum()),
+            "max_abs_halalas": int(np.abs(diff[off]).max()) if off.any() else 0,
+            "total_halalas": int(diff[off].sum()),
+        }
+
+    samples = []
+    for i in np.flatnonzero(mismatched)[:examples]:
+        samples.append({
+            "payroll_id": ids[i],
+            "employee_id": rows[i]["employee_id"],
+            "absent_days": int(expected["absent_days"][i]),
+            "fields": {
+                field: {"api": int(actual[i]), "reference": int(actual[i] - diff[i]), "diff": int(diff[i])}
+                for field, (actual, diff) in diffs.items()
+                if abs(diff[i]) > tolerance
+            },
+        })
+    return {
+        "rows": len(rows),
+        "matched": int((~mismatched & known).sum()),
+        "mismatched": int(mismatched.sum()),
+        "unknown_employee": int((~known).sum()),
+        "components": summary,
+        "examples": samples,
+    }
+
+
+async def run_check(args):
+    config = load_config()
+    base_url = config["base_url"]
+    year, month = parse_month(args.month)
+    session, _ = await open_session(config, limit=4)
+    conn = await connect()
+    try:
+        if args.generate:
+            async with session.post(
+                f"{base_url}/api/payroll/generate-monthly", json={"month": month, "year": year}
+            ) as resp:
+                generated = (await resp.json()).get("data") or {}
+            print(f"Generated {generated.get('total_generated', 0)} payrolls for {args.month}")
+        started = time.perf_counter()
+        rows = await fetch_payrolls(session, base_url, year, month, args.page_size)
+        fetched = time.perf_counter()
+        if not rows:
+            print(f"No payroll rows for {args.month}")
+            return 0
+        inputs, known = await load_inputs(conn, [row["employee_id"] for row in rows], year, month)
+        loaded = time.perf_counter()
+        bonus = np.array([float(row.get("bonus_amount") or 0) for row in rows])
+        expected = reference(inputs, bonus, year, month)
+        result = compare(rows, expected, known, args.tolerance, args.examples)
+        result["known_divergences"] = divergences(inputs, bonus, year, month, expected)
+        checked = time.perf_counter()
+    finally:
+        await session.close()
+        await conn.close()
+
+    result.update(
+        month=args.month,
+        tolerance_halalas=args.tolerance,
+        fetch_seconds=fetched - started,
+        load_seconds=loaded - fetched,
+        check_seconds=checked - loaded,
+        rows_per_second=len(rows) / (checked - loaded) if checked > loaded else None,
+    )
+    print(
+        f"{args.month}: {result['rows']} payrolls  matched {result['matched']}  mismatched {result['mismatched']}  "
+        f"unknown employee {result['unknown_employee']}  checked in {result['check_seconds'] * 1000:.1f} ms"
+    )
+    for field, stats in result["components"].items():
+        if stats["mismatches"]:
+            print(
+                f"  {field:<19} {stats['mismatches']:>6} rows  max {stats['max_abs_halalas'] / 100:>10.2f} SAR  "
+                f"total {stats['total_halalas'] / 100:>12.2f} SAR"
+            )
+    for rule, stats in result["known_divergences"].items():
+        if stats["rows"]:
+            print(
+                f"  known divergence {rule:<20} {stats['rows']:>6} rows  "
+                f"{stats['total_halalas'] / 100:>12.2f} SAR if the rule worked as meant"
+            )
+    path = write_report("payroll-check", result)
+    print(f"Report written to {path}")
+    return 1 if result["mismatched"] and args.fail_on_mismatch else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    previous = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
+    parser.add_argument("--month", default=f"{previous:%Y-%m}", help="YYYY-MM, defaults to last month")
+    parser.add_argument("--generate", action="store_true", help="run generate-monthly for the month first")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--tolerance", type=int, default=0, help="allowed difference in halalas")
+    parser.add_argument("--examples", type=int, default=5)
+    parser.add_argument("--fail-on-mismatch", action="store_true", help="exit 1 when any row differs")
+    raise SystemExit(asyncio.run(run_check(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
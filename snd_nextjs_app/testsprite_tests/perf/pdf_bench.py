@@ -0,0 +1,252 @@
+"""Server-side PDF generation under concurrent load.
+
+Month end produces payslips, final settlements, leave and leaving reports,
+rental timesheets and H2S cards in bursts. For every generator below this
+fires requests at growing concurrency (each of `level` workers sends --rounds
+requests, cycling through real record ids) and records latency, bytes
+produced, the server's CPU time and peak RSS growth, and whether every body is
+a valid PDF:
+
+    final-settlement  GET  /api/final-settlements/[id]/pdf
+    payslip           GET  /api/payroll/[id]/payslip/download
+    leave             GET  /api/leave-requests/[id]/pdf
+    rental-timesheet  GET  /api/reports/rental-timesheet/pdf?month=
+    leaving-report    GET  /api/reports/leaving/pdf?startDate=&endDate=
+    h2s-card          POST /api/employee/[id]/training/[trainingId]/h2s-card-pdf
+
+The H2S route stores its PDF in MinIO and answers with JSON, so it runs with
+perf.s3_standin in front (start the app with S3_ENDPOINT pointing at it) and
+the stored objects are validated instead. The payslip route currently returns
+JSON for the browser to render; the report lists that as 'not a PDF' rather
+than hiding it.
+
+PDFs are parsed with pypdf when it is installed, otherwise checked
+structurally (header, xref, trailer, page objects). A generator is flagged
+when peak RSS grows with concurrency by more than --flag-mb-per-request MB per
+concurrent request (linear fit, r2 >= 0.8), i.e. documents are held in memory
+per request rather than streamed.
+
+Usage:
+    python -m perf.pdf_bench --levels 1,2,4,8,16 --rounds 3
+"""
+import argparse
+import asyncio
+import datetime
+import io
+import re
+import time
+
+from perf.common import (
+    ProcessSampler,
+    linear_fit,
+    load_config,
+    open_session,
+    parse_levels,
+    server_pid,
+    summarize,
+    write_report,
+)
+from perf.history import record_run
+from perf.s3_standin import DEFAULT_PORT, S3StandIn
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+PAGE_OBJECT = re.compile(rb"/Type\s*/Page[^s]")
+
+
+def last_month():
+    first = datetime.date.today().replace(day=1)
+    return (first - datetime.timedelta(days=1)).replace(day=1)
+
+
+def generators():
+    month = last_month()
+    end = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+    return {
+        "final-settlement": {"method": "GET", "path": "/api/final-settlements/{id}/pdf?language=bilingual",
+                             "ids": "/api/final-settlements?page=1&limit=50"},
+        "payslip": {"method": "GET", "path": "/api/payroll/{id}/payslip/download",
+                    "ids": "/api/payroll?page=1&limit=50"},
+        "leave": {"method": "GET", "path": "/api/leave-requests/{id}/pdf?lang=en",
+                  "ids": "/api/leave-requests?page=1&limit=50"},
+        "rental-timesheet": {"method": "GET", "path": f"/api/reports/rental-timesheet/pdf?month={month:%Y-%m}"},
+        "leaving-report": {"method": "GET",
+                           "path": f"/api/reports/leaving/pdf?startDate={month}&endDate={end}&lang=en"},
+        "h2s-card": {"method": "POST", "path": "/api/employee/{employee}/training/{id}/h2s-card-pdf", "stored": True},
+    }
+
+
+def list_ids(data):
+    """Ids from a list response, whether the rows are at the top level or one level down."""
+    candidates = [data] if isinstance(data, list) else []
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                candidates.append(value)
+            elif isinstance(value, dict):
+                candidates.extend(v for v in value.values() if isinstance(v, list))
+    rows = max(candidates, key=len, default=[])
+    return [row["id"] for row in rows if isinstance(row, dict) and "id" in row]
+
+
+def check_pdf(body):
+    """Return (valid, pages, problem)."""
+    if not body.startswith(b"%PDF-"):
+        return False, 0, "not a PDF"
+    if pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(body))
+            return len(reader.pages) > 0, len(reader.pages), None if reader.pages else "no pages"
+        except Exception as exc:  # pypdf raises a wide range of errors on broken files
+            return False, 0, f"{type(exc).__name__}: {exc}"
+    tail = body[-2048:]
+    if b"%%EOF" not in tail or b"startxref" not in tail:
+        return False, 0, "truncated (no trailer)"
+    pages = len(PAGE_OBJECT.findall(body))
+    return pages > 0, pages, None if pages else "no pages"
+
+
+async def fetch_targets(session, base_url, spec, args):
+    if spec.get("stored"):
+        return [tuple(pair.split(":")) for pair in args.h2s.split(",")] if args.h2s else []
+    if "ids" not in spec:
+        return [None]
+    async with session.get(f"{base_url}{spec['ids']}") as resp:
+        if resp.status != 200:
+            return []
+        return list_ids(await resp.json())
+
+
+async def run_level(session, base_url, spec, targets, level, rounds, standin):
+    latencies = []
+    checks = {"valid": 0, "invalid": 0, "problems": {}}
+    sizes = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(level * rounds):
+        queue.put_nowait(targets[i % len(targets)])
+
+    def validate(body):
+        valid, pages, problem = check_pdf(body)
+        checks["valid" if valid else "invalid"] += 1
+        if problem:
+            checks["problems"][problem] = checks["problems"].get(problem, 0) + 1
+        sizes.append(len(body))
+        return pages
+
+    async def worker():
+        while not queue.empty():
+            target = queue.get_nowait()
+            if isinstance(target, tuple):
+                path = spec["path"].format(employee=target[0], id=target[1])
+            else:
+                path = spec["path"].format(id=target)
+            started = time.perf_counter()
+            async with session.request(spec["method"], f"{base_url}{path}") as resp:
+                body = await resp.read()
+                status = resp.status
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200 and not spec.get("stored"):
+                validate(body)
+
+    puts_before = len(standin.puts) if standin else 0
+    await asyncio.gather(*(worker() for _ in range(level)))
+    if spec.get("stored") and standin:
+        for put in standin.puts[puts_before:]:
+            bucket, _, key = put["key"].partition("/")
+            validate(standin.buckets[bucket][key]["body"] or b"")
+    return latencies, sizes, statuses, checks
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    specs = generators()
+    names = args.generators.split(",") if args.generators else list(specs)
+    levels = parse_levels(args.levels)
+    session, _ = await open_session(config, limit=max(levels))
+    results = {}
+    samples = {}
+    # The H2S card is the only stored PDF, and it has targets only with --h2s
+    stored = "h2s-card" in names and args.h2s
+    standin = S3StandIn(args.standin_host, args.standin_port, keep_bodies=True) if stored else None
+    try:
+        if standin:
+            await standin.start()
+        for name in names:
+            spec = specs[name]
+            targets = await fetch_targets(session, base_url, spec, args)
+            if not targets:
+                print(f"{name}: no records to render, skipping")
+                continue
+            rows = []
+            for level in levels:
+                async with ProcessSampler(pid) as sampler:
+                    started = time.perf_counter()
+                    latencies, sizes, statuses, checks = await run_level(
+                        session, base_url, spec, targets, level, args.rounds, standin
+                    )
+                    seconds = time.perf_counter() - started
+                server = sampler.summary()
+                rows.append({
+                    "concurrency": level,
+                    "requests": len(latencies),
+                    "statuses": statuses,
+                    "latency_ms": summarize(latencies),
+                    "pdfs_per_second": checks["valid"] / seconds if seconds else None,
+                    "bytes": summarize(sizes) if sizes else {},
+                    "checks": checks,
+                    "server": server,
+                })
+                samples[f"{name} x{level}"] = latencies
+                print(
+                    f"{name:<17} x{level:<3} p50 {rows[-1]['latency_ms'].get('p50', 0):>8.0f} ms  "
+                    f"valid {checks['valid']}/{len(latencies)}  rss +{server['rss_growth_mb'] or 0:.1f} MB  "
+                    f"cpu {server['cpu_s'] or 0:.1f}s"
+                )
+
+            growth = [(r["concurrency"], r["server"]["rss_growth_mb"]) for r in rows if r["server"]["rss_growth_mb"] is not None]
+            memory = None
+            if len(growth) >= 2:
+                slope, _, r2 = linear_fit([c for c, _ in growth], [g for _, g in growth])
+                memory = {
+                    "mb_per_concurrent_request": slope,
+                    "r2": r2,
+                    "flagged": slope > args.flag_mb_per_request and r2 >= 0.8,
+                }
+            results[name] = {"targets": len(targets), "levels": rows, "memory": memory}
+            if memory and memory["flagged"]:
+                print(f"{name:<17} <-- memory grows {memory['mb_per_concurrent_request']:.1f} MB per concurrent request")
+    finally:
+        await session.close()
+        if standin:
+            await standin.stop()
+
+    history_run = record_run("pdf-bench", samples, {"levels": args.levels, "rounds": args.rounds})
+    path = write_report(
+        "pdf-bench",
+        {"history_run": history_run, "server_pid": pid, "validator": "pypdf" if pypdf else "structural",
+         "generators": results},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    parser.add_argument("--rounds", type=int, default=3, help="requests per worker and level")
+    parser.add_argument("--generators", help=f"comma separated subset of {','.join(generators())}")
+    parser.add_argument("--h2s", help="employeeId:trainingId pairs for the H2S card route, comma separated")
+    parser.add_argument("--flag-mb-per-request", type=float, default=5.0)
+    parser.add_argument("--standin-host", default="127.0.0.1")
+    parser.add_argument("--standin-port", type=int, default=DEFAULT_PORT)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
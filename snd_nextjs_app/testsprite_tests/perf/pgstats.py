@@ -0,0 +1,116 @@
+"""Server-side query accounting through pg_stat_statements.
+
+Counts every statement the app runs against the current database between a
+reset() and a snapshot(), which is how the benchmarks report queries per
+record without instrumenting the app. The extension has to be preloaded
+(shared_preload_libraries = 'pg_stat_statements', then a restart); when it is
+not, available() returns False and callers report query counts as None.
+LockSampler watches for backends stuck on locks while a request runs.
+"""
+import asyncio
+
+import asyncpg
+
+# The tools' own monitoring queries, left out of the counts
+OWN_QUERIES = ["%pg_stat_statements%", "%pg_stat_activity%"]
+
+
+async def available(conn):
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+        await conn.fetchval("SELECT count(*) FROM pg_stat_statements")
+    except asyncpg.PostgresError:
+        return False
+    return True
+
+
+async def reset(conn):
+    await conn.execute("SELECT pg_stat_statements_reset()")
+
+
+async def snapshot(conn, top=10):
+    """Totals since the last reset plus the `top` statements by calls."""
+    rows = await conn.fetch(
+        """
+        SELECT query, calls, rows, total_exec_time
+        FROM pg_stat_statements
+        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND query NOT ILIKE ALL($1::text[])
+        ORDER BY calls DESC
+        """,
+        OWN_QUERIES,
+    )
+    return {
+        "calls": sum(row["calls"] for row in rows),
+        "rows": sum(row["rows"] for row in rows),
+        "exec_ms": sum(row["total_exec_time"] for row in rows),
+        "statements": len(rows),
+        "top": [
+            {
+                "query": " ".join(row["query"].split())[:200],
+                "calls": row["calls"],
+                "rows": row["rows"],
+                "mean_ms": row["total_exec_time"] / row["calls"] if row["calls"] else 0,
+            }
+            for row in rows[:top]
+        ],
+    }
+
+
+class LockSampler:
+    """Polls pg_stat_activity on its own connection while a block runs.
+
+    Counts the other backends of the current database that are waiting on a
+    heavyweight lock at each sample, so lock_wait_ms is an estimate (waiting
+    backends x interval), good for comparing runs rather than exact.
+    """
+
+    def __init__(self, conn, interval=0.02):
+        self.conn = conn
+        self.interval = interval
+        self.samples = 0
+        self.waiting_samples = 0
+        self.max_waiting = 0
+        self.max_active = 0
+        self.waiting_total = 0
+        self.events = {}
+        self._task = None
+
+    async def _poll(self):
+        while True:
+            rows = await self.conn.fetch(
+                """
+                SELECT state, wait_event_type, wait_event FROM pg_stat_activity
+                WHERE datname = current_database() AND pid <> pg_backend_pid()
+                """
+            )
+            waiting = [row["wait_event"] for row in rows if row["wait_event_type"] == "Lock"]
+            self.samples += 1
+            self.waiting_total += len(waiting)
+            self.waiting_samples += bool(waiting)
+            self.max_waiting = max(self.max_waiting, len(waiting))
+            self.max_active = max(self.max_active, sum(1 for row in rows if row["state"] == "active"))
+            for event in waiting:
+                self.events[event] = self.events.get(event, 0) + 1
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._poll())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self):
+        return {
+            "samples": self.samples,
+            "samples_with_waits": self.waiting_samples,
+            "max_waiting_backends": self.max_waiting,
+            "max_active_backends": self.max_active,
+            "lock_wait_ms": self.waiting_total * self.interval * 1000,
+            "wait_events": self.events,
+        }
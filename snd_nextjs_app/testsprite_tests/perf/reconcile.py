@@ -0,0 +1,262 @@
+"""Field-level reconciliation of the local database against ERPNext.
+
+TC020 only looks for a 'Synchronization Complete' message. This pulls both
+sides for customers, employees, invoices and payments in pages (keyset pages
+from PostgreSQL, limit_start pages with an explicit field list from the Frappe
+REST API, so no per-record detail calls), maps every record onto a canonical
+form and hashes it. Records are matched by ERPNext name in one pass over two
+hash maps; only keys whose hashes differ are diffed field by field.
+
+Canonical form, so formatting differences are not reported as drift:
+money rounded to 2 decimals, dates as YYYY-MM-DD, text trimmed, whitespace
+collapsed and case-folded, empty strings and nulls equal, booleans as 0/1.
+
+ERPNext is read from SND_ERPNEXT_URL or NEXT_PUBLIC_ERPNEXT_URL with the
+NEXT_PUBLIC_ERPNEXT_API_KEY / _SECRET the app uses; point it at
+perf.erpnext_standin for local runs.
+
+Usage:
+    python -m perf.reconcile --entities customers,invoices --examples 10
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import aiohttp
+
+from perf.common import write_report
+from perf.seed import connect
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def text(value):
+    return WHITESPACE.sub(" ", str(value)).strip().casefold() if value not in (None, "") else ""
+
+
+def money(value):
+    return f"{float(value):.2f}" if value not in (None, "") else "0.00"
+
+
+def day(value):
+    return str(value)[:10] if value not in (None, "") else ""
+
+
+def flag(value):
+    return "1" if value in (True, 1, "1", "true", "True") else "0"
+
+
+def inverted_flag(value):
+    return "0" if flag(value) == "1" else "1"
+
+
+# Per entity: local query (columns named after the canonical fields, plus key
+# and a numeric cursor column), ERPNext DocType and, per canonical field, the
+# ERPNext field it comes from and the canonicaliser applied on both sides.
+ENTITIES = {
+    "customers": {
+        "local": "SELECT id AS cursor, erpnext_id AS key, name, email, phone, tax_number, credit_limit, is_active "
+                 "FROM customers WHERE erpnext_id IS NOT NULL AND id > $1 ORDER BY id LIMIT $2",
+        "doctype": "Customer",
+        "fields": {
+            "name": ("customer_name", text),
+            "email": ("email_id", text),
+            "phone": ("mobile_no", text),
+            "tax_number": ("tax_id", text),
+            "credit_limit": ("credit_limit", money),
+            "is_active": ("disabled", inverted_flag),
+        },
+    },
+    "employees": {
+        "local": "SELECT id AS cursor, erpnext_id AS key, first_name, last_name, basic_salary, hire_date, status "
+                 "FROM employees WHERE erpnext_id IS NOT NULL AND id > $1 ORDER BY id LIMIT $2",
+        "doctype": "Employee",
+        "fields": {
+            "first_name": ("first_name", text),
+            "last_name": ("last_name", text),
+            "basic_salary": ("ctc", money),
+            "hire_date": ("date_of_joining", day),
+            "status": ("status", text),
+        },
+    },
+    "invoices": {
+        "local": "SELECT id AS cursor, invoice_id AS key, amount, status, invoice_date, due_date "
+                 "FROM rental_invoices WHERE id > $1 ORDER BY id LIMIT $2",
+        "doctype": "Sales Invoice",
+        "fields": {
+            "amount": ("grand_total", money),
+            "status": ("status", text),
+            "invoice_date": ("posting_date", day),
+            "due_date": ("due_date", day),
+        },
+    },
+    "payments": {
+        "local": "SELECT id AS cursor, payment_id AS key, amount, payment_date "
+                 "FROM rental_payments WHERE id > $1 ORDER BY id LIMIT $2",
+        "doctype": "Payment Entry",
+        "fields": {
+            "amount": ("paid_amount", money),
+            "payment_date": ("posting_date", day),
+        },
+    },
+}
+
+# ERPNext rows are only comparable once submitted or still draft; cancelled
+# documents have no local counterpart
+REMOTE_FILTERS = {
+    "Sales Invoice": [["docstatus", "!=", 2]],
+    "Payment Entry": [["docstatus", "!=", 2]],
+}
+
+
+def digest(values):
+    return hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=16).digest()
+
+
+class SideIndex:
+    """key -> (hash, canonical values) for one side of one entity."""
+
+    def __init__(self):
+        self.records = {}
+        self.duplicates = 0
+
+    def add(self, key, values):
+        if key in self.records:
+            self.duplicates += 1
+        self.records[key] = (digest(values), values)
+
+
+async def pull_local(conn, spec, page_size):
+    index = SideIndex()
+    fields = list(spec["fields"])
+    cursor = 0
+    while True:
+        rows = await conn.fetch(spec["local"], cursor, page_size)
+        if not rows:
+            return index
+        for row in rows:
+            index.add(str(row["key"]), tuple(spec["fields"][f][1](row[f]) for f in fields))
+        cursor = rows[-1]["cursor"]
+
+
+async def pull_remote(session, base_url, spec, page_size):
+    index = SideIndex()
+    fields = list(spec["fields"])
+    remote_fields = ["name"] + [spec["fields"][f][0] for f in fields]
+    params = {"fields": json.dumps(remote_fields), "limit_page_length": str(page_size), "order_by": "name asc"}
+    if spec["doctype"] in REMOTE_FILTERS:
+        params["filters"] = json.dumps(REMOTE_FILTERS[spec["doctype"]])
+    start = 0
+    while True:
+        params["limit_start"] = str(start)
+        async with session.get(f"{base_url}/api/resource/{spec['doctype']}", params=params) as resp:
+            resp.raise_for_status()
+            rows = (await resp.json())["data"]
+        for row in rows:
+            index.add(str(row["name"]), tuple(spec["fields"][f][1](row.get(spec["fields"][f][0])) for f in fields))
+        if len(rows) < page_size:
+            return index
+        start += page_size
+
+
+def compare(spec, local, remote, examples):
+    fields = list(spec["fields"])
+    only_local = [key for key in local.records if key not in remote.records]
+    only_remote = [key for key in remote.records if key not in local.records]
+    mismatched = [
+        key for key, (hashed, _) in local.records.items()
+        if key in remote.records and remote.records[key][0] != hashed
+    ]
+    field_counts = Counter()
+    samples = []
+    for key in mismatched:
+        local_values = local.records[key][1]
+        remote_values = remote.records[key][1]
+        diff = {
+            field: {"local": lv, "erpnext": rv}
+            for field, lv, rv in zip(fields, local_values, remote_values)
+            if lv != rv
+        }
+        field_counts.update(diff)
+        if len(samples) < examples:
+            samples.append({"key": key, "fields": diff})
+    return {
+        "local": len(local.records),
+        "erpnext": len(remote.records),
+        "matched": len(local.records) - len(only_local) - len(mismatched),
+        "mismatched": len(mismatched),
+        "only_local": len(only_local),
+        "only_erpnext": len(only_remote),
+        "duplicate_keys": {"local": local.duplicates, "erpnext": remote.duplicates},
+        "mismatches_by_field": dict(field_counts),
+        "examples": {
+            "mismatched": samples,
+            "only_local": only_local[:examples],
+            "only_erpnext": only_remote[:examples],
+        },
+    }
+
+
+def erpnext_settings():
+    base_url = os.environ.get("SND_ERPNEXT_URL") or os.environ.get("NEXT_PUBLIC_ERPNEXT_URL")
+    if not base_url:
+        raise SystemExit("Set SND_ERPNEXT_URL (or NEXT_PUBLIC_ERPNEXT_URL) to the ERPNext to compare against")
+    headers = {"Accept": "application/json"}
+    key = os.environ.get("NEXT_PUBLIC_ERPNEXT_API_KEY")
+    secret = os.environ.get("NEXT_PUBLIC_ERPNEXT_API_SECRET")
+    if key and secret:
+        headers["Authorization"] = f"token {key}:{secret}"
+    return base_url.rstrip("/"), headers
+
+
+async def run_reconcile(args):
+    base_url, headers = erpnext_settings()
+    names = args.entities.split(",") if args.entities else list(ENTITIES)
+    report = {}
+    conn = await connect()
+    try:
+        async with aiohttp.ClientSession(headers=headers) as session:
+            for name in names:
+                spec = ENTITIES[name]
+                started = time.perf_counter()
+                local, remote = await asyncio.gather(
+                    pull_local(conn, spec, args.page_size),
+                    pull_remote(session, base_url, spec, args.page_size),
+                )
+                pulled = time.perf_counter()
+                result = compare(spec, local, remote, args.examples)
+                result["pull_seconds"] = pulled - started
+                result["compare_seconds"] = time.perf_counter() - pulled
+                report[name] = result
+                print(
+                    f"{name:<10} local={result['local']:<7} erpnext={result['erpnext']:<7} "
+                    f"matched={result['matched']:<7} mismatched={result['mismatched']:<6} "
+                    f"only_local={result['only_local']:<6} only_erpnext={result['only_erpnext']}"
+                )
+                for field, count in sorted(result["mismatches_by_field"].items(), key=lambda item: -item[1]):
+                    print(f"           {field}: {count}")
+    finally:
+        await conn.close()
+
+    path = write_report("reconcile", report)
+    print(f"Report written to {path}")
+    drift = any(r["mismatched"] or r["only_local"] or r["only_erpnext"] for r in report.values())
+    return 1 if drift and args.fail_on_drift else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", help=f"comma separated subset of {','.join(ENTITIES)}")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--examples", type=int, default=5, help="example records per entity and kind")
+    parser.add_argument("--fail-on-drift", action="store_true", help="exit 1 when anything does not reconcile")
+    raise SystemExit(asyncio.run(run_reconcile(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
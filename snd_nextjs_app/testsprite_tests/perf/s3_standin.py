@@ -0,0 +1,329 @@
+"""Local S3-compatible stand-in for MinIO that accounts for every byte.
+
+Serves the path-style requests the AWS SDK makes from src/lib/minio and the
+upload routes (forcePathStyle: true):
+
+    PUT/HEAD/DELETE /<bucket>                bucket create, check, delete
+    GET /<bucket>?list-type=2                ListObjectsV2
+    PUT/GET/HEAD/DELETE /<bucket>/<key>      objects
+    POST ?uploads, PUT ?partNumber&uploadId, POST ?uploadId
+                                             multipart uploads
+
+Signatures are not checked. aws-chunked bodies (streaming uploads) are
+decoded so the payload bytes are counted, not the framing. Bodies are kept in
+memory only with --keep-bodies; otherwise just size and ETag are stored, so
+the stand-in's own memory does not grow during a benchmark.
+
+GET /__standin/stats reports requests per operation, bytes in and out, peak
+concurrent requests, the object size distribution and, per PUT, when its
+first and last body byte arrived; the upload benchmark uses those to tell
+whether the app streams uploads through or buffers them first.
+
+Point the app at it with S3_ENDPOINT=http://127.0.0.1:9010 and any
+AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY.
+
+Usage:
+    python -m perf.s3_standin --port 9010 --keep-bodies
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import Counter
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+DEFAULT_PORT = 9010
+READ_CHUNK = 256 * 1024
+
+# Object size buckets for the request pattern report, in bytes
+SIZE_BUCKETS = [64 * 1024, 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 50 * 1024 ** 2]
+
+
+def size_bucket(size):
+    for limit in SIZE_BUCKETS:
+        if size <= limit:
+            return f"<={limit // 1024}KB"
+    return f">{SIZE_BUCKETS[-1] // 1024}KB"
+
+
+def xml_response(body, status=200):
+    return web.Response(
+        text=f'<?xml version="1.0" encoding="UTF-8"?>\n{body}', status=status, content_type="application/xml"
+    )
+
+
+def s3_error(status, code, message):
+    return xml_response(f"<Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>", status)
+
+
+class S3StandIn:
+    """Run with `async with S3StandIn(...)` or from the CLI."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, keep_bodies=False):
+        self.host = host
+        self.port = port
+        self.keep_bodies = keep_bodies
+        self.buckets = {}
+        self.uploads = {}
+        self.runner = None
+        self.reset_stats()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def reset_stats(self):
+        self.requests = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.sizes = Counter()
+        self.puts = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_get("/__standin/stats", self.handle_stats)
+        app.router.add_post("/__standin/reset", self.handle_reset)
+        app.router.add_route("*", "/{bucket}", self.handle_bucket)
+        app.router.add_route("*", "/{bucket}/", self.handle_bucket)
+        app.router.add_route("*", "/{bucket}/{key:.+}", self.handle_object)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    def stats(self):
+        return {
+            "requests": dict(self.requests),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "peak_in_flight": self.peak_in_flight,
+            "object_sizes": dict(self.sizes),
+            "objects": sum(len(objects) for objects in self.buckets.values()),
+            "puts": self.puts,
+        }
+
+    async def read_body(self, request):
+        """Read the payload chunk by chunk; returns (bytes or None, size, md5, first, last)."""
+        md5 = hashlib.md5()
+        kept = bytearray() if self.keep_bodies else None
+        size = 0
+        first = None
+        chunked = (
+            "aws-chunked" in request.headers.get("Content-Encoding", "")
+            or request.headers.get("x-amz-content-sha256", "").startswith("STREAMING-")
+        )
+        reader = decode_aws_chunked(request.content) if chunked else iter_content(request.content)
+        async for chunk in reader:
+            if first is None:
+                first = time.monotonic()
+            size += len(chunk)
+            md5.update(chunk)
+            if kept is not None:
+                kept.extend(chunk)
+        self.bytes_in += size
+        return (bytes(kept) if kept is not None else None), size, md5.hexdigest(), first, time.monotonic()
+
+    async def track(self, operation, handler):
+        self.requests[operation] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await handler()
+        finally:
+            self.in_flight -= 1
+
+    async def handle_bucket(self, request):
+        bucket = request.match_info["bucket"]
+        method = request.method
+
+        async def handle():
+            if method == "PUT":
+                self.buckets.setdefault(bucket, {})
+                return web.Response(status=200)
+            if bucket not in self.buckets:
+                return s3_error(404, "NoSuchBucket", bucket)
+            if method == "HEAD":
+                return web.Response(status=200)
+            if method == "DELETE":
+                del self.buckets[bucket]
+                return web.Response(status=204)
+            if method == "GET":
+                prefix = request.query.get("prefix", "")
+                contents = "".join(
+                    f"<Contents><Key>{escape(key)}</Key><Size>{obj['size']}</Size>"
+                    f"<ETag>&quot;{obj['etag']}&quot;</ETag></Contents>"
+                    for key, obj in sorted(self.buckets[bucket].items()) if key.startswith(prefix)
+                )
+                return xml_response(
+                    f"<ListBucketResult><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+                    f"<IsTruncated>false</IsTruncated>{contents}</ListBucketResult>"
+                )
+            return s3_error(405, "MethodNotAllowed", method)
+
+        return await self.track(f"{method} bucket", handle)
+
+    async def handle_object(self, request):
+        bucket = request.match_info["bucket"]
+        key = request.match_info["key"]
+        query = request.query
+        method = request.method
+        if method == "POST" and "uploads" in query:
+            operation = "CreateMultipartUpload"
+        elif method == "PUT" and "uploadId" in query:
+            operation = "UploadPart"
+        elif method == "POST" and "uploadId" in query:
+            operation = "CompleteMultipartUpload"
+        elif method == "DELETE" and "uploadId" in query:
+            operation = "AbortMultipartUpload"
+        else:
+            operation = {"PUT": "PutObject", "GET": "GetObject", "HEAD": "HeadObject", "DELETE": "DeleteObject"}.get(
+                method, method
+            )
+        return await self.track(operation, lambda: self.object_operation(operation, request, bucket, key))
+
+    async def object_operation(self, operation, request, bucket, key):
+        # MinIO auto-creates nothing; the routes expect their buckets to exist,
+        # so the stand-in creates them on first write instead of failing
+        objects = self.buckets.setdefault(bucket, {}) if operation in ("PutObject", "CreateMultipartUpload") else self.buckets.get(bucket)
+        if objects is None:
+            await request.read()
+            return s3_error(404, "NoSuchBucket", bucket)
+
+        if operation == "PutObject":
+            body, size, etag, first, last = await self.read_body(request)
+            objects[key] = {"size": size, "etag": etag, "body": body,
+                            "content_type": request.headers.get("Content-Type", "application/octet-stream")}
+            self.sizes[size_bucket(size)] += 1
+            self.puts.append({"key": f"{bucket}/{key}", "bytes": size, "first_byte": first, "last_byte": last})
+            return web.Response(status=200, headers={"ETag": f'"{etag}"'})
+
+        if operation == "CreateMultipartUpload":
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {}, "started": time.monotonic(),
+                                       "content_type": request.headers.get("Content-Type", "application/octet-stream")}
+            return xml_response(
+                f"<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+
+        if operation == "UploadPart":
+            upload = self.uploads.get(request.query["uploadId"])
+            if upload is None:
+                await request.read()
+                return s3_error(404, "NoSuchUpload", request.query["uploadId"])
+            body, size, etag, first, last = await self.read_body(request)
+            upload["parts"][int(request.query["partNumber"])] = {"size": size, "etag": etag, "body": body,
+                                                                 "first": first, "last": last}
+            return web.Response(status=200, headers={"ETag": f'"{etag}"'})
+
+        if operation == "CompleteMultipartUpload":
+            await request.read()
+            upload = self.uploads.pop(request.query["uploadId"], None)
+            if upload is None:
+                return s3_error(404, "NoSuchUpload", request.query["uploadId"])
+            parts = [upload["parts"][number] for number in sorted(upload["parts"])]
+            size = sum(part["size"] for part in parts)
+            etag = hashlib.md5(b"".join(bytes.fromhex(part["etag"]) for part in parts)).hexdigest() + f"-{len(parts)}"
+            body = b"".join(part["body"] for part in parts) if self.keep_bodies else None
+            objects[key] = {"size": size, "etag": etag, "body": body, "content_type": upload["content_type"]}
+            self.sizes[size_bucket(size)] += 1
+            self.puts.append({
+                "key": f"{bucket}/{key}", "bytes": size, "parts": len(parts),
+                "first_byte": min((p["first"] for p in parts if p["first"]), default=None),
+                "last_byte": max(p["last"] for p in parts) if parts else None,
+            })
+            return xml_response(
+                f"<CompleteMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                f"<ETag>&quot;{etag}&quot;</ETag></CompleteMultipartUploadResult>"
+            )
+
+        if operation == "AbortMultipartUpload":
+            self.uploads.pop(request.query["uploadId"], None)
+            return web.Response(status=204)
+
+        obj = objects.get(key)
+        if operation == "DeleteObject":
+            objects.pop(key, None)
+            return web.Response(status=204)
+        if obj is None:
+            return s3_error(404, "NoSuchKey", key)
+        headers = {"ETag": f'"{obj["etag"]}"', "Content-Type": obj["content_type"], "Content-Length": str(obj["size"])}
+        if operation == "HeadObject":
+            return web.Response(status=200, headers=headers)
+        if obj["body"] is None:
+            return s3_error(501, "NotImplemented", "Object bodies are not kept; start with --keep-bodies")
+        self.bytes_out += obj["size"]
+        return web.Response(body=obj["body"], headers=headers)
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats())
+
+    async def handle_reset(self, request):
+        self.reset_stats()
+        return web.json_response({"ok": True})
+
+
+async def iter_content(stream):
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def decode_aws_chunked(stream):
+    """Yield the payload of an aws-chunked body: '<hex size>[;ext]\\r\\n<data>\\r\\n' ... '0\\r\\n<trailers>'."""
+    while True:
+        line = (await stream.readline()).strip()
+        if not line:
+            return
+        size = int(line.split(b";")[0], 16)
+        if size == 0:
+            # Trailing checksum headers, then the final CRLF
+            while (await stream.readline()).strip():
+                pass
+            return
+        remaining = size
+        while remaining:
+            chunk = await stream.read(min(remaining, READ_CHUNK))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+        await stream.readline()
+
+
+async def serve(args):
+    async with S3StandIn(args.host, args.port, args.keep_bodies) as standin:
+        print(f"S3 stand-in on {standin.base_url}")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--keep-bodies", action="store_true", help="keep object bodies so GETs work")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
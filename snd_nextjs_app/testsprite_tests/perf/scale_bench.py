@@ -0,0 +1,189 @@
+"""Data-scale benchmark: list endpoint latency as a function of row count.
+
+Seeds employees, equipment and rentals into the local PostgreSQL at growing
+sizes (perf.seed, SEED- tagged rows) and at every size times /api/employees,
+/api/equipment and /api/rentals with and without search and pagination
+parameters. Per variant a power law latency ~ a * N^b is fitted on log-log
+axes; b near 0 means the endpoint does not care about table size, b near 1
+means it scales linearly (e.g. returns or filters the whole table) and b > 1
+is worse than linear. Variants with b >= --flag-exponent are flagged.
+
+Two caches would otherwise hide the database cost. The equipment and
+rentals lists are cached in Redis under keys built from their filters only,
+so the benchmark needs REDIS_ENABLED=false in its environment and the
+server's. /api/employees keeps a 30 s in-process copy of its first
+unfiltered response; an empty supervisor= parameter counts as a filter there
+without filtering anything, so it is added to every employees request.
+
+--allow-cache measures the cached path instead: Redis (REDIS_URL) is flushed
+before every variant, and unfiltered employees variants wait out the
+in-process copy, so each one is cached from its own response at the current
+size.
+
+Usage:
+    SND_DATABASE_URL=postgres://... python -m perf.scale_bench --sizes 1000,10000,50000,100000
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from perf.common import linear_fit, load_config, open_session, parse_levels, summarize, write_report
+from perf.dbsnapshot import flush_redis, redis_url
+from perf.history import record_run
+from perf.seed import clear_seed, connect, seed_scale
+
+VARIANTS = {
+    "employees": "/api/employees",
+    "employees paged": "/api/employees?page=1&limit=10",
+    "employees search": "/api/employees?page=1&limit=10&search=Seed12",
+    "employees all": "/api/employees?all=true",
+    "equipment": "/api/equipment",
+    "equipment paged": "/api/equipment?page=1&limit=10",
+    "equipment search": "/api/equipment?page=1&limit=10&search=Equipment%2012",
+    "rentals": "/api/rentals",
+    "rentals search": "/api/rentals?search=SEED-R00012",
+}
+
+# Lifetime of the in-process employees list copy in src/app/api/employees/route.ts
+EMPLOYEES_CACHE_SECONDS = 30
+
+
+def classify(exponent):
+    if exponent < 0.2:
+        return "flat"
+    if exponent < 0.8:
+        return "sublinear"
+    if exponent < 1.3:
+        return "linear"
+    return "superlinear"
+
+
+def unfiltered_employees(path):
+    return path.startswith("/api/employees") and "search=" not in path
+
+
+async def time_variant(session, base_url, path, requests, allow_cache):
+    url = f"{base_url}{path}"
+    if not allow_cache and path.startswith("/api/employees"):
+        url += ("&" if "?" in url else "?") + "supervisor="
+    latencies = []
+    sizes = []
+    statuses = {}
+    for i in range(requests + 1):
+        started = time.perf_counter()
+        async with session.get(url) as resp:
+            body = await resp.read()
+        elapsed = (time.perf_counter() - started) * 1000
+        statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        # The first request warms the route and the connection pool
+        if i:
+            latencies.append(elapsed)
+            sizes.append(len(body))
+    return latencies, max(sizes, default=0), statuses
+
+
+async def table_counts(conn):
+    return {
+        table: await conn.fetchval(f"SELECT count(*) FROM {table} WHERE deleted_at IS NULL")
+        for table in ("employees", "equipment", "rentals")
+    }
+
+
+async def run_benchmark(args):
+    config = load_config()
+    redis = redis_url()
+    if redis and not args.allow_cache:
+        raise SystemExit(
+            "Redis caching is on; run the server and the benchmark with REDIS_ENABLED=false, "
+            "or pass --allow-cache to measure the cached path"
+        )
+    conn = await connect()
+    session, _ = await open_session(config, limit=4)
+    names = args.variants.split(",") if args.variants else list(VARIANTS)
+    levels = []
+    samples = {}
+    employees_cached_at = None
+    try:
+        if args.fresh:
+            await clear_seed(conn)
+        for size in parse_levels(args.sizes):
+            started = time.perf_counter()
+            added = await seed_scale(conn, employees=size, equipment=size, rentals=size, seed=args.seed)
+            seed_seconds = time.perf_counter() - started
+            counts = await table_counts(conn)
+            level = {"size": size, "counts": counts, "added": added, "seed_seconds": seed_seconds, "variants": {}}
+            for name in names:
+                path = VARIANTS[name]
+                if redis:
+                    await flush_redis(redis)
+                if args.allow_cache and unfiltered_employees(path):
+                    if employees_cached_at is not None:
+                        await asyncio.sleep(max(0, employees_cached_at + EMPLOYEES_CACHE_SECONDS - time.monotonic()))
+                latencies, max_bytes, statuses = await time_variant(
+                    session, config["base_url"], path, args.requests, args.allow_cache
+                )
+                if args.allow_cache and unfiltered_employees(path):
+                    employees_cached_at = time.monotonic()
+                level["variants"][name] = {
+                    "latency_ms": summarize(latencies),
+                    "response_bytes": max_bytes,
+                    "statuses": statuses,
+                }
+                samples[f"{name} @{size}"] = latencies
+            levels.append(level)
+            print(json.dumps({"size": size, "p50": {n: v["latency_ms"].get("p50") for n, v in level["variants"].items()}}))
+    finally:
+        await session.close()
+        if args.clear_after:
+            await clear_seed(conn)
+        await conn.close()
+
+    curves = {}
+    for name in names:
+        table = name.split()[0]
+        points = [
+            (level["counts"][table], level["variants"][name]["latency_ms"].get("p50"))
+            for level in levels
+            if level["variants"][name]["latency_ms"].get("p50")
+        ]
+        if len(points) < 2:
+            continue
+        exponent, log_a, r2 = linear_fit([math.log(n) for n, _ in points], [math.log(ms) for _, ms in points])
+        bytes_points = [(level["counts"][table], level["variants"][name]["response_bytes"]) for level in levels]
+        bytes_exponent = None
+        if all(b > 0 for _, b in bytes_points) and len(bytes_points) >= 2:
+            bytes_exponent = linear_fit([math.log(n) for n, _ in bytes_points], [math.log(b) for _, b in bytes_points])[0]
+        curves[name] = {
+            "exponent": exponent,
+            "coefficient_ms": math.exp(log_a),
+            "r2": r2,
+            "class": classify(exponent),
+            "bytes_exponent": bytes_exponent,
+            "flagged": exponent >= args.flag_exponent,
+        }
+
+    history_run = record_run("scale-bench", samples, {"sizes": args.sizes})
+    path = write_report("scale-bench", {"history_run": history_run, "levels": levels, "curves": curves})
+    for name, curve in curves.items():
+        flag = "  <-- grows with data" if curve["flagged"] else ""
+        print(f"{name:<20} N^{curve['exponent']:.2f} ({curve['class']}, r2={curve['r2']:.2f}){flag}")
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000,100000")
+    parser.add_argument("--requests", type=int, default=10, help="timed requests per variant and size")
+    parser.add_argument("--variants", help=f"comma separated subset of: {', '.join(VARIANTS)}")
+    parser.add_argument("--flag-exponent", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--allow-cache", action="store_true", help="measure the Redis and in-process cached path")
+    parser.add_argument("--fresh", action="store_true", help="remove earlier SEED- rows first")
+    parser.add_argument("--clear-after", action="store_true", help="remove SEED- rows when done")
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
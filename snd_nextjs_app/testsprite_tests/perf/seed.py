@@ -0,0 +1,125 @@
+"""Bulk seeding of a local PostgreSQL for the scale benchmarks.
+
+Seeded rows are tagged with a SEED- prefix on a unique business key
+(employees.file_number, equipment.door_number, rentals.rental_number,
+customers.erpnext_id, timesheets.description, advance_payments.purpose,
+employee_assignments.name, employee_leaves.reason) so they can be topped up level
+by level and removed again without touching the data the TC scripts rely on.
+The rows themselves come from perf.datagen.
+
+The database is taken from SND_DATABASE_URL, falling back to DATABASE_URL
+(the variable the app itself reads). Never point this at production.
+
+Usage:
+    python -m perf.seed --employees 10000 --equipment 10000 --rentals 10000
+    python -m perf.seed --clear
+"""
+import argparse
+import asyncio
+import os
+
+import asyncpg
+
+from perf.datagen import SEED_PREFIX, generate
+
+# (table, tag column) for every seeded table, children first for clearing;
+# rental_items carry no tag and go with their rentals, payrolls and timesheets
+# the app generated for seeded employees go with the employees
+SEEDED_TABLES = [
+    ("timesheets", "description"),
+    ("advance_payments", "purpose"),
+    ("employee_leaves", "reason"),
+    ("employee_assignments", "name"),
+    ("rentals", "rental_number"),
+    ("customers", "erpnext_id"),
+    ("equipment", "door_number"),
+    ("employees", "file_number"),
+]
+
+
+def database_url():
+    url = os.environ.get("SND_DATABASE_URL") or os.environ.get("DATABASE_URL")
+    if not url:
+        raise RuntimeError("Set SND_DATABASE_URL (or DATABASE_URL) to the local test database")
+    return url
+
+
+async def connect():
+    return await asyncpg.connect(database_url())
+
+
+async def seed_scale(conn, employees=0, equipment=0, rentals=0, timesheet_days=0, advances=False,
+                     assignments=False, leaves=False, seed=42):
+    """Top seeded rows up to the requested counts; returns rows added per table."""
+    return await generate(
+        conn,
+        employees=employees,
+        equipment=equipment,
+        rentals=rentals,
+        timesheet_days=timesheet_days,
+        advances=advances,
+        assignments=assignments,
+        leaves=leaves,
+        seed=seed,
+    )
+
+
+async def clear_seed(conn):
+    """Delete every SEED- row (children first so foreign keys hold)."""
+    async with conn.transaction():
+        await conn.execute(
+            "DELETE FROM rental_items WHERE rental_id IN (SELECT id FROM rentals WHERE rental_number LIKE $1)",
+            SEED_PREFIX + "%",
+        )
+        await clear_payrolls(conn)
+        await conn.execute(
+            "DELETE FROM timesheets WHERE employee_id IN (SELECT id FROM employees WHERE file_number LIKE $1)",
+            SEED_PREFIX + "%",
+        )
+        for table, column in SEEDED_TABLES:
+            await conn.execute(f"DELETE FROM {table} WHERE {column} LIKE $1", SEED_PREFIX + "%")
+
+
+async def clear_payrolls(conn, month=None, year=None):
+    """Delete payrolls (and their items) of seeded employees, optionally for one month only."""
+    where = "employee_id IN (SELECT id FROM employees WHERE file_number LIKE $1)"
+    params = [SEED_PREFIX + "%"]
+    if month is not None:
+        where += " AND month = $2 AND year = $3"
+        params += [month, year]
+    await conn.execute(f"DELETE FROM payroll_items WHERE payroll_id IN (SELECT id FROM payrolls WHERE {where})", *params)
+    return await conn.execute(f"DELETE FROM payrolls WHERE {where}", *params)
+
+
+async def run(args):
+    conn = await connect()
+    try:
+        if args.clear:
+            await clear_seed(conn)
+            print("Seeded rows removed")
+            return
+        added = await seed_scale(
+            conn, args.employees, args.equipment, args.rentals, args.timesheet_days, args.advances,
+            args.assignments, args.leaves, args.seed,
+        )
+        print(added)
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=0)
+    parser.add_argument("--equipment", type=int, default=0)
+    parser.add_argument("--rentals", type=int, default=0)
+    parser.add_argument("--timesheet-days", type=int, default=0)
+    parser.add_argument("--advances", action="store_true")
+    parser.add_argument("--assignments", action="store_true")
+    parser.add_argument("--leaves", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clear", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
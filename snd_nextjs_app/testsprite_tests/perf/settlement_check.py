@@ -0,0 +1,389 @@
+"""Bulk exit-settlement scenarios against /api/final-settlements/preview.
+
+TC023 fills one settlement form by hand. This builds a parameter grid per
+employee (service lengths around the 2/5/10 year end-of-service thresholds,
+resignation vs termination, overtime by hours or fixed amount, computed vs
+manual unpaid salary, computed vs manual absent days), posts every scenario
+to the preview route over one pooled client, and recomputes all of them with
+a NumPy model of FinalSettlementService:
+
+    service        years/months/days between hire date and last working
+                   date, borrowing days from the month before
+    end of service on years + months/12: half a month's basic per year for
+                   the first five years, a full month after; resignation
+                   keeps nothing under 2 years, 1/3 under 5, 2/3 under 10
+    unpaid salary  the manual amount, else (basic + allowances) for every
+                   month from the one after the last paid payroll (or the
+                   hire month) up to the current month
+    overtime       the manual amount, else hours x basic / days in the last
+                   working month / 8 x the employee's multiplier (1.5 unset)
+    absences       --absent-month as a custom period, Fridays only counting
+                   when the days around them are absent; manual days override
+                   the count at the same daily rate (basic / 30 when the
+                   period has no absences)
+    totals         gross = unpaid + end of service + overtime,
+                   deductions = absences, net = gross - deductions
+
+Basic salary and allowances come from the latest employee_salaries row, else
+employees.basic_salary with no allowances, as in the service. Amounts are
+compared in halalas, service periods and absent days exactly. Dates are
+taken as calendar dates, so the server should not run west of UTC.
+
+Usage:
+    python -m perf.settlement_check --employees 20 --concurrency 16
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import time
+
+import numpy as np
+
+from perf.common import load_config, open_session, summarize, write_report
+from perf.payroll_check import to_halalas
+from perf.seed import connect
+
+DEFAULT_MULTIPLIER = 1.5
+
+# Months of service around the end-of-service thresholds, and day offsets
+# that land just before, on and after the anniversary
+SERVICE_MONTHS = [6, 23, 24, 25, 59, 60, 61, 119, 120, 121, 180, 300]
+DAY_OFFSETS = [-1, 0, 15]
+RESIGNATION = [False, True]
+OVERTIME = [(0, 0), (10, 0), (0, 750)]  # (hours, manual amount)
+UNPAID = [0, 12000]  # 0 lets the service compute it
+ABSENT = [0, 2]  # 0 lets the service count them
+
+# Response path -> (reference column, compared in halalas)
+FIELDS = {
+    "finalCalculation.breakdown.unpaidSalaries": ("unpaid", True),
+    "finalCalculation.breakdown.endOfServiceBenefit": ("eos", True),
+    "finalCalculation.breakdown.overtimeAmount": ("overtime", True),
+    "finalCalculation.breakdown.absentDeduction": ("absent_deduction", True),
+    "finalCalculation.grossAmount": ("gross", True),
+    "finalCalculation.totalDeductions": ("deductions", True),
+    "finalCalculation.netAmount": ("net", True),
+    "serviceDetails.totalServiceYears": ("years", False),
+    "serviceDetails.totalServiceMonths": ("months", False),
+    "serviceDetails.totalServiceDays": ("days", False),
+    "absentCalculation.absentDays": ("absent_days", False),
+}
+
+
+def dig(data, path):
+    for key in path.split("."):
+        data = (data or {}).get(key)
+    return data
+
+
+def split_dates(days):
+    """datetime64[D] -> (year, zero-based month, day of month) arrays."""
+    months = days.astype("datetime64[M]")
+    return (
+        days.astype("datetime64[Y]").astype(np.int64) + 1970,
+        months.astype(np.int64) % 12,
+        (days - months.astype("datetime64[D]")).astype(np.int64) + 1,
+    )
+
+
+def month_days(months):
+    """Days in each month of a datetime64[M] array."""
+    return ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+
+
+async def load_employees(conn, count, absent_month):
+    """Per-employee inputs for `count` active employees with a hire date, as arrays."""
+    rows = await conn.fetch(
+        """
+        SELECT e.id, e.hire_date, e.basic_salary, e.overtime_rate_multiplier,
+               s.basic_salary AS salary_basic, s.allowances,
+               p.year AS paid_year, p.month AS paid_month
+        FROM employees e
+        LEFT JOIN LATERAL (
+            SELECT basic_salary, allowances FROM employee_salaries
+            WHERE employee_id = e.id ORDER BY effective_date DESC LIMIT 1
+        ) s ON true
+        LEFT JOIN LATERAL (
+            SELECT year, month FROM payrolls
+            WHERE employee_id = e.id AND status = 'paid' ORDER BY year DESC, month DESC LIMIT 1
+        ) p ON true
+        WHERE e.status = 'active' AND e.hire_date IS NOT NULL AND e.deleted_at IS NULL
+        ORDER BY e.id LIMIT $1
+        """,
+        count,
+    )
+    if not rows:
+        return None
+    has_salary = np.array([row["salary_basic"] is not None for row in rows])
+    basic = np.where(
+        has_salary,
+        [float(row["salary_basic"] or 0) for row in rows],
+        [float(row["basic_salary"] or 0) for row in rows],
+    )
+    hire = np.array([row["hire_date"] for row in rows], dtype="datetime64[D]")
+    paid = np.array([
+        np.datetime64(f"{row['paid_year']:04d}-{row['paid_month']:02d}", "M") if row["paid_year"] else np.datetime64("NaT", "M")
+        for row in rows
+    ])
+    employees = {
+        "id": np.array([row["id"] for row in rows], dtype=np.int64),
+        "hire": hire,
+        "basic": basic,
+        "allowances": np.array([float(row["allowances"] or 0) for row in rows]),
+        "multiplier": np.array([
+            DEFAULT_MULTIPLIER if row["overtime_rate_multiplier"] is None else float(row["overtime_rate_multiplier"])
+            for row in rows
+        ]),
+        # Unpaid months start after the last paid payroll, else at the hire month
+        "unpaid_from": np.where(np.isnat(paid), hire.astype("datetime64[M]"), paid + 1),
+    }
+
+    first = np.datetime64(absent_month, "M").astype("datetime64[D]")
+    dim = int(month_days(np.array([np.datetime64(absent_month, "M")]))[0])
+    sheets = await conn.fetch(
+        """
+        SELECT employee_id, date - $2::date AS day, hours_worked, overtime_hours FROM timesheets
+        WHERE employee_id = ANY($1::int[]) AND date >= $2 AND date < $2::date + $3::int
+        """,
+        employees["id"].tolist(), first.astype(datetime.date), dim,
+    )
+    present = np.zeros((len(rows), dim), dtype=bool)
+    if sheets:
+        who = np.searchsorted(employees["id"], np.array([r["employee_id"] for r in sheets], dtype=np.int64))
+        day = np.array([r["day"] for r in sheets])
+        worked = np.array([float(r["hours_worked"] or 0) > 0 or float(r["overtime_hours"] or 0) > 0 for r in sheets])
+        present[who, day] = worked
+    dates = first + np.arange(dim)
+    # 1970-01-01 was a Thursday, so Friday is weekday index 1 in this scheme
+    friday = (dates.astype(np.int64) % 7) == 1
+    before = np.zeros_like(present)
+    before[:, 1:] = present[:, :-1]
+    after = np.zeros_like(present)
+    after[:, :-1] = present[:, 1:]
+    employees["absent_days"] = (~present & (~friday | (~before & ~after))).sum(axis=1)
+    employees["absent_dim"] = dim
+    return employees
+
+
+def build_grid(employees):
+    """One row per scenario: employee index plus every varied input."""
+    combos = list(itertools.product(
+        range(len(employees["id"])), SERVICE_MONTHS, DAY_OFFSETS, RESIGNATION, OVERTIME, UNPAID, ABSENT
+    ))
+    who, months, offsets, resign, overtime, unpaid, absent = (np.array(values) for values in zip(*combos))
+    hire = employees["hire"][who]
+    _, _, hire_day = split_dates(hire)
+    anniversary_month = hire.astype("datetime64[M]") + months
+    anniversary = anniversary_month.astype("datetime64[D]") + np.minimum(hire_day, month_days(anniversary_month)) - 1
+    return {
+        "employee": who,
+        "last_working": anniversary + offsets,
+        "resignation": resign.astype(bool),
+        "overtime_hours": overtime[:, 0].astype(float),
+        "overtime_amount": overtime[:, 1].astype(float),
+        "manual_unpaid": unpaid.astype(float),
+        "manual_absent": absent.astype(np.int64),
+    }
+
+
+def reference(employees, grid, today):
+    """The settlement figures for every scenario at once."""
+    who = grid["employee"]
+    basic = employees["basic"][who]
+    salary = basic + employees["allowances"][who]
+
+    hy, hm, hd = split_dates(employees["hire"][who])
+    ly, lm, ld = split_dates(grid["last_working"])
+    years = ly - hy
+    months = lm - hm
+    days = ld - hd
+    borrow = days < 0
+    months = np.where(borrow, months - 1, months)
+    days = np.where(borrow, days + month_days(grid["last_working"].astype("datetime64[M]") - 1), days)
+    wrap = months < 0
+    years = np.where(wrap, years - 1, years)
+    months = np.where(wrap, months + 12, months)
+
+    service = years + months / 12
+    half = basic / 2
+    full = half * 5 + basic * (service - 5)
+    eos = np.select(
+        [service >= 10, service >= 5, service >= 2],
+        [full, full * np.where(grid["resignation"], 2 / 3, 1), half * service * np.where(grid["resignation"], 1 / 3, 1)],
+        np.where(grid["resignation"], 0, half * service),
+    )
+    eos = to_halalas(eos) / 100
+
+    current = np.datetime64(today, "M")
+    unpaid_months = np.maximum(0, (current - employees["unpaid_from"][who]).astype(np.int64) + 1)
+    unpaid = np.where(grid["manual_unpaid"] > 0, grid["manual_unpaid"], unpaid_months * salary)
+
+    last_dim = month_days(grid["last_working"].astype("datetime64[M]"))
+    overtime = np.where(
+        grid["overtime_amount"] > 0,
+        grid["overtime_amount"],
+        np.where(grid["overtime_hours"] > 0, grid["overtime_hours"] * (basic / last_dim / 8) * employees["multiplier"][who], 0),
+    )
+
+    counted = employees["absent_days"][who]
+    daily = np.where(counted > 0, basic / employees["absent_dim"], basic / 30)
+    manual = grid["manual_absent"] > 0
+    absent_days = np.where(manual, grid["manual_absent"], counted)
+    absent_deduction = np.where(manual, grid["manual_absent"] * daily, to_halalas(counted * daily) / 100)
+
+    gross = unpaid + eos + overtime
+    return {
+        "years": years,
+        "months": months,
+        "days": days,
+        "eos": eos,
+        "unpaid": unpaid,
+        "overtime": overtime,
+        "absent_days": absent_days,
+        "absent_deduction": absent_deduction,
+        "gross": gross,
+        "deductions": absent_deduction,
+        "net": gross - absent_deduction,
+    }
+
+
+def payload(employees, grid, i, absent_month, dim):
+    return {
+        "employeeId": int(employees["id"][grid["employee"][i]]),
+        "settlementType": "exit",
+        "lastWorkingDate": str(grid["last_working"][i]),
+        "isResignation": bool(grid["resignation"][i]),
+        "overtimeHours": float(grid["overtime_hours"][i]),
+        "overtimeAmount": float(grid["overtime_amount"][i]),
+        "manualUnpaidSalary": float(grid["manual_unpaid"][i]),
+        "manualAbsentDays": int(grid["manual_absent"][i]),
+        "absentCalculationPeriod": "custom",
+        "absentCalculationStartDate": f"{absent_month}-01",
+        "absentCalculationEndDate": f"{absent_month}-{dim:02d}",
+    }
+
+
+async def preview_all(session, url, payloads, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    responses = [None] * len(payloads)
+    statuses = {}
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            async with session.post(url, json=payloads[i]) as resp:
+                body = await resp.read()
+                status = resp.status
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 200:
+            responses[i] = json.loads(body).get("data")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(len(payloads))))
+    return responses, statuses, latencies, time.perf_counter() - started
+
+
+def compare(responses, expected, payloads, tolerance, examples):
+    answered = np.array([response is not None for response in responses])
+    mismatched = np.zeros(len(responses), dtype=bool)
+    summary = {}
+    columns = {}
+    for path, (column, money) in FIELDS.items():
+        actual = np.array([float(dig(r, path) or 0) if r is not None else 0 for r in responses])
+        if money:
+            diff = to_halalas(actual) - to_halalas(expected[column])
+            off = np.abs(diff) > tolerance
+        else:
+            diff = actual - expected[column]
+            off = diff != 0
+        off &= answered
+        mismatched |= off
+        columns[path] = (actual, diff, off)
+        summary[path] = {"mismatches": int(off.sum()), "max_abs": float(np.abs(diff[off]).max()) if off.any() else 0}
+
+    samples = []
+    for i in np.flatnonzero(mismatched)[:examples]:
+        samples.append({
+            "request": payloads[i],
+            "fields": {
+                path: {"api": float(actual[i]), "diff": float(diff[i])}
+                for path, (actual, diff, off) in columns.items() if off[i]
+            },
+        })
+    return {
+        "scenarios": len(responses),
+        "answered": int(answered.sum()),
+        "matched": int((answered & ~mismatched).sum()),
+        "mismatched": int(mismatched.sum()),
+        "fields": summary,
+        "examples": samples,
+    }
+
+
+async def run_check(args):
+    config = load_config()
+    conn = await connect()
+    try:
+        employees = await load_employees(conn, args.employees, args.absent_month)
+    finally:
+        await conn.close()
+    if employees is None:
+        print("No active employees with a hire date to build scenarios for")
+        return 0
+    grid = build_grid(employees)
+    dim = employees["absent_dim"]
+    payloads = [payload(employees, grid, i, args.absent_month, dim) for i in range(len(grid["employee"]))]
+
+    started = time.perf_counter()
+    expected = reference(employees, grid, datetime.date.today())
+    model_seconds = time.perf_counter() - started
+
+    session, _ = await open_session(config, limit=args.concurrency)
+    try:
+        responses, statuses, latencies, seconds = await preview_all(
+            session, f"{config['base_url']}/api/final-settlements/preview", payloads, args.concurrency
+        )
+    finally:
+        await session.close()
+
+    result = compare(responses, expected, payloads, args.tolerance, args.examples)
+    result.update(
+        employees=len(employees["id"]),
+        absent_month=args.absent_month,
+        statuses=statuses,
+        latency_ms=summarize(latencies),
+        api_seconds=seconds,
+        scenarios_per_second=len(payloads) / seconds if seconds else None,
+        model_seconds=model_seconds,
+    )
+    print(
+        f"{result['scenarios']} scenarios over {result['employees']} employees in {seconds:.1f}s "
+        f"({result['scenarios_per_second'] or 0:.0f}/s, model {model_seconds * 1000:.1f} ms)  "
+        f"matched {result['matched']}  mismatched {result['mismatched']}  statuses {statuses}"
+    )
+    for path, stats in result["fields"].items():
+        if stats["mismatches"]:
+            print(f"  {path:<48} {stats['mismatches']:>6}  max diff {stats['max_abs']:g}")
+    path = write_report("settlement-check", result)
+    print(f"Report written to {path}")
+    return 1 if result["mismatched"] and args.fail_on_mismatch else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    previous = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
+    parser.add_argument("--employees", type=int, default=10, help="employees to build the grid for")
+    parser.add_argument("--absent-month", default=f"{previous:%Y-%m}", help="YYYY-MM period for absences")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--tolerance", type=int, default=0, help="allowed difference in halalas")
+    parser.add_argument("--examples", type=int, default=5)
+    parser.add_argument("--fail-on-mismatch", action="store_true")
+    raise SystemExit(asyncio.run(run_check(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
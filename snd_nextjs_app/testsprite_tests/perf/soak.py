@@ -0,0 +1,248 @@
+"""Soak mode: loop a mixed TC workload for hours and watch the Next.js server for leaks.
+
+While the workload runs, the server process is sampled every --sample-every
+seconds for RSS, open file descriptors and sockets (from /proc). If the server
+was started with --inspect (e.g. NODE_OPTIONS=--inspect=9229 npm run start)
+the V8 heap is sampled as well through the inspector port.
+
+After a warm-up period a least-squares trend is fitted to every series and
+any memory series growing faster than --threshold MB/hour is flagged.
+
+The workload mixes:
+- GETs against the list endpoints behind the TC pages (common.TC_ENDPOINTS)
+- /api/sse streams that are opened and dropped again (the TC015 bell)
+- optionally, real TC scripts re-run in a loop (--tc TC004,TC008)
+
+Usage:
+    python -m perf.soak --duration 4h --concurrency 8 --inspector-port 9229
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+import aiohttp
+
+from perf.common import (
+    TC_ENDPOINTS,
+    TESTS_DIR,
+    find_tc_scripts,
+    linear_fit,
+    load_config,
+    open_session,
+    sample_process,
+    server_pid,
+    summarize,
+    write_report,
+)
+from perf.history import record_run
+
+WS_CLOSED = (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR)
+
+
+def parse_duration(text):
+    """Parse '90s', '45m', '4h' or a bare number of seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class NodeInspector:
+    """Minimal client for the Node inspector protocol (the server's --inspect port)."""
+
+    def __init__(self, port, host="127.0.0.1"):
+        self.url = f"http://{host}:{port}/json/list"
+        self.session = None
+        self.ws = None
+        self.ids = itertools.count(1)
+
+    async def connect(self):
+        self.session = aiohttp.ClientSession()
+        async with self.session.get(self.url) as resp:
+            targets = await resp.json(content_type=None)
+        self.ws = await self.session.ws_connect(targets[0]["webSocketDebuggerUrl"], max_msg_size=0)
+
+    async def call(self, method, params=None):
+        message_id = next(self.ids)
+        await self.ws.send_json({"id": message_id, "method": method, "params": params or {}})
+        async for msg in self.ws:
+            if msg.type in WS_CLOSED:
+                raise RuntimeError(f"Inspector connection closed during {method}: {self.ws.exception() or msg.extra}")
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            if data.get("id") == message_id:
+                if "error" in data:
+                    raise RuntimeError(f"{method}: {data['error']}")
+                return data.get("result", {})
+        raise RuntimeError("Inspector connection closed")
+
+    async def heap_mb(self):
+        usage = await self.call("Runtime.getHeapUsage")
+        return usage["usedSize"] / 1048576, usage["totalSize"] / 1048576
+
+    async def close(self):
+        if self.ws:
+            await self.ws.close()
+        if self.session:
+            await self.session.close()
+
+
+async def api_worker(session, base_url, deadline, latencies, errors):
+    paths = list(TC_ENDPOINTS.values())
+    while time.monotonic() < deadline:
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            async with session.get(f"{base_url}{path}") as resp:
+                await resp.read()
+                if resp.status >= 400:
+                    errors[resp.status] = errors.get(resp.status, 0) + 1
+        except aiohttp.ClientError as error:
+            errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+            await asyncio.sleep(1)
+            continue
+        latencies.setdefault(path, []).append((time.perf_counter() - started) * 1000)
+
+
+async def sse_worker(session, base_url, deadline, hold_seconds, counters):
+    # Open a stream, keep it for a while and drop it, like a user reloading the page
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/api/sse") as resp:
+                counters["sse_opened"] += 1
+                try:
+                    await asyncio.wait_for(resp.content.read(), timeout=hold_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        except aiohttp.ClientError:
+            counters["sse_errors"] += 1
+            await asyncio.sleep(1)
+
+
+async def tc_worker(scripts, deadline, counters):
+    for script in itertools.cycle(scripts):
+        if time.monotonic() >= deadline:
+            return
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(script),
+            cwd=str(TESTS_DIR),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        code = await proc.wait()
+        key = f"{script.stem.split('_')[0]}_{'passed' if code == 0 else 'failed'}"
+        counters[key] = counters.get(key, 0) + 1
+
+
+async def sampler(pid, inspector, deadline, interval, samples):
+    while time.monotonic() < deadline:
+        sample = sample_process(pid) or {"t": time.time()}
+        if inspector:
+            try:
+                sample["heap_used_mb"], sample["heap_total_mb"] = await inspector.heap_mb()
+            except (aiohttp.ClientError, RuntimeError, KeyError):
+                pass
+        samples.append(sample)
+        print(json.dumps(sample))
+        await asyncio.sleep(interval)
+
+
+def analyse(samples, warmup_seconds, threshold_mb_per_hour):
+    """Fit a growth trend per series and flag memory series that leak."""
+    if not samples:
+        return {}
+    start = samples[0]["t"]
+    steady = [s for s in samples if s["t"] - start >= warmup_seconds] or samples
+    trends = {}
+    for key in ("rss_mb", "heap_used_mb", "fds", "sockets"):
+        points = [(s["t"] - start, s[key]) for s in steady if key in s]
+        if len(points) < 3:
+            continue
+        hours = [t / 3600 for t, _ in points]
+        values = [v for _, v in points]
+        slope, intercept, r2 = linear_fit(hours, values)
+        unit = "per_hour" if key in ("fds", "sockets") else "mb_per_hour"
+        trend = {unit: slope, "intercept": intercept, "r2": r2, "first": values[0], "last": values[-1]}
+        if key.endswith("_mb"):
+            # A steady climb (good fit) above the threshold is a leak, sawtooth GC noise is not
+            trend["leak"] = slope > threshold_mb_per_hour and r2 >= 0.5
+        trends[key] = trend
+    return trends
+
+
+async def run_soak(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    if pid is None:
+        print("Server process not found in /proc; only inspector and latency data will be recorded")
+
+    scripts = find_tc_scripts(args.tc.split(",")) if args.tc else []
+    inspector = None
+    if args.inspector_port:
+        inspector = NodeInspector(args.inspector_port)
+        await inspector.connect()
+
+    session, _ = await open_session(config, limit=args.concurrency + args.sse_streams)
+    deadline = time.monotonic() + parse_duration(args.duration)
+    samples = []
+    latencies = {}
+    errors = {}
+    counters = {"sse_opened": 0, "sse_errors": 0}
+
+    workers = [api_worker(session, base_url, deadline, latencies, errors) for _ in range(args.concurrency)]
+    workers += [sse_worker(session, base_url, deadline, args.sse_hold, counters) for _ in range(args.sse_streams)]
+    if scripts:
+        workers.append(tc_worker(scripts, deadline, counters))
+    workers.append(sampler(pid, inspector, deadline, args.sample_every, samples))
+
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        await session.close()
+        if inspector:
+            await inspector.close()
+
+    trends = analyse(samples, parse_duration(args.warmup), args.threshold)
+    history_run = record_run("soak", latencies, {"duration": args.duration})
+    report = {
+        "history_run": history_run,
+        "duration": args.duration,
+        "server_pid": pid,
+        "threshold_mb_per_hour": args.threshold,
+        "trends": trends,
+        "leaks": [key for key, trend in trends.items() if trend.get("leak")],
+        "requests": {path: summarize(values) for path, values in latencies.items()},
+        "errors": errors,
+        "counters": counters,
+        "samples": samples,
+    }
+    path = write_report("soak", report)
+    print(json.dumps({"trends": trends, "leaks": report["leaks"]}, indent=2))
+    print(f"Report written to {path}")
+    return 1 if report["leaks"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", default="1h")
+    parser.add_argument("--warmup", default="10m", help="ignored when fitting the trend")
+    parser.add_argument("--threshold", type=float, default=20.0, help="leak threshold in MB/hour")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel API workers")
+    parser.add_argument("--sse-streams", type=int, default=2, help="parallel SSE open/close loops")
+    parser.add_argument("--sse-hold", type=float, default=30.0, help="seconds each stream stays open")
+    parser.add_argument("--tc", help="comma separated TC ids to re-run in a loop, e.g. TC004,TC008")
+    parser.add_argument("--sample-every", type=float, default=15.0)
+    parser.add_argument("--inspector-port", type=int)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run_soak(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""SSE fan-out benchmark for /api/sse (TC015 at scale).
+
+Opens N concurrent authenticated /api/sse streams for a listener account,
+triggers notification-producing actions from a second account and measures,
+per connection level:
+
+- end-to-end delivery latency (action sent -> event read on each stream)
+- loss rate (expected deliveries that never arrived)
+- duplicate rate (the same notification event read twice on one stream)
+- server RSS growth per open connection
+
+Triggers:
+- chat:    POST /api/chat/conversations/<id>/messages, which pushes a
+           system_notification to every stream of the recipient via sse-utils
+           (plus a chat:message carrying the same text, which is ignored)
+- advance: POST /api/advances, i.e. the action TC015 performs. The advance
+           route does not push SSE events today, so this trigger reports the
+           gap as loss rather than hiding it.
+
+Usage:
+    SND_SENDER_USER=other@example.com SND_SENDER_PASSWORD=... \\
+        python -m perf.sse_fanout --connections 100,500,1000,2000 --events 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import aiohttp
+
+from perf.common import (
+    load_config,
+    open_session,
+    parse_levels,
+    sample_process,
+    server_pid,
+    summarize,
+    write_report,
+)
+from perf.history import record_run
+
+# Only this event type counts as a delivery; other events may carry the token too
+DELIVERY_EVENT = "system_notification"
+
+
+class StreamReader:
+    """One /api/sse connection that records when each benchmark token arrives."""
+
+    def __init__(self, index):
+        self.index = index
+        self.connected = asyncio.Event()
+        self.established = False
+        self.arrivals = {}
+        self.duplicates = 0
+        self.error = None
+
+    async def run(self, session, base_url, token_prefix):
+        try:
+            async with session.get(
+                f"{base_url}/api/sse", headers={"Accept": "text/event-stream"}
+            ) as resp:
+                if resp.status != 200:
+                    self.error = f"HTTP {resp.status}"
+                    self.connected.set()
+                    return
+                event_type = None
+                async for raw in resp.content:
+                    line = raw.decode("utf-8", "replace").strip()
+                    if not line:
+                        event_type = None
+                        continue
+                    if line.startswith("event:"):
+                        event_type = line[6:].strip()
+                        continue
+                    if not line.startswith("data:"):
+                        continue
+                    received = time.perf_counter()
+                    payload = line[5:].strip()
+                    if '"connection"' in payload:
+                        self.established = True
+                        self.connected.set()
+                    if token_prefix not in payload:
+                        continue
+                    if (event_type or self._payload_type(payload)) != DELIVERY_EVENT:
+                        continue
+                    token = self._extract_token(payload, token_prefix)
+                    if token in self.arrivals:
+                        self.duplicates += 1
+                    else:
+                        self.arrivals[token] = received
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            self.error = repr(error)
+        finally:
+            self.connected.set()
+
+    @staticmethod
+    def _payload_type(payload):
+        try:
+            return json.loads(payload).get("type")
+        except (ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def _extract_token(payload, token_prefix):
+        start = payload.index(token_prefix)
+        end = start + len(token_prefix)
+        while end < len(payload) and (payload[end].isalnum() or payload[end] == "-"):
+            end += 1
+        return payload[start:end]
+
+
+async def ensure_conversation(sender, base_url, listener_id):
+    """Return the id of a direct conversation between the sender and the listener."""
+    async with sender.post(
+        f"{base_url}/api/chat/conversations",
+        json={"type": "direct", "participantIds": [int(listener_id)]},
+    ) as resp:
+        resp.raise_for_status()
+        return (await resp.json())["data"]["id"]
+
+
+async def trigger(sender, base_url, kind, target, token):
+    """Fire one notification-producing action carrying the token."""
+    if kind == "chat":
+        url = f"{base_url}/api/chat/conversations/{target}/messages"
+        body = {"content": token}
+    else:
+        url = f"{base_url}/api/advances"
+        body = {"employeeId": target, "amount": 1, "reason": token}
+    async with sender.post(url, json=body) as resp:
+        await resp.read()
+        return resp.status
+
+
+async def run_level(config, listener, sender, listener_id, args, connections, pid):
+    base_url = config["base_url"]
+    run_id = uuid.uuid4().hex[:8]
+    token_prefix = f"ssebench-{run_id}-"
+
+    baseline = sample_process(pid)
+
+    # Open every stream and wait until each has received its connection message
+    readers = [StreamReader(i) for i in range(connections)]
+    tasks = [asyncio.create_task(r.run(listener, base_url, token_prefix)) for r in readers]
+    opened_at = time.perf_counter()
+    await asyncio.wait(
+        [asyncio.create_task(r.connected.wait()) for r in readers], timeout=args.connect_timeout
+    )
+    connect_seconds = time.perf_counter() - opened_at
+    failed = [r for r in readers if not r.established]
+    open_sample = sample_process(pid)
+
+    # Fire the trigger actions at a steady pace and note when each left the client
+    sent = {}
+    statuses = {}
+    target = args.employee_id
+    if args.trigger == "chat":
+        target = await ensure_conversation(sender, base_url, listener_id)
+    for seq in range(args.events):
+        token = f"{token_prefix}{seq}"
+        sent[token] = time.perf_counter()
+        status = await trigger(sender, base_url, args.trigger, target, token)
+        statuses[status] = statuses.get(status, 0) + 1
+        await asyncio.sleep(args.interval)
+
+    await asyncio.sleep(args.settle)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    live = [r for r in readers if r.established]
+    expected = len(live) * len(sent)
+    delivered = sum(len(r.arrivals) for r in live)
+    duplicates = sum(r.duplicates for r in live)
+    latencies = [
+        (arrived - sent[token]) * 1000
+        for r in live
+        for token, arrived in r.arrivals.items()
+        if token in sent
+    ]
+
+    result = {
+        "connections": connections,
+        "connected": len(live),
+        "connect_errors": len(failed),
+        "connect_seconds": connect_seconds,
+        "events": len(sent),
+        "trigger_statuses": statuses,
+        "expected_deliveries": expected,
+        "delivered": delivered,
+        "loss_rate": (expected - delivered) / expected if expected else None,
+        "duplicate_rate": duplicates / delivered if delivered else 0.0,
+        "latency_ms": summarize(latencies),
+    }
+    if baseline and open_sample:
+        result["server"] = {
+            "rss_before_mb": baseline["rss_mb"],
+            "rss_open_mb": open_sample["rss_mb"],
+            "sockets_open": open_sample["sockets"],
+            "rss_per_connection_kb": (open_sample["rss_mb"] - baseline["rss_mb"])
+            * 1024
+            / max(len(live), 1),
+        }
+    return result, latencies
+
+
+async def run_benchmark(args):
+    config = load_config()
+    pid = server_pid(config)
+    # Streams stay open for the whole level, so the listener pool must not cap them
+    listener, listener_user = await open_session(config, limit=0)
+    sender, _ = await open_session(
+        config,
+        email=args.sender_email or config["email"],
+        password=args.sender_password or config["password"],
+    )
+    results = []
+    samples = {}
+    try:
+        for connections in parse_levels(args.connections):
+            result, latencies = await run_level(
+                config, listener, sender, listener_user["id"], args, connections, pid
+            )
+            results.append(result)
+            samples[f"{connections} connections"] = latencies
+            print(json.dumps(result))
+            # Give the server time to run the abort handlers before the next level
+            await asyncio.sleep(args.cooldown)
+    finally:
+        await listener.close()
+        await sender.close()
+
+    history_run = record_run("sse-fanout", samples, {"trigger": args.trigger})
+    path = write_report(
+        "sse-fanout",
+        {"trigger": args.trigger, "server_pid": pid, "history_run": history_run, "levels": results},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", default="100,500,1000,2000")
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between triggers")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to wait for stragglers")
+    parser.add_argument("--cooldown", type=float, default=5.0)
+    parser.add_argument("--connect-timeout", type=float, default=120.0)
+    parser.add_argument("--trigger", choices=("chat", "advance"), default="chat")
+    parser.add_argument("--employee-id", default="1", help="employee used by the advance trigger")
+    parser.add_argument("--sender-email", default=os.environ.get("SND_SENDER_USER"))
+    parser.add_argument("--sender-password", default=os.environ.get("SND_SENDER_PASSWORD"))
+    args = parser.parse_args()
+    if args.trigger == "chat" and not args.sender_email:
+        parser.error("the chat trigger needs a second account (--sender-email / SND_SENDER_USER)")
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
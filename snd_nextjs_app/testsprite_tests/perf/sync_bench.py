@@ -0,0 +1,220 @@
+"""ERPNext sync throughput against the local stand-in (perf.erpnext_standin).
+
+At every size N the stand-in is reset and seeded with N customers and N
+submitted Sales Invoices, and N seeded rentals (perf.seed) get a rental_invoices
+row pointing at one of those invoices. Then, end to end through the app:
+
+    enhanced   POST /api/customers/sync/enhanced, first run (creates) and
+               second run (updates)
+    matched    the UI flow: POST /api/customers/sync/check, /match, then
+               /api/customers/sync with the matched data
+    invoices   POST /api/rentals/[id]/invoices/[invoiceId]/sync for every
+               rental invoice, --concurrency at a time
+
+Every stand-in call is counted, so the report shows records per second and
+upstream calls per synced record by method and DocType; anything above
+--flag-calls calls per record is flagged as a per-record call pattern. It also
+flags runs that synced fewer records than the stand-in holds, e.g. list calls
+capped by limit_page_length.
+
+The app must be started with NEXT_PUBLIC_ERPNEXT_URL pointing at the stand-in
+(default http://127.0.0.1:8010) and some API key and secret set, since the sync
+routes refuse to run without them.
+
+Usage:
+    python -m perf.sync_bench --sizes 100,1000,10000 --latency lognormal:40,0.5
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+from collections import Counter
+from decimal import Decimal
+
+from perf.common import load_config, open_session, parse_levels, summarize, write_report
+from perf.erpnext_standin import DEFAULT_PORT, ERPNextStandIn, add_fault_arguments, faults_from_args
+from perf.history import record_run
+from perf.seed import SEED_PREFIX, connect, seed_scale
+
+STANDIN_CUSTOMER = "Standin Customer "
+
+
+def call_delta(standin, before):
+    delta = Counter(standin.calls)
+    delta.subtract(before)
+    return {key: count for key, count in delta.items() if count}
+
+
+async def post(session, url, payload=None):
+    started = time.perf_counter()
+    async with session.post(url, json=payload or {}) as resp:
+        body = await resp.read()
+        status = resp.status
+    elapsed = (time.perf_counter() - started) * 1000
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    return status, data, elapsed
+
+
+async def link_invoices(conn, standin, size):
+    """Point the first `size` seeded rentals at the stand-in's Sales Invoices."""
+    await clear_links(conn)
+    rental_ids = await conn.fetch(
+        "SELECT id FROM rentals WHERE rental_number LIKE $1 ORDER BY id LIMIT $2", SEED_PREFIX + "%", size
+    )
+    today = datetime.date.today()
+    rows = [
+        (row["id"], name, today, today, Decimal(str(invoice["grand_total"])), "pending", today.strftime("%Y-%m"), today)
+        for row, (name, invoice) in zip(rental_ids, standin.table("Sales Invoice").items())
+    ]
+    await conn.copy_records_to_table(
+        "rental_invoices",
+        records=rows,
+        columns=["rental_id", "invoice_id", "invoice_date", "due_date", "amount", "status", "billing_month", "updated_at"],
+    )
+    return [(rental_id, name) for rental_id, name, *_ in rows]
+
+
+async def clear_links(conn):
+    await conn.execute(
+        "DELETE FROM rental_invoices WHERE rental_id IN (SELECT id FROM rentals WHERE rental_number LIKE $1)",
+        SEED_PREFIX + "%",
+    )
+
+
+async def clear_customers(conn):
+    await conn.execute("DELETE FROM customers WHERE erpnext_id LIKE $1", STANDIN_CUSTOMER + "%")
+
+
+def outcome(name, size, seconds, synced, calls):
+    per_record = {key: count / synced for key, count in calls.items() if synced and key != "total"}
+    return {
+        "scenario": name,
+        "size": size,
+        "seconds": seconds,
+        "synced": synced,
+        "records_per_second": synced / seconds if seconds else None,
+        "upstream_calls": calls,
+        "calls_per_record": calls.get("total", 0) / synced if synced else None,
+        "calls_per_record_by_route": per_record,
+        "truncated": synced < size,
+    }
+
+
+async def run_enhanced(session, base_url, standin, size, label):
+    before = Counter(standin.calls)
+    status, data, elapsed = await post(session, f"{base_url}/api/customers/sync/enhanced")
+    synced = ((data or {}).get("data") or {}).get("processed", 0)
+    result = outcome(label, size, elapsed / 1000, synced, call_delta(standin, before))
+    result["status"] = status
+    return result, [elapsed]
+
+
+async def run_matched(session, base_url, standin, size):
+    before = Counter(standin.calls)
+    steps = {}
+    status, check, steps["check_ms"] = await post(session, f"{base_url}/api/customers/sync/check")
+    synced = 0
+    if status == 200 and check:
+        status, match, steps["match_ms"] = await post(
+            session, f"{base_url}/api/customers/sync/match", {"erpnextData": check["data"]}
+        )
+        if status == 200 and match:
+            status, done, steps["sync_ms"] = await post(
+                session, f"{base_url}/api/customers/sync", {"matchedData": match["data"]}
+            )
+            synced = ((done or {}).get("data") or {}).get("processed", 0) if status == 200 else 0
+    total = sum(steps.values())
+    result = outcome("matched", size, total / 1000, synced, call_delta(standin, before))
+    result.update(steps, status=status)
+    return result, [total]
+
+
+async def run_invoices(session, base_url, standin, links, concurrency):
+    before = Counter(standin.calls)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def sync_one(rental_id, invoice_id):
+        async with semaphore:
+            status, _, elapsed = await post(session, f"{base_url}/api/rentals/{rental_id}/invoices/{invoice_id}/sync")
+        latencies.append(elapsed)
+        statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sync_one(rental_id, invoice_id) for rental_id, invoice_id in links))
+    seconds = time.perf_counter() - started
+    result = outcome("invoices", len(links), seconds, statuses[200], call_delta(standin, before))
+    result.update(statuses=dict(statuses), latency_ms=summarize(latencies))
+    return result, latencies
+
+
+async def run_benchmark(args):
+    config = load_config()
+    standin = ERPNextStandIn(args.standin_host, args.standin_port, faults_from_args(args), args.api_key, args.api_secret)
+    conn = await connect()
+    session, _ = await open_session(config, limit=args.concurrency)
+    base_url = config["base_url"]
+    results = []
+    samples = {}
+    try:
+        async with standin:
+            for size in parse_levels(args.sizes):
+                standin.reset()
+                standin.seed(customers=size, items=10, invoices_per_customer=1, seed=args.seed)
+                await seed_scale(conn, employees=max(100, size // 10), equipment=max(100, size // 10), rentals=size, seed=args.seed)
+                links = await link_invoices(conn, standin, size)
+                await clear_customers(conn)
+
+                runs = [
+                    await run_enhanced(session, base_url, standin, size, "enhanced create"),
+                    await run_enhanced(session, base_url, standin, size, "enhanced update"),
+                ]
+                await clear_customers(conn)
+                runs.append(await run_matched(session, base_url, standin, size))
+                runs.append(await run_invoices(session, base_url, standin, links, args.concurrency))
+
+                for result, latencies in runs:
+                    result["flagged"] = (result["calls_per_record"] or 0) > args.flag_calls
+                    results.append(result)
+                    samples[f"{result['scenario']} @{size}"] = latencies
+                    print(
+                        f"N={size:<6} {result['scenario']:<16} {result['synced']:>6} synced  "
+                        f"{result['records_per_second'] or 0:>8.1f} rec/s  "
+                        f"{result['calls_per_record'] or 0:>5.2f} calls/rec"
+                        f"{'  <-- per-record upstream calls' if result['flagged'] else ''}"
+                        f"{'  <-- truncated' if result['truncated'] else ''}"
+                    )
+    finally:
+        await session.close()
+        if args.clear_after:
+            await clear_links(conn)
+            await clear_customers(conn)
+        await conn.close()
+
+    history_run = record_run("erpnext-sync", samples, {"sizes": args.sizes, "latency": args.latency})
+    path = write_report("erpnext-sync", {"history_run": history_run, "results": results})
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel invoice sync requests")
+    parser.add_argument("--flag-calls", type=float, default=1.5, help="upstream calls per record that count as N+1")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--standin-host", default="127.0.0.1")
+    parser.add_argument("--standin-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--api-key")
+    parser.add_argument("--api-secret")
+    parser.add_argument("--clear-after", action="store_true", help="remove synced customers and invoice links")
+    add_fault_arguments(parser)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
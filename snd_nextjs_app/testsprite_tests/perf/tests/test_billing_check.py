@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from perf.billing_check import DAILY, MONTHLY, OPEN_END, WEEKLY, pair_up, reference
+
+
+def test_pair_up_matches_every_item_of_each_invoice_rental():
+    invoice, item = pair_up(np.array([5, 7, 5, 9]), np.array([5, 5, 7]))
+    assert invoice.tolist() == [0, 0, 1, 2, 2]
+    assert item.tolist() == [0, 1, 2, 0, 1]
+
+
+def test_pair_up_without_items():
+    invoice, item = pair_up(np.array([1, 2]), np.array([], dtype=np.int64))
+    assert invoice.tolist() == [] and item.tolist() == []
+
+
+def days(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def test_weekly_item_on_a_partial_period():
+    # March 2026: rental 1 has a weekly item from the 10th, rental 2 a daily
+    # and a monthly item running the whole month
+    invoices = {"rental_id": np.array([1, 2]), "start": days("2026-03-01", "2026-03-01"), "end": days("2026-03-31", "2026-03-31")}
+    items = {
+        "rental_id": np.array([1, 2, 2]),
+        "rate": np.array([WEEKLY, DAILY, MONTHLY]),
+        "unit_price": np.array([700.0, 100.0, 3100.0]),
+        "start": days("2026-03-10", "2026-02-01", "2026-02-01"),
+        "end": np.array([OPEN_END, OPEN_END, OPEN_END]),
+    }
+    expected = reference(invoices, items)
+
+    # service: 30 days, ceil(30 / 7) = 5 weeks; 30 daily units; ceil(30 / 30) = 1 month
+    assert expected["service_subtotal"].tolist() == [3500, 3000 + 3100]
+    # contract: 22 of 31 days of the weekly item; 31 days; the whole month
+    assert expected["contract_subtotal"] == pytest.approx([700 * 22 / 7, 3100 + 3100])
+    assert expected["service"] == pytest.approx([3500 * 1.15, 6100 * 1.15])
+    assert expected["contract"] == pytest.approx([2200 * 1.15, 6200 * 1.15])
+    assert expected["items"].tolist() == [1, 2]
+    assert expected["partial_item"].tolist() == [True, False]
+    assert expected["rounded_rate"].tolist() == [True, False]
+    assert expected["hourly"].tolist() == [False, False]
+
+
+def test_item_completed_before_the_period_bills_nothing_under_the_contract():
+    invoices = {"rental_id": np.array([1]), "start": days("2026-03-01"), "end": days("2026-03-31")}
+    items = {
+        "rental_id": np.array([1]),
+        "rate": np.array([DAILY]),
+        "unit_price": np.array([100.0]),
+        "start": days("2026-01-01"),
+        "end": days("2026-02-20"),
+    }
+    expected = reference(invoices, items)
+    assert expected["contract_subtotal"].tolist() == [0]
+    assert expected["service_subtotal"].tolist() == [3000]
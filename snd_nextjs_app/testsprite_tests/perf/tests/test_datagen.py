@@ -0,0 +1,84 @@
+import datetime
+
+import numpy as np
+
+from perf.datagen import (
+    OPERATOR_EVERY,
+    SEED_PREFIX,
+    Context,
+    build_rental_items,
+    build_rentals,
+    build_timesheets,
+    chunk_rng,
+    iter_chunks,
+)
+
+TODAY = datetime.date(2026, 10, 19)
+BASES = {"employees": 1000, "equipment": 2000, "customers": 3000, "rentals": 4000}
+
+
+def context(employees=50, timesheet_days=0):
+    counts = {"employees": employees, "equipment": 20, "customers": 10, "rentals": 100, "timesheet_days": timesheet_days}
+    return Context(7, TODAY, counts, BASES)
+
+
+def test_builders_are_reproducible():
+    ctx = context()
+    idx = np.arange(100)
+    first = build_rentals(ctx, chunk_rng(ctx.seed, "rentals", 0), idx)
+    second = build_rentals(ctx, chunk_rng(ctx.seed, "rentals", 0), idx)
+    assert all(np.array_equal(first[name], second[name]) for name in first)
+    assert first["rental_number"][3] == SEED_PREFIX + "R0000003"
+    assert first["id"][3] == "4003"
+
+
+def test_rental_items_follow_their_rentals():
+    ctx = context()
+    idx = np.arange(100)
+    rentals = build_rentals(ctx, chunk_rng(ctx.seed, "rentals", 0), idx)
+    items = build_rental_items(ctx, chunk_rng(ctx.seed, "rental_items", 0), idx)
+
+    owner = items.pop("_key")
+    assert np.array_equal(items["rental_id"], rentals["id"][owner])
+    # ISO dates compare as strings
+    assert (items["start_date"] >= rentals["start_date"][owner]).all()
+    assert (items["start_date"] <= rentals["expected_end_date"][owner]).all()
+    completed = rentals["status"][owner] == "completed"
+    assert np.array_equal(items["status"] == "completed", completed)
+    assert ((items["completed_date"] != "") == completed).all()
+
+
+def test_rental_item_operators_point_at_every_fifth_employee():
+    items = build_rental_items(context(employees=50), chunk_rng(7, "rental_items", 0), np.arange(100))
+    operators = items["operator_id"][items["operator_id"] != ""].astype(int) - BASES["employees"]
+    assert len(operators) > 0
+    assert (operators % OPERATOR_EVERY == 0).all()
+    assert ((operators >= 0) & (operators < 50)).all()
+
+
+def test_rental_items_without_employees_have_no_operators():
+    ctx = context(employees=0)
+    items = build_rental_items(ctx, chunk_rng(ctx.seed, "rental_items", 0), np.arange(100))
+    assert (items["operator_id"] == "").all()
+    # The other columns draw the same numbers with or without employees
+    with_employees = build_rental_items(context(), chunk_rng(ctx.seed, "rental_items", 0), np.arange(100))
+    assert np.array_equal(items["unit_price"], with_employees["unit_price"])
+
+
+def test_timesheets_leave_fridays_off():
+    ctx = context(timesheet_days=14)
+    sheets = build_timesheets(ctx, chunk_rng(ctx.seed, "timesheets", 0), np.arange(2 * 14))
+    fridays = np.array([datetime.date.fromisoformat(day).weekday() == 4 for day in sheets["date"]])
+    assert fridays.sum() == 4
+    assert (sheets["hours_worked"][fridays] == "0.00").all()
+    assert (sheets["overtime_hours"][sheets["hours_worked"] == "0.00"] == "0.00").all()
+    assert max(sheets["date"].tolist()) < str(TODAY)
+
+
+def test_iter_chunks_keeps_only_the_requested_rows():
+    ctx = context()
+    chunks = list(iter_chunks(ctx, "rentals", 10, 20))
+    assert len(chunks) == 1
+    assert chunks[0]["id"].tolist() == [str(BASES["rentals"] + i) for i in range(10, 20)]
+    items = list(iter_chunks(ctx, "rental_items", 10, 20))[0]
+    assert set(items["rental_id"].tolist()) == set(chunks[0]["id"].tolist())
@@ -0,0 +1,39 @@
+import asyncio
+import json
+import socket
+
+import aiohttp
+
+from perf.erpnext_standin import ERPNextStandIn
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def post(data=None, json_body=None, method="frappe.client.insert"):
+    async with ERPNextStandIn(port=free_port()) as standin, aiohttp.ClientSession() as session:
+        async with session.post(f"{standin.base_url}/api/method/{method}", data=data, json=json_body) as resp:
+            return resp.status, await resp.json(), standin.docs
+
+
+def test_form_encoded_insert_parses_the_doc_string():
+    doc = {"doctype": "Customer", "customer_name": "Acme Rentals"}
+    status, body, docs = asyncio.run(post(data={"doc": json.dumps(doc)}))
+    assert status == 200
+    assert body["message"]["doctype"] == "Customer"
+    assert body["message"]["customer_name"] == "Acme Rentals"
+    assert list(docs["Customer"]) == [body["message"]["name"]]
+
+
+def test_json_insert_with_a_doc_object():
+    status, body, _ = asyncio.run(post(json_body={"doc": {"doctype": "Item", "item_code": "EQ-1"}}))
+    assert (status, body["message"]["doctype"]) == (200, "Item")
+
+
+def test_doc_that_is_not_an_object_is_a_validation_error():
+    for form in ({"doc": "[1, 2]"}, {"doc": "not json"}):
+        status, body, _ = asyncio.run(post(data=form))
+        assert (status, body["exc_type"]) == (417, "ValidationError")
@@ -0,0 +1,47 @@
+import pytest
+
+from perf.history import bootstrap_delta, mann_whitney_u
+
+
+def test_mann_whitney_u_with_ties():
+    # Ranks: 1 -> 1, the three 2s -> 3, the two 3s -> 5.5, the two 4s -> 7.5.
+    # Candidate rank sum 3 + 5.5 + 7.5 + 7.5 = 23.5, so U = 23.5 - 4 x 5 / 2.
+    # Tie term 24 + 6 + 6 = 36: variance 16 / 12 x (9 - 36 / 56) = 11.142857,
+    # z = (|13.5 - 8| - 0.5) / sqrt(11.142857) = 1.49786, p = erfc(z / sqrt 2)
+    u, p_value = mann_whitney_u([1, 2, 2, 3], [2, 3, 4, 4])
+    assert u == 13.5
+    assert p_value == pytest.approx(0.13425, abs=1e-4)
+
+
+def test_mann_whitney_u_is_symmetric_in_p():
+    _, forward = mann_whitney_u([1, 2, 2, 3], [2, 3, 4, 4])
+    _, backward = mann_whitney_u([2, 3, 4, 4], [1, 2, 2, 3])
+    assert forward == pytest.approx(backward)
+
+
+def test_mann_whitney_u_without_spread_or_samples():
+    # All values tied: zero variance
+    assert mann_whitney_u([5, 5], [5, 5]) == (2.0, 1.0)
+    assert mann_whitney_u([], [1, 2]) == (None, 1.0)
+
+
+def test_mann_whitney_u_separated_samples():
+    u, p_value = mann_whitney_u(list(range(10)), list(range(100, 110)))
+    assert u == 100
+    assert p_value < 0.001
+
+
+def test_bootstrap_delta_of_constant_shift():
+    result = bootstrap_delta([5.0] * 10, [15.0] * 10, 50, iterations=200)
+    assert result == {"delta": 10.0, "low": 10.0, "high": 10.0}
+
+
+def test_bootstrap_delta_interval_contains_delta_and_is_seeded():
+    baseline = [10, 12, 11, 13, 12, 14, 10, 11]
+    candidate = [15, 17, 16, 18, 14, 16, 15, 19]
+    result = bootstrap_delta(baseline, candidate, 50, iterations=500)
+    # Medians 11.5 and 16
+    assert result["delta"] == 4.5
+    assert result["low"] <= result["delta"] <= result["high"]
+    assert result["low"] > 0
+    assert bootstrap_delta(baseline, candidate, 50, iterations=500) == result
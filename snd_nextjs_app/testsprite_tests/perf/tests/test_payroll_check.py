@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from perf.payroll_check import compare, days_in_month, divergences, reference, to_halalas
+
+
+def inputs(hours, overtime=None, basic=3000.0, allowances=(0.0, 0.0, 0.0), multiplier=np.nan, fixed=np.nan, advances=0.0):
+    """One employee per row of `hours`, every other column the same."""
+    hours = np.asarray(hours, dtype=float)
+    n = len(hours)
+    return {
+        "basic_salary": np.full(n, basic),
+        "food_allowance": np.full(n, allowances[0]),
+        "housing_allowance": np.full(n, allowances[1]),
+        "transport_allowance": np.full(n, allowances[2]),
+        "contract_hours_per_day": np.full(n, np.nan),
+        "overtime_rate_multiplier": np.full(n, multiplier),
+        "overtime_fixed_rate": np.full(n, fixed),
+        "hours": hours,
+        "overtime": np.zeros_like(hours) if overtime is None else np.asarray(overtime, dtype=float),
+        "advances": np.full(n, advances),
+    }
+
+
+def june(*absent):
+    """June 2026 (Fridays on the 5th, 12th, 19th, 26th): 8 hours a day except the given days."""
+    hours = np.full(30, 8.0)
+    hours[[day - 1 for day in absent]] = 0
+    return hours
+
+
+def test_to_halalas_rounds_half_away_from_zero():
+    assert to_halalas([1.005, -1.005, 2.675, 0.1 + 0.2, 12.344, 0]).tolist() == [101, -101, 268, 30, 1234, 0]
+
+
+def test_friday_between_present_days_is_not_absent():
+    expected = reference(inputs([june(5, 12, 19, 26)]), 0, 2026, 6)
+    assert expected["absent_days"].tolist() == [0]
+    assert expected["deductions"].tolist() == [0]
+
+
+def test_friday_between_absent_days_is_absent():
+    # Thursday 11th, Friday 12th and Saturday 13th off: 3 days at 3000 / 30
+    expected = reference(inputs([june(11, 12, 13)]), 0, 2026, 6)
+    assert expected["absent_days"].tolist() == [3]
+    assert expected["deductions"].tolist() == [300]
+    assert expected["final"].tolist() == [2700]
+
+
+def test_short_hours_are_deducted_at_the_hourly_rate():
+    hours = june()
+    hours[0] = 6
+    expected = reference(inputs([hours]), 0, 2026, 6)
+    # 2 hours short at 3000 / (30 x 8) = 12.5
+    assert expected["deductions"].tolist() == [25]
+
+
+def test_overtime_and_bonus():
+    overtime = np.zeros(30)
+    overtime[2] = 2
+    expected = reference(inputs([june()], [overtime]), 50, 2026, 6)
+    # 2 hours x 12.5 x 1.5 (multiplier unset)
+    assert expected["overtime"].tolist() == [37.5]
+    assert expected["final"].tolist() == [3000 + 37.5 + 50]
+
+
+def test_allowances_only_when_intended():
+    # The route never loads the allowances, so basic 3000 with housing 750 stays 3000
+    row = inputs([june()], allowances=(100.0, 750.0, 50.0))
+    assert reference(row, 0, 2026, 6)["final"].tolist() == [3000]
+    expected = reference(row, 0, 2026, 6, intended=("allowances_ignored",))
+    assert expected["allowances"].tolist() == [900]
+    assert expected["final"].tolist() == [3900]
+
+
+def test_advances_only_when_intended():
+    row = inputs([june()], advances=400.0)
+    expected = reference(row, 0, 2026, 6)
+    assert (expected["advances"].tolist(), expected["final"].tolist()) == ([0], [3000])
+    expected = reference(row, 0, 2026, 6, intended=("advances_not_deducted",))
+    assert (expected["advances"].tolist(), expected["final"].tolist()) == ([400], [2600])
+
+
+def test_divergences_report_the_rows_each_rule_moves():
+    row = inputs([june(), june(), june()])
+    row["housing_allowance"][0] = 750
+    row["advances"][1:] = [400, 100]
+    expected = reference(row, 0, 2026, 6)
+    assert divergences(row, 0, 2026, 6, expected) == {
+        "allowances_ignored": {"rows": 1, "total_halalas": 75000},
+        "advances_not_deducted": {"rows": 2, "total_halalas": -50000},
+        "fixed_rate_overtime": {"rows": 0, "total_halalas": 0},
+        "friday_month_edge": {"rows": 0, "total_halalas": 0},
+    }
+
+
+def test_fixed_rate_overtime_only_when_intended():
+    overtime = np.zeros(30)
+    overtime[2] = 3
+    row = inputs([june()], [overtime], multiplier=0.0, fixed=20.0)
+    # The route reads a 0 multiplier as 1.5: 3 x 12.5 x 1.5
+    assert reference(row, 0, 2026, 6)["overtime"].tolist() == [56.25]
+    assert reference(row, 0, 2026, 6, intended=("fixed_rate_overtime",))["overtime"].tolist() == [60]
+
+
+def test_friday_on_the_first_uses_the_same_month_day_number():
+    # May 2026 starts on a Friday; the 1st and 2nd are off, the 30th is worked.
+    # The route looks up "the 30th" for the Thursday before, finds it present
+    # and so does not count the Friday; the intended rule sees April 30th as
+    # absent and counts it.
+    hours = np.full(31, 8.0)
+    hours[[0, 1]] = 0
+    assert reference(inputs([hours]), 0, 2026, 5)["absent_days"].tolist() == [1]
+    assert reference(inputs([hours]), 0, 2026, 5, intended=("friday_month_edge",))["absent_days"].tolist() == [2]
+
+
+def test_compare_counts_mismatches_beyond_tolerance_for_known_employees():
+    expected = {
+        "basic": np.array([3000.0, 3000.0, 3000.0]),
+        "overtime": np.array([37.5, 37.5, 37.5]),
+        "deductions": np.array([0.0, 0.0, 0.0]),
+        "advances": np.array([0.0, 0.0, 0.0]),
+        "final": np.array([3037.5, 3037.5, 3037.5]),
+        "hours": np.array([200.0, 200.0, 200.0]),
+        "overtime_hours": np.array([2.0, 2.0, 2.0]),
+        "absent_days": np.array([0, 0, 0]),
+    }
+    matching = {
+        "base_salary": "3000.00",
+        "overtime_amount": "37.50",
+        "deduction_amount": "0.00",
+        "advance_deduction": None,
+        "final_amount": "3037.50",
+        "total_worked_hours": 200,
+        "overtime_hours": 2,
+    }
+    rows = [
+        {"id": 1, "employee_id": 10, **matching},
+        {"id": 2, "employee_id": 11, **matching, "overtime_amount": "37.55", "final_amount": "3037.51"},
+        {"id": 3, "employee_id": 12, **matching, "final_amount": "1.00"},
+    ]
+    result = compare(rows, expected, np.array([True, True, False]), tolerance=1, examples=5)
+
+    assert (result["rows"], result["matched"], result["mismatched"], result["unknown_employee"]) == (3, 1, 1, 1)
+    assert result["components"]["overtime_amount"] == {"mismatches": 1, "max_abs_halalas": 5, "total_halalas": 5}
+    # 1 halala off is within tolerance
+    assert result["components"]["final_amount"]["mismatches"] == 0
+    assert result["examples"] == [{
+        "payroll_id": 2,
+        "employee_id": 11,
+        "absent_days": 0,
+        "fields": {"overtime_amount": {"api": 3755, "reference": 3750, "diff": 5}},
+    }]
+
+
+@pytest.mark.parametrize("year, month", [(2026, 2), (2026, 3), (2024, 2)])
+def test_full_month_without_absences_pays_basic(year, month):
+    expected = reference(inputs([np.full(days_in_month(year, month), 8.0)]), 0, year, month)
+    assert expected["absent_days"].tolist() == [0]
+    assert expected["final"].tolist() == [3000]
@@ -0,0 +1,82 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from perf.settlement_check import reference, split_dates
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+def employee(basic=6000.0, allowances=1000.0, hire="2020-01-15", unpaid_from="2026-08", absent_days=0, absent_dim=30):
+    return {
+        "basic": np.array([basic]),
+        "allowances": np.array([allowances]),
+        "hire": np.array([hire], dtype="datetime64[D]"),
+        "unpaid_from": np.array([unpaid_from], dtype="datetime64[M]"),
+        "multiplier": np.array([1.5]),
+        "absent_days": np.array([absent_days]),
+        "absent_dim": absent_dim,
+    }
+
+
+def scenario(last_working, resignation=False, overtime_hours=0.0, overtime_amount=0.0, manual_unpaid=0.0, manual_absent=0):
+    return {
+        "employee": np.array([0]),
+        "last_working": np.array([last_working], dtype="datetime64[D]"),
+        "resignation": np.array([resignation]),
+        "overtime_hours": np.array([overtime_hours]),
+        "overtime_amount": np.array([overtime_amount]),
+        "manual_unpaid": np.array([manual_unpaid]),
+        "manual_absent": np.array([manual_absent], dtype=np.int64),
+    }
+
+
+def test_split_dates():
+    years, months, days = split_dates(np.array(["2024-02-29", "1999-12-31", "1970-01-01"], dtype="datetime64[D]"))
+    assert years.tolist() == [2024, 1999, 1970]
+    assert months.tolist() == [1, 11, 0]
+    assert days.tolist() == [29, 31, 1]
+
+
+@pytest.mark.parametrize("last_working, resignation, service, eos", [
+    # A day short of 2 years: 1 year 11 months 30 days (December has 31)
+    ("2022-01-14", False, (1, 11, 30), 3000 * 23 / 12),
+    ("2022-01-14", True, (1, 11, 30), 0),
+    # 2 years: half a month per year, a third of it on resignation
+    ("2022-01-15", False, (2, 0, 0), 6000),
+    ("2022-01-15", True, (2, 0, 0), 2000),
+    # 5 years: a full month per year from here on, two thirds on resignation
+    ("2025-01-15", False, (5, 0, 0), 15000),
+    ("2025-01-15", True, (5, 0, 0), 10000),
+    ("2025-07-15", False, (5, 6, 0), 18000),
+    # 10 years: the full amount either way
+    ("2030-01-15", False, (10, 0, 0), 45000),
+    ("2030-01-15", True, (10, 0, 0), 45000),
+])
+def test_end_of_service_around_thresholds(last_working, resignation, service, eos):
+    expected = reference(employee(), scenario(last_working, resignation, manual_unpaid=1), TODAY)
+    assert (expected["years"][0], expected["months"][0], expected["days"][0]) == service
+    assert expected["eos"][0] == pytest.approx(eos, abs=0.005)
+
+
+def test_unpaid_overtime_and_absences():
+    # August to October unpaid at basic + allowances; 10 hours over a
+    # 31-day last month at 6000 / 31 / 8 x 1.5; 2 counted absent days at 6000 / 30
+    expected = reference(employee(absent_days=2), scenario("2022-01-15", overtime_hours=10), TODAY)
+    assert expected["unpaid"][0] == 3 * 7000
+    assert expected["overtime"][0] == pytest.approx(10 * 6000 / 31 / 8 * 1.5)
+    assert (expected["absent_days"][0], expected["absent_deduction"][0]) == (2, 400)
+    assert expected["net"][0] == pytest.approx(21000 + 6000 + 10 * 6000 / 31 / 8 * 1.5 - 400)
+
+
+def test_manual_amounts_override_computed_ones():
+    expected = reference(
+        employee(absent_days=0),
+        scenario("2022-01-15", overtime_hours=10, overtime_amount=750, manual_unpaid=12000, manual_absent=3),
+        TODAY,
+    )
+    assert (expected["unpaid"][0], expected["overtime"][0]) == (12000, 750)
+    # Nothing counted, so the manual days go at basic / 30
+    assert (expected["absent_days"][0], expected["deductions"][0]) == (3, 600)
+    assert expected["gross"][0] == 12000 + 6000 + 750
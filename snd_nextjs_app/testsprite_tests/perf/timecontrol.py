@@ -0,0 +1,489 @@
+"""Clock control for the date-driven features: jump to month end or an expiry date.
+
+Iqama alerts (/api/employees/iqama-expiring, /api/dashboard/iqama), monthly
+billing (TC017) and the leave rules (TC021) read the calendar. Instead of
+waiting for the right day this moves two clocks together:
+
+- server: the app runs with perf/timewarp.cjs preloaded (NODE_OPTIONS
+  --require), which makes `new Date()` and `Date.now()` follow the clock file
+  (SND_CLOCK_FILE, default tmp/perf/clock.json). Rewriting the file moves
+  every server process within 50 ms, without a restart.
+- browser: every context a TC script opens gets Playwright's clock installed
+  at the same instant (context.clock.install), so the UI's today agrees with
+  the server's.
+
+PostgreSQL keeps real time: now() and CURRENT_DATE in SQL and in column
+defaults do not move. Auth.js tokens are checked against the moved clock, so
+the harness signs in again after every jump.
+
+Commands:
+    env           print the environment to start the app with
+    set           move the server clock (--at, --month-end, or --reset)
+    tc            run TC scripts with both clocks at --at / --month-end
+    iqama         for the --employees iqama expiries nearest today, jump to
+                  --days-before each expiry and to the day after it, and check
+                  the employee is listed as expiring, then expired, by both
+                  iqama routes
+    billing-year  make --rentals active rentals open-ended from --start, then
+                  jump to each of the next --months month ends and POST
+                  /api/billing/automated-monthly, checking every cycle bills
+                  exactly one period per rental
+
+tc, iqama and billing-year take --app-port to start a private `next start`
+with the preload in place (perf.dbsnapshot.AppInstance); otherwise start the
+app yourself with the output of `env`. billing-year rewrites the billing
+columns of the chosen rentals (restored afterwards) and creates invoices
+through ERPNext, so run it against a scratch database (perf.dbsnapshot) with
+the app pointed at perf.erpnext_standin.
+
+Usage:
+    python -m perf.timecontrol env
+    python -m perf.timecontrol set --month-end 2026-12
+    python -m perf.timecontrol tc --tests TC017,TC021 --month-end 2026-12
+    python -m perf.timecontrol iqama --employees 5 --days-before 7
+    python -m perf.timecontrol billing-year --rentals 50 --start 2027-01 --months 12
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from perf.common import RESULTS_DIR, TESTS_DIR, find_tc_scripts, load_config, open_session, write_report
+from perf.dbsnapshot import TC_ENDPOINT, AppInstance
+from perf.seed import connect, database_url
+
+CLOCK_FILE = Path(os.environ.get("SND_CLOCK_FILE", RESULTS_DIR / "clock.json"))
+PRELOAD = Path(__file__).resolve().parent / "timewarp.cjs"
+# The preload re-reads the clock file at most every 50 ms
+SETTLE_SECONDS = 0.15
+# Jumps land at this local hour: inside the day, clear of midnight in any nearby time zone
+JUMP_HOUR = 9
+MONTH_END_HOUR = 23
+
+
+def app_env(path=CLOCK_FILE):
+    """Environment that makes a `next start` follow the clock file."""
+    options = " ".join(filter(None, [os.environ.get("NODE_OPTIONS"), f"--require {PRELOAD}"]))
+    return {"NODE_OPTIONS": options, "SND_CLOCK_FILE": str(path)}
+
+
+class ServerClock:
+    """Writes the clock file the preloaded app reads."""
+
+    def __init__(self, path=CLOCK_FILE):
+        self.path = Path(path)
+
+    def set(self, when=None, frozen=False):
+        """Move the server to `when` (ticking on from there, or frozen); None is real time."""
+        if when is None:
+            data = {}
+        elif frozen:
+            data = {"fixed_ms": epoch_ms(when)}
+        else:
+            data = {"offset_ms": epoch_ms(when) - int(time.time() * 1000)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        staged = self.path.with_suffix(".tmp")
+        staged.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(staged, self.path)
+
+    async def travel(self, when=None, frozen=False):
+        self.set(when, frozen)
+        await asyncio.sleep(SETTLE_SECONDS)
+
+
+def epoch_ms(when):
+    return int(when.timestamp() * 1000)
+
+
+def parse_month(value):
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def add_months(year, month, count):
+    index = year * 12 + month - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def month_end(year, month, hour=MONTH_END_HOUR):
+    """Local time on the last day of the month."""
+    next_year, next_month = add_months(year, month, 1)
+    last = datetime.date(next_year, next_month, 1) - datetime.timedelta(days=1)
+    return datetime.datetime.combine(last, datetime.time(hour))
+
+
+def at_day(day, hour=JUMP_HOUR):
+    return datetime.datetime.combine(day, datetime.time(hour))
+
+
+def resolve_time(args):
+    if args.month_end:
+        return month_end(*parse_month(args.month_end))
+    return datetime.datetime.fromisoformat(args.at)
+
+
+def install(at_ms):
+    """Wrap Browser.new_context so every context the script opens starts at at_ms."""
+    from playwright import async_api
+
+    original = async_api.Browser.new_context
+
+    async def new_context(self, *args, **kwargs):
+        context = await original(self, *args, **kwargs)
+        # A number is taken as epoch seconds
+        await context.clock.install(time=at_ms / 1000)
+        return context
+
+    async_api.Browser.new_context = new_context
+
+
+@contextlib.asynccontextmanager
+async def app_for(args):
+    """Base URL of the app under the moved clock, starting one when --app-port is given."""
+    if not args.app_port:
+        yield load_config()["base_url"]
+        return
+    app = AppInstance(args.app_port, database_url(), env=app_env())
+    await app.start()
+    try:
+        yield app.base_url
+    finally:
+        await app.stop()
+
+
+async def request_json(session, method, url, params=None):
+    async with session.request(method, url, params=params) as resp:
+        status = resp.status
+        try:
+            data = await resp.json(content_type=None)
+        except ValueError:
+            data = None
+    return status, data
+
+
+async def run_tc(args):
+    at = resolve_time(args)
+    clock = ServerClock()
+    results = {}
+    failures = 0
+    async with app_for(args) as base_url:
+        try:
+            for script in find_tc_scripts(args.tests.split(",")):
+                await clock.travel(at)
+                started = time.perf_counter()
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable, "-m", "perf.timecontrol", "exec",
+                    "--at-ms", str(epoch_ms(at)), "--base-url", base_url, str(script),
+                    cwd=str(TESTS_DIR),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                )
+                output, _ = await proc.communicate()
+                seconds = time.perf_counter() - started
+                passed = proc.returncode == 0
+                failures += not passed
+                results[script.stem] = {"passed": passed, "seconds": seconds}
+                print(f"{script.stem}: {'passed' if passed else 'failed'} at {at:%Y-%m-%d %H:%M} in {seconds:.1f}s")
+                if not passed and args.verbose:
+                    print(output.decode("utf-8", "replace"))
+        finally:
+            clock.set(None)
+    path = write_report("clock-tc", {"at": at.isoformat(), "tests": results})
+    print(f"Report written to {path}")
+    return 1 if failures else 0
+
+
+def exec_script(args):
+    install(args.at_ms)
+    source = Path(args.script).read_text(encoding="utf-8").replace(TC_ENDPOINT, args.base_url)
+    sys.argv = [args.script]
+    exec(compile(source, args.script, "exec"), {"__name__": "__main__", "__file__": args.script})
+
+
+async def iqama_listing(session, base_url, employee, past, window, dashboard_limit):
+    """The employee's status and days remaining as each iqama route reports them."""
+    params = {"days": str(window), "search": employee["file_number"], "limit": "100"}
+    if past:
+        params["range"] = "past"
+    status, data = await request_json(session, "GET", f"{base_url}/api/employees/iqama-expiring", params)
+    rows = (data or {}).get("data") or [] if status == 200 else []
+    listed = next((row for row in rows if row.get("id") == employee["id"]), None)
+
+    status, data = await request_json(session, "GET", f"{base_url}/api/dashboard/iqama", {"limit": str(dashboard_limit)})
+    cards = (data or {}).get("iqamaData") or [] if status == 200 else []
+    card = next((row for row in cards if row.get("id") == employee["id"]), None)
+    return {
+        "iqama_expiring": {"status": listed["status"], "days_remaining": listed["days_remaining"]} if listed else None,
+        "dashboard": {"status": card["status"], "days_remaining": card["daysRemaining"]} if card else None,
+        # An empty dashboard list means the user lacks manage:Iqama, not a missing alert
+        "dashboard_permitted": bool(cards),
+    }
+
+
+def iqama_failures(seen, expected_status, expected_days):
+    failures = []
+    for route in ("iqama_expiring", "dashboard"):
+        entry = seen[route]
+        if route == "dashboard" and not seen["dashboard_permitted"]:
+            continue
+        if entry is None:
+            failures.append(f"{route}: not listed")
+        elif entry["status"] != expected_status or entry["days_remaining"] != expected_days:
+            failures.append(f"{route}: {entry['status']} {entry['days_remaining']}d")
+    return failures
+
+
+async def run_iqama(args):
+    config = load_config()
+    clock = ServerClock()
+    conn = await connect()
+    try:
+        employees = await conn.fetch(
+            """
+            SELECT id, file_number, iqama_expiry FROM employees
+            WHERE status = 'active' AND iqama_expiry IS NOT NULL AND file_number IS NOT NULL
+            ORDER BY abs(iqama_expiry - CURRENT_DATE), id
+            LIMIT $1
+            """,
+            args.employees,
+        )
+    finally:
+        await conn.close()
+    if not employees:
+        print("No active employee has an iqama expiry")
+        return 0
+
+    checks = []
+    failed = 0
+    started = time.perf_counter()
+    async with app_for(args) as base_url:
+        config["base_url"] = base_url
+        try:
+            for employee in employees:
+                expiry = employee["iqama_expiry"]
+                jumps = [
+                    ("before", expiry - datetime.timedelta(days=args.days_before), False, "expiring", args.days_before),
+                    ("after", expiry + datetime.timedelta(days=1), True, "expired", -1),
+                ]
+                for label, day, past, expected_status, expected_days in jumps:
+                    await clock.travel(at_day(day))
+                    session, _ = await open_session(config, limit=2)
+                    try:
+                        seen = await iqama_listing(session, base_url, employee, past, args.window, args.dashboard_limit)
+                    finally:
+                        await session.close()
+                    problems = iqama_failures(seen, expected_status, expected_days)
+                    failed += bool(problems)
+                    checks.append({
+                        "employee_id": employee["id"],
+                        "file_number": employee["file_number"],
+                        "iqama_expiry": expiry.isoformat(),
+                        "jump": label,
+                        "server_time": at_day(day).isoformat(),
+                        "expected": {"status": expected_status, "days_remaining": expected_days},
+                        **seen,
+                        "failures": problems,
+                    })
+                    print(
+                        f"{employee['file_number']:<14} expiry {expiry}  at {day}  expect {expected_status:<8}  "
+                        + ("ok" if not problems else "; ".join(problems))
+                    )
+        finally:
+            clock.set(None)
+    seconds = time.perf_counter() - started
+
+    path = write_report(
+        "clock-iqama",
+        {"days_before": args.days_before, "window_days": args.window, "seconds": seconds,
+         "checks": checks, "failed": failed},
+    )
+    print(f"{len(checks)} jumps, {failed} failed, {seconds:.1f}s")
+    print(f"Report written to {path}")
+    return 1 if failed else 0
+
+
+async def billing_cycle(config, base_url, rental_ids, year, month):
+    session, _ = await open_session(config, limit=2)
+    try:
+        started = time.perf_counter()
+        status, data = await request_json(session, "POST", f"{base_url}/api/billing/automated-monthly")
+        seconds = time.perf_counter() - started
+    finally:
+        await session.close()
+    body = (data or {}).get("data") or {}
+    invoices = body.get("invoices") or []
+    ours = set(rental_ids)
+    per_rental = Counter(invoice.get("rentalId") for invoice in invoices if invoice.get("rentalId") in ours)
+    month_prefix = f"{year:04d}-{month:02d}"
+    off_month = sum(
+        1 for invoice in invoices
+        if invoice.get("rentalId") in ours
+        and not str((invoice.get("billingPeriod") or {}).get("startDate", "")).startswith(month_prefix)
+    )
+    return {
+        "status": status,
+        "seconds": seconds,
+        "invoices": len(invoices),
+        "errors": len(body.get("errors") or []),
+        "billed": len(per_rental),
+        "missing": len(ours) - len(per_rental),
+        "duplicated": sum(1 for count in per_rental.values() if count > 1),
+        "outside_month": off_month,
+    }
+
+
+async def run_billing_year(args):
+    config = load_config()
+    clock = ServerClock()
+    year, month = parse_month(args.start)
+    first = datetime.date(year, month, 1)
+    conn = await connect()
+    original = await conn.fetch(
+        """
+        SELECT r.id, r.start_date, r.expected_end_date, r.last_invoice_date, r.last_invoice_id,
+               r.last_invoice_amount, r.outstanding_amount
+        FROM rentals r
+        WHERE r.status = 'active' AND EXISTS (SELECT 1 FROM rental_items i WHERE i.rental_id = r.id)
+        ORDER BY r.id
+        LIMIT $1
+        """,
+        args.rentals,
+    )
+    rental_ids = [row["id"] for row in original]
+    if not rental_ids:
+        await conn.close()
+        print("No active rental with items to bill")
+        return 0
+    await conn.execute(
+        """
+        UPDATE rentals SET start_date = $2, expected_end_date = NULL, last_invoice_date = NULL,
+                           last_invoice_id = NULL, last_invoice_amount = NULL
+        WHERE id = ANY($1::int[])
+        """,
+        rental_ids, first,
+    )
+
+    cycles = []
+    started = time.perf_counter()
+    try:
+        async with app_for(args) as base_url:
+            config["base_url"] = base_url
+            try:
+                for step in range(args.months):
+                    cycle_year, cycle_month = add_months(year, month, step)
+                    at = month_end(cycle_year, cycle_month)
+                    await clock.travel(at)
+                    result = await billing_cycle(config, base_url, rental_ids, cycle_year, cycle_month)
+                    result["stamped"] = await conn.fetchval(
+                        "SELECT count(*) FROM rentals WHERE id = ANY($1::int[]) AND last_invoice_date = $2",
+                        rental_ids, at.date(),
+                    )
+                    result.update(month=f"{cycle_year:04d}-{cycle_month:02d}", server_time=at.isoformat())
+                    result["ok"] = (
+                        result["status"] == 200 and not result["missing"] and not result["duplicated"]
+                        and not result["outside_month"] and result["stamped"] == len(rental_ids)
+                    )
+                    cycles.append(result)
+                    print(
+                        f"{result['month']}  {result['status']}  {result['seconds']:>7.2f}s  "
+                        f"billed {result['billed']:>5}/{len(rental_ids)}  dup {result['duplicated']:>3}  "
+                        f"off-month {result['outside_month']:>3}  stamped {result['stamped']:>5}  "
+                        f"{'ok' if result['ok'] else 'MISMATCH'}"
+                    )
+            finally:
+                clock.set(None)
+    finally:
+        await conn.executemany(
+            """
+            UPDATE rentals SET start_date = $2, expected_end_date = $3, last_invoice_date = $4,
+                               last_invoice_id = $5, last_invoice_amount = $6, outstanding_amount = $7
+            WHERE id = $1
+            """,
+            [tuple(row.values()) for row in original],
+        )
+        await conn.close()
+    seconds = time.perf_counter() - started
+
+    failed = sum(1 for cycle in cycles if not cycle["ok"])
+    path = write_report(
+        "clock-billing-year",
+        {"start": args.start, "months": args.months, "rentals": len(rental_ids), "seconds": seconds,
+         "cycles": cycles, "failed_cycles": failed},
+    )
+    print(f"{len(cycles)} billing cycles for {len(rental_ids)} rentals in {seconds:.1f}s, {failed} with mismatches")
+    print(f"Report written to {path}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("env")
+
+    def add_time(command):
+        when = command.add_mutually_exclusive_group(required=True)
+        when.add_argument("--at", help="local ISO date-time, e.g. 2026-12-31T09:00")
+        when.add_argument("--month-end", help="YYYY-MM, jumps to 23:00 on its last day")
+        return when
+
+    setting = sub.add_parser("set")
+    add_time(setting).add_argument("--reset", action="store_true", help="back to real time")
+    setting.add_argument("--frozen", action="store_true", help="stop the server clock instead of letting it tick")
+
+    tc = sub.add_parser("tc")
+    add_time(tc)
+    tc.add_argument("--tests", required=True, help="comma separated TC ids")
+    tc.add_argument("--verbose", action="store_true", help="print the output of failed runs")
+
+    iqama = sub.add_parser("iqama")
+    iqama.add_argument("--employees", type=int, default=5)
+    iqama.add_argument("--days-before", type=int, default=7, help="days before expiry for the first jump (<= 30)")
+    iqama.add_argument("--window", type=int, default=30, help="days= passed to /api/employees/iqama-expiring")
+    iqama.add_argument("--dashboard-limit", type=int, default=100000, help="limit= passed to /api/dashboard/iqama")
+
+    billing = sub.add_parser("billing-year")
+    next_year, next_month = add_months(datetime.date.today().year, datetime.date.today().month, 1)
+    billing.add_argument("--start", default=f"{next_year:04d}-{next_month:02d}", help="YYYY-MM of the first cycle")
+    billing.add_argument("--months", type=int, default=12)
+    billing.add_argument("--rentals", type=int, default=50)
+
+    for command in (tc, iqama, billing):
+        command.add_argument("--app-port", type=int, help="start a private app with the clock preload on this port")
+
+    executing = sub.add_parser("exec", help=argparse.SUPPRESS)
+    executing.add_argument("--at-ms", type=int, required=True)
+    executing.add_argument("--base-url", default=TC_ENDPOINT)
+    executing.add_argument("script")
+
+    args = parser.parse_args()
+    if args.command == "env":
+        for key, value in app_env().items():
+            print(f"{key}='{value}'")
+    elif args.command == "set":
+        clock = ServerClock()
+        if args.reset:
+            clock.set(None)
+            print("Server clock back to real time")
+        else:
+            at = resolve_time(args)
+            clock.set(at, args.frozen)
+            print(f"Server clock {'frozen' if args.frozen else 'running'} from {at:%Y-%m-%d %H:%M}")
+    elif args.command == "tc":
+        raise SystemExit(asyncio.run(run_tc(args)))
+    elif args.command == "iqama":
+        raise SystemExit(asyncio.run(run_iqama(args)))
+    elif args.command == "billing-year":
+        raise SystemExit(asyncio.run(run_billing_year(args)))
+    else:
+        exec_script(args)
+
+
+if __name__ == "__main__":
+    main()
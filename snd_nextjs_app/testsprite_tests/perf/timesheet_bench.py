@@ -0,0 +1,289 @@
+"""Bulk timesheet submission at growing payload sizes.
+
+Supervisors post a whole site's month in one go. For every payload size this
+sends that many timesheet rows (seeded employees x consecutive days, dated
+well in the future so nothing collides with existing data) to
+
+    bulk        POST /api/timesheets/bulk        {"timesheets": [row, ...]}
+    bulk-split  POST /api/timesheets/bulk-split  {"assignments": [one per
+                employee with date_from/date_to covering its days]}
+
+and records latency, rows per second, statements per row (perf.pgstats), the
+server's peak RSS growth, and Postgres lock waits sampled from
+pg_stat_activity while the request runs. --parallel sends that many such
+requests at once (disjoint rows) to see whether concurrent submissions block
+each other.
+
+Each size is then repeated with one row in the middle pointing at an employee
+that does not exist, and the rows left behind classify the transaction
+behaviour: atomic (nothing kept), per-row (every other row kept) or partial
+(the request stopped at the bad row and kept what came before it).
+
+The knee is the first size whose rows/s falls below --knee-ratio of the best
+rows/s seen at smaller sizes, or whose request fails outright.
+
+All rows carry the description perf-bulk and are deleted after every run.
+
+Usage:
+    python -m perf.timesheet_bench --sizes 100,1000,10000 --parallel 1
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+
+from perf import pgstats
+from perf.common import ProcessSampler, load_config, open_session, parse_levels, server_pid, summarize, write_report
+from perf.history import record_run
+from perf.seed import SEED_PREFIX, connect, seed_scale
+
+ENDPOINTS = {
+    "bulk": "/api/timesheets/bulk",
+    "bulk-split": "/api/timesheets/bulk-split",
+}
+
+TAG = "perf-bulk"
+DAYS_PER_EMPLOYEE = 30
+# Far enough ahead that no generated or seeded timesheet exists there
+START_OFFSET_DAYS = 400
+MISSING_EMPLOYEE = 2_147_000_000
+
+
+def plan_rows(size, employee_ids, start):
+    """(employee_id, date) pairs: consecutive days per employee, employee by employee."""
+    rows = []
+    for i in range(size):
+        employee, day = divmod(i, DAYS_PER_EMPLOYEE)
+        rows.append((employee_ids[employee], start + datetime.timedelta(days=day)))
+    return rows
+
+
+def bulk_payload(rows):
+    now = datetime.date.today().isoformat()
+    return {
+        "timesheets": [
+            {
+                "employeeId": employee_id,
+                "date": day.isoformat(),
+                "startTime": f"{day.isoformat()} 07:00:00",
+                "hoursWorked": "8",
+                "overtimeHours": "1",
+                "status": "draft",
+                "description": TAG,
+                "updatedAt": now,
+            }
+            for employee_id, day in rows
+        ]
+    }
+
+
+def split_payload(rows):
+    ranges = {}
+    for employee_id, day in rows:
+        first, last = ranges.get(employee_id, (day, day))
+        ranges[employee_id] = (min(first, day), max(last, day))
+    return {
+        "assignments": [
+            {
+                "employee_id": employee_id,
+                "date_from": first.isoformat(),
+                "date_to": last.isoformat(),
+                "hours_worked": "8",
+                "overtime_hours": "1",
+                "description": TAG,
+            }
+            for employee_id, (first, last) in ranges.items()
+        ]
+    }
+
+
+def with_bad_row(endpoint, payload):
+    """Copy of the payload with an unknown employee in the middle; returns (payload, rows before it)."""
+    key = "timesheets" if endpoint == "bulk" else "assignments"
+    items = list(payload[key])
+    middle = len(items) // 2
+    bad = dict(items[middle])
+    if endpoint == "bulk":
+        bad["employeeId"] = MISSING_EMPLOYEE
+        before = middle
+    else:
+        bad.update(employee_id=MISSING_EMPLOYEE, date_to=bad["date_from"])
+        before = sum(
+            (datetime.date.fromisoformat(a["date_to"]) - datetime.date.fromisoformat(a["date_from"])).days + 1
+            for a in items[:middle]
+        )
+    items.insert(middle, bad)
+    return {key: items}, before
+
+
+def classify(kept, rows, before):
+    if kept == 0:
+        return "atomic"
+    if kept == rows:
+        return "per-row"
+    if kept == before:
+        return "partial"
+    return "inconsistent"
+
+
+async def employees_for(conn, count, seed):
+    await seed_scale(conn, employees=count, seed=seed)
+    rows = await conn.fetch(
+        "SELECT id FROM employees WHERE file_number LIKE $1 ORDER BY id LIMIT $2", SEED_PREFIX + "E%", count
+    )
+    return [row["id"] for row in rows]
+
+
+async def kept_rows(conn):
+    return await conn.fetchval("SELECT count(*) FROM timesheets WHERE description = $1", TAG)
+
+
+async def clear_rows(conn):
+    await conn.execute("DELETE FROM timesheets WHERE description = $1", TAG)
+
+
+async def submit(session, url, payloads):
+    """Post the payloads concurrently; returns [(status, body, ms)]."""
+
+    async def one(payload):
+        started = time.perf_counter()
+        async with session.post(url, json=payload) as resp:
+            body = await resp.read()
+            status = resp.status
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        return status, data, (time.perf_counter() - started) * 1000
+
+    return await asyncio.gather(*(one(payload) for payload in payloads))
+
+
+async def run_size(session, url, endpoint, conn, watcher, counting, pid, size, batches):
+    build = bulk_payload if endpoint == "bulk" else split_payload
+    payloads = [build(rows) for rows in batches]
+    total = size * len(batches)
+
+    await clear_rows(conn)
+    if counting:
+        await pgstats.reset(conn)
+    async with ProcessSampler(pid) as sampler, pgstats.LockSampler(watcher) as locks:
+        started = time.perf_counter()
+        responses = await submit(session, url, payloads)
+        seconds = time.perf_counter() - started
+    queries = await pgstats.snapshot(conn, top=3) if counting else None
+    kept = await kept_rows(conn)
+
+    await clear_rows(conn)
+    bad_payload, before = with_bad_row(endpoint, payloads[0])
+    [(bad_status, bad_data, bad_ms)] = await submit(session, url, [bad_payload])
+    bad_kept = await kept_rows(conn)
+    await clear_rows(conn)
+
+    statuses = {}
+    for status, _, _ in responses:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "endpoint": endpoint,
+        "rows": size,
+        "parallel": len(batches),
+        "statuses": statuses,
+        "latency_ms": summarize([ms for _, _, ms in responses]),
+        "seconds": seconds,
+        "persisted": kept,
+        "rows_per_second": kept / seconds if seconds else None,
+        "statements_per_row": queries["calls"] / total if queries and total else None,
+        "queries": queries,
+        "locks": locks.summary(),
+        "server": sampler.summary(),
+        "one_bad_row": {
+            "status": bad_status,
+            "response": {k: v for k, v in (bad_data or {}).items() if k != "errors"} if isinstance(bad_data, dict) else None,
+            "latency_ms": bad_ms,
+            "kept": bad_kept,
+            "rows_before_bad_row": before,
+            "behaviour": classify(bad_kept, size, before),
+        },
+    }, [ms for _, _, ms in responses]
+
+
+def find_knee(rows, ratio):
+    best = None
+    for result in rows:
+        failed = any(status != 200 for status in result["statuses"]) or result["persisted"] < result["rows"] * result["parallel"]
+        rate = result["rows_per_second"] or 0
+        if failed or (best and rate < best * ratio):
+            return {"rows": result["rows"], "rows_per_second": rate, "best_before": best, "failed": failed}
+        best = max(best or 0, rate)
+    return None
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    sizes = parse_levels(args.sizes)
+    endpoints = args.endpoints.split(",")
+    conn = await connect()
+    watcher = await connect()
+    counting = await pgstats.available(conn)
+    if not counting:
+        print("pg_stat_statements is not available; statements per row will be missing")
+    session, _ = await open_session(config, limit=max(args.parallel, 2))
+    start = datetime.date.today() + datetime.timedelta(days=START_OFFSET_DAYS)
+    per_batch = math.ceil(max(sizes) / DAYS_PER_EMPLOYEE)
+    results = {}
+    samples = {}
+    try:
+        employee_ids = await employees_for(conn, per_batch * args.parallel, args.seed)
+        for endpoint in endpoints:
+            rows = []
+            for size in sizes:
+                batches = [
+                    plan_rows(size, employee_ids[b * per_batch:(b + 1) * per_batch], start) for b in range(args.parallel)
+                ]
+                result, latencies = await run_size(
+                    session, base_url + ENDPOINTS[endpoint], endpoint, conn, watcher, counting, pid, size, batches
+                )
+                rows.append(result)
+                samples[f"{endpoint} {size}x{args.parallel}"] = latencies
+                spr = result["statements_per_row"]
+                print(
+                    f"{endpoint:<10} {size:>6} rows x{args.parallel}  p50 {result['latency_ms'].get('p50', 0):>9.0f} ms  "
+                    f"{result['rows_per_second'] or 0:>8.0f} rows/s  "
+                    f"{'-' if spr is None else f'{spr:.1f}':>4} stmt/row  "
+                    f"lock waits {result['locks']['lock_wait_ms']:>6.0f} ms  "
+                    f"bad row -> {result['one_bad_row']['status']} {result['one_bad_row']['behaviour']}"
+                )
+            knee = find_knee(rows, args.knee_ratio)
+            results[endpoint] = {"levels": rows, "knee": knee}
+            if knee:
+                print(f"{endpoint:<10} stops scaling at {knee['rows']} rows" + (" (request failed)" if knee["failed"] else ""))
+    finally:
+        await session.close()
+        await clear_rows(conn)
+        await watcher.close()
+        await conn.close()
+
+    history_run = record_run("timesheet-bulk", samples, {"sizes": args.sizes, "parallel": args.parallel})
+    path = write_report(
+        "timesheet-bulk",
+        {"history_run": history_run, "server_pid": pid, "pg_stat_statements": counting, "endpoints": results},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000", help="timesheet rows per request")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--parallel", type=int, default=1, help="concurrent requests per size, disjoint rows")
+    parser.add_argument("--knee-ratio", type=float, default=0.7, help="rows/s drop against the best so far that marks the knee")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
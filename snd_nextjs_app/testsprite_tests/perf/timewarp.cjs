@@ -0,0 +1,73 @@
+/**
+ * Server clock override for the perf harnesses (perf/timecontrol.py).
+ *
+ * Preloaded into the app with NODE_OPTIONS="--require .../timewarp.cjs". When
+ * SND_CLOCK_FILE is set, `new Date()`, `Date()` and `Date.now()` follow that
+ * file instead of the system clock:
+ *
+ *   {"offset_ms": n}   real time shifted by n ms, still ticking
+ *   {"fixed_ms": n}    frozen at epoch n ms
+ *   {} or no file      real time
+ *
+ * The file is re-checked at most every POLL_MS, so every server process picks
+ * up a jump without a restart. Dates built from explicit arguments are left
+ * alone.
+ */
+'use strict';
+
+const fs = require('fs');
+
+const file = process.env.SND_CLOCK_FILE;
+const POLL_MS = 50;
+
+if (file) {
+  const RealDate = Date;
+  const realNow = RealDate.now;
+  let checkedAt = -Infinity;
+  let version = null;
+  let offset = 0;
+  let fixed = null;
+
+  const refresh = real => {
+    checkedAt = real;
+    let stat;
+    try {
+      stat = fs.statSync(file);
+    } catch {
+      version = null;
+      offset = 0;
+      fixed = null;
+      return;
+    }
+    // The harness replaces the file atomically, so a new inode or mtime is a new clock
+    const current = `${stat.ino}:${stat.mtimeMs}`;
+    if (current === version) return;
+    try {
+      const text = fs.readFileSync(file, 'utf8').trim();
+      const clock = text ? JSON.parse(text) : {};
+      offset = Number(clock.offset_ms) || 0;
+      fixed = clock.fixed_ms == null ? null : Number(clock.fixed_ms);
+      version = current;
+    } catch {
+      // Unreadable for a moment; keep the previous clock and try again next poll
+    }
+  };
+
+  const now = () => {
+    const real = realNow();
+    if (real - checkedAt >= POLL_MS) refresh(real);
+    return fixed === null ? real + offset : fixed;
+  };
+
+  globalThis.Date = new Proxy(RealDate, {
+    construct(target, args, newTarget) {
+      return Reflect.construct(target, args.length ? args : [now()], newTarget);
+    },
+    apply() {
+      return new RealDate(now()).toString();
+    },
+    get(target, key, receiver) {
+      return key === 'now' ? now : Reflect.get(target, key, receiver);
+    },
+  });
+}
@@ -0,0 +1,234 @@
+"""Concurrent document upload benchmark against the S3 stand-in.
+
+Pushes 1-10 MB PDFs and images (TC005 allows up to 10 MB) at growing
+concurrency to
+
+    upload      POST /api/upload (type=employee)
+    equipment   POST /api/equipment/[id]/documents
+    customers   POST /api/customers/[id]/documents
+
+and records per target and level: latency, upload throughput in MB/s, the
+server's peak RSS growth and CPU time, and what reached storage according to
+perf.s3_standin (objects, bytes, single PUT vs multipart).
+
+Two signals show whether the app buffers a file before passing it on:
+
+- rss_per_inflight_mb: peak RSS growth divided by the bytes in flight; about
+  1x or more means every in-flight file sits in memory (more than once)
+- storage_lag_ms, measured at concurrency 1: when the first byte reached the
+  stand-in relative to when the client finished sending; positive means the
+  whole request was received before storage saw anything
+
+The app must be started with S3_ENDPOINT pointing at the stand-in (default
+http://127.0.0.1:9010) and some AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY.
+Uploaded documents are named perf-upload-* so they can be told apart.
+
+Usage:
+    python -m perf.upload_bench --levels 1,4,8,16 --uploads 32 --targets upload,equipment
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import aiohttp
+
+from perf.common import (
+    ProcessSampler,
+    load_config,
+    open_session,
+    parse_levels,
+    server_pid,
+    summarize,
+    write_report,
+)
+from perf.history import record_run
+from perf.s3_standin import DEFAULT_PORT, S3StandIn
+
+TARGETS = {
+    "upload": "/api/upload",
+    "equipment": "/api/equipment/{id}/documents",
+    "customers": "/api/customers/{id}/documents",
+}
+
+MB = 1024 * 1024
+PDF_HEAD = b"%%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\n2 0 obj\n<< /Length %010d >>\nstream\n"
+PDF_TAIL = b"\nendstream\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n"
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+JPEG_HEAD = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+
+
+def make_file(kind, size):
+    """A file of exactly `size` bytes with the right magic; the rest is incompressible noise."""
+    if kind == "pdf":
+        # Fixed-width /Length keeps the header size independent of the value
+        filler = max(size - len(PDF_HEAD % 0) - len(PDF_TAIL), 0)
+        return "application/pdf", "pdf", PDF_HEAD % filler + os.urandom(filler) + PDF_TAIL
+    if kind == "png":
+        return "image/png", "png", PNG_HEAD + os.urandom(size - len(PNG_HEAD))
+    return "image/jpeg", "jpg", JPEG_HEAD + os.urandom(size - len(JPEG_HEAD) - 2) + b"\xff\xd9"
+
+
+def make_corpus(count, min_mb, max_mb, seed):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        kind = rng.choice(["pdf", "pdf", "png", "jpg"])
+        size = int(rng.uniform(min_mb, max_mb) * MB)
+        corpus.append((f"perf-upload-{i}",) + make_file(kind, size))
+    return corpus
+
+
+def form_for(target, name, content_type, extension, body):
+    form = aiohttp.FormData()
+    form.add_field("file", body, filename=f"{name}.{extension}", content_type=content_type)
+    if target == "upload":
+        form.add_field("type", "employee")
+    else:
+        form.add_field("document_type", "general")
+        form.add_field("document_name", name)
+        form.add_field("description", "perf upload benchmark")
+    return form
+
+
+async def first_id(session, base_url, path):
+    async with session.get(f"{base_url}{path}") as resp:
+        data = await resp.json()
+    rows = data.get("data") or data.get("customers") or data.get("equipment") or []
+    if isinstance(rows, dict):
+        rows = rows.get("data") or []
+    return rows[0]["id"] if rows else None
+
+
+def upload_session(session, limit):
+    """A session sharing the login cookies that notes when each request body finished sending."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_chunk_sent(_session, context, _params):
+        context.trace_request_ctx["sent"] = time.monotonic()
+
+    trace.on_request_chunk_sent.append(on_chunk_sent)
+    return aiohttp.ClientSession(
+        cookie_jar=session.cookie_jar,
+        connector=aiohttp.TCPConnector(limit=limit),
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=30),
+        trace_configs=[trace],
+    )
+
+
+async def upload_level(session, url, target, corpus, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    timings = []
+    statuses = {}
+
+    async def one(name, content_type, extension, body):
+        async with semaphore:
+            started = time.monotonic()
+            trace = {"sent": None}
+            form = form_for(target, name, content_type, extension, body)
+            async with session.post(url, data=form, trace_request_ctx=trace) as resp:
+                await resp.read()
+                status = resp.status
+            finished = time.monotonic()
+        latencies.append((finished - started) * 1000)
+        timings.append((started, trace["sent"] or started, finished))
+        statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(*item) for item in corpus))
+    return latencies, timings, statuses, time.monotonic() - started
+
+
+async def run_benchmark(args):
+    config = load_config()
+    base_url = config["base_url"]
+    pid = server_pid(config)
+    corpus = make_corpus(args.uploads, args.min_mb, args.max_mb, args.seed)
+    total_bytes = sum(len(item[3]) for item in corpus)
+    avg_bytes = total_bytes / len(corpus)
+    session, _ = await open_session(config, limit=4)
+    uploader = upload_session(session, max(parse_levels(args.levels)))
+    targets = args.targets.split(",")
+    results = []
+    samples = {}
+    try:
+        ids = {
+            "equipment": args.equipment_id or await first_id(session, base_url, "/api/equipment?page=1&limit=1"),
+            "customers": args.customer_id or await first_id(session, base_url, "/api/customers?page=1&limit=1"),
+        }
+        async with S3StandIn(args.standin_host, args.standin_port, keep_bodies=False) as standin:
+            for target in targets:
+                url = base_url + TARGETS[target].format(id=ids.get(target))
+                for level in parse_levels(args.levels):
+                    standin.reset_stats()
+                    async with ProcessSampler(pid) as sampler:
+                        latencies, timings, statuses, seconds = await upload_level(
+                            uploader, url, target, corpus, level
+                        )
+                    server = sampler.summary()
+                    stored = standin.stats()
+                    result = {
+                        "target": target,
+                        "concurrency": level,
+                        "uploads": len(corpus),
+                        "statuses": statuses,
+                        "latency_ms": summarize(latencies),
+                        "throughput_mb_s": total_bytes / MB / seconds,
+                        "server": server,
+                        "rss_per_inflight_mb": (
+                            server["rss_growth_mb"] / (level * avg_bytes / MB) if server["rss_growth_mb"] is not None else None
+                        ),
+                        "storage": {
+                            "requests": stored["requests"],
+                            "bytes_in": stored["bytes_in"],
+                            "objects_written": len(stored["puts"]),
+                            "multipart": sum(1 for put in stored["puts"] if put.get("parts")),
+                            "peak_in_flight": stored["peak_in_flight"],
+                        },
+                    }
+                    if level == 1 and len(stored["puts"]) == len(timings):
+                        # Sequential run: the k-th PUT belongs to the k-th upload
+                        lags = [
+                            (put["first_byte"] - sent) * 1000
+                            for put, (_, sent, _) in zip(stored["puts"], timings) if put["first_byte"]
+                        ]
+                        result["storage_lag_ms"] = summarize(lags)
+                        result["buffers_before_storage"] = bool(lags) and min(lags) > 0
+                    results.append(result)
+                    samples[f"{target} x{level}"] = latencies
+                    print(
+                        f"{target:<10} x{level:<3} p50 {result['latency_ms'].get('p50', 0):>8.0f} ms  "
+                        f"{result['throughput_mb_s']:>7.1f} MB/s  "
+                        f"rss +{server['rss_growth_mb'] or 0:>7.1f} MB  statuses {statuses}"
+                    )
+    finally:
+        await uploader.close()
+        await session.close()
+
+    history_run = record_run("uploads", samples, {"levels": args.levels, "uploads": args.uploads})
+    path = write_report(
+        "uploads",
+        {"history_run": history_run, "server_pid": pid, "corpus_bytes": total_bytes, "results": results},
+    )
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,4,8,16", help="concurrent uploads per level")
+    parser.add_argument("--uploads", type=int, default=32, help="files per target and level")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--min-mb", type=float, default=1.0)
+    parser.add_argument("--max-mb", type=float, default=10.0)
+    parser.add_argument("--equipment-id", type=int)
+    parser.add_argument("--customer-id", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--standin-host", default="127.0.0.1")
+    parser.add_argument("--standin-port", type=int, default=DEFAULT_PORT)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()